@@ -0,0 +1,188 @@
+"""Unified ``khtn`` command line entry point.
+
+Subcommands are listed in ``COMMANDS`` as ``"module:function"`` strings and
+the module is imported only when that subcommand runs, so ``khtn --help``
+and shell completion do not import argparse parsers, matplotlib or
+python-docx. Each target is the existing ``main(argv)`` of a tool; the
+remaining arguments are passed through unchanged::
+
+    khtn lesson-plan samples/grade6_light_and_shadow.json --format word
+    khtn timeseries info samples/heating_water_experiment.json
+    khtn completion bash > ~/.local/share/bash-completion/completions/khtn
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+PROG = "khtn"
+
+
+class Command(NamedTuple):
+    """A subcommand and where its implementation lives.
+
+    A NamedTuple rather than a dataclass: importing dataclasses costs a few
+    milliseconds that ``khtn --help`` does not need to pay.
+    """
+
+    target: str
+    help: str
+    # Nested subcommand names, only used for shell completion
+    subcommands: Tuple[str, ...] = ()
+
+
+COMMANDS: Dict[str, Command] = {
+    "lesson-plan": Command(
+        "app.lesson_plan_generator:main",
+        "Tạo kế hoạch bài dạy Markdown/Word từ tệp JSON",
+    ),
+    "timeseries": Command(
+        "app.timeseries_tool:main",
+        "Xử lý dữ liệu thí nghiệm theo chuỗi thời gian",
+        ("validate", "validate-all", "create-sample", "info", "derive", "faults", "report"),
+    ),
+    "planner": Command(
+        "tools.lesson_planner.lesson_plan_generator:main",
+        "Soạn kế hoạch bài dạy tương tác hoặc từ JSON (Markdown)",
+    ),
+    "optimize-docx": Command(
+        "app.docx_optimizer:main",
+        "Giảm dung lượng tệp .docx (ảnh công thức, style, nén)",
+    ),
+    "lint-formulas": Command(
+        "app.latex_lint:main",
+        "Kiểm tra cú pháp công thức LaTeX trong cấu hình JSON/Markdown",
+    ),
+    "serve": Command(
+        "app.server:main",
+        "Chạy máy chủ tạo kế hoạch bài dạy (HTTP hoặc UNIX socket)",
+    ),
+    "benchmark": Command("tools.benchmark:main", "Chạy bộ đo hiệu năng"),
+    "startup": Command("tools.benchmark_startup:main", "Kiểm tra thời gian khởi động các lệnh"),
+}
+
+SHELLS = ("bash", "zsh", "fish")
+
+
+def load_command(name: str) -> Callable[[Optional[List[str]]], Optional[int]]:
+    """Import and return the function implementing a subcommand.
+
+    Args:
+        name: Key of ``COMMANDS``
+
+    Returns:
+        The subcommand's ``main(argv)`` function
+
+    Raises:
+        KeyError: If the subcommand is unknown
+    """
+    module_name, _, function_name = COMMANDS[name].target.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+
+def usage() -> str:
+    """Return the top-level help text, built from the registry only."""
+    width = max(len(name) for name in [*COMMANDS, "completion"])
+    lines = [
+        f"usage: {PROG} <lệnh> [tùy chọn...]",
+        "",
+        "Bộ công cụ KHTN-THCS: kế hoạch bài dạy, dữ liệu thí nghiệm và đo hiệu năng.",
+        "",
+        "Các lệnh:",
+    ]
+    lines.extend(f"  {name:<{width}}  {command.help}" for name, command in COMMANDS.items())
+    lines.append(f"  {'completion':<{width}}  In script tự hoàn thành lệnh ({', '.join(SHELLS)})")
+    lines.append("")
+    lines.append(f"Dùng '{PROG} <lệnh> --help' để xem tùy chọn của từng lệnh.")
+    return "\n".join(lines)
+
+
+def completion_script(shell: str) -> str:
+    """Return a static completion script for ``shell``.
+
+    The subcommand names come from ``COMMANDS``, so completing never starts
+    the tools themselves.
+
+    Raises:
+        ValueError: If the shell is not supported
+    """
+    names = " ".join([*COMMANDS, "completion"])
+    nested = "\n".join(
+        f"        {name}) words=\"{' '.join(command.subcommands)}\" ;;"
+        for name, command in COMMANDS.items()
+        if command.subcommands
+    )
+    bash = f"""_{PROG}() {{
+    local cur=${{COMP_WORDS[COMP_CWORD]}} words=""
+    if [ "$COMP_CWORD" -eq 1 ]; then
+        words="{names}"
+    elif [ "$COMP_CWORD" -eq 2 ]; then
+        case "${{COMP_WORDS[1]}}" in
+{nested}
+        completion) words="{' '.join(SHELLS)}" ;;
+        esac
+    fi
+    if [ -n "$words" ]; then
+        COMPREPLY=( $(compgen -W "$words" -- "$cur") )
+    else
+        COMPREPLY=( $(compgen -f -- "$cur") )
+    fi
+}}
+complete -o filenames -F _{PROG} {PROG}
+"""
+    if shell == "bash":
+        return bash
+    if shell == "zsh":
+        return "autoload -U +X bashcompinit && bashcompinit\n" + bash
+    if shell == "fish":
+        lines = [f"complete -c {PROG} -f -n __fish_use_subcommand -a '{names}'"]
+        for name, command in COMMANDS.items():
+            if command.subcommands:
+                lines.append(
+                    f"complete -c {PROG} -f -n '__fish_seen_subcommand_from {name}' "
+                    f"-a '{' '.join(command.subcommands)}'"
+                )
+        lines.append(
+            f"complete -c {PROG} -f -n '__fish_seen_subcommand_from completion' "
+            f"-a '{' '.join(SHELLS)}'"
+        )
+        return "\n".join(lines) + "\n"
+    raise ValueError(f"Unsupported shell: {shell}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Dispatch ``khtn <command> ...`` to the registered subcommand."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 1
+
+    name, rest = argv[0], argv[1:]
+    if name == "completion":
+        if len(rest) != 1 or rest[0] not in SHELLS:
+            print(f"usage: {PROG} completion {{{','.join(SHELLS)}}}", file=sys.stderr)
+            return 2
+        sys.stdout.write(completion_script(rest[0]))
+        return 0
+
+    if name not in COMMANDS:
+        print(f"❌ Lỗi: Lệnh không hợp lệ '{name}'", file=sys.stderr)
+        print(f"   Sử dụng '{PROG} --help' để xem danh sách lệnh", file=sys.stderr)
+        return 2
+
+    command = load_command(name)
+    # argparse takes the program name shown in usage messages from argv[0]
+    saved_argv = sys.argv
+    sys.argv = [f"{PROG} {name}", *rest]
+    try:
+        result = command(rest)
+    finally:
+        sys.argv = saved_argv
+    return int(result or 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
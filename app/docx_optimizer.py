@@ -0,0 +1,496 @@
+"""Shrink .docx files after they are written.
+
+Formula images rendered without a display size are 300-dpi RGBA PNGs shown
+at a fraction of an inch (and other tools' documents are no better), and
+python-docx's default template carries well over a hundred styles that a
+lesson plan never uses. ``optimize_docx`` rewrites a
+package part by part:
+
+- PNG images are downscaled to the largest size they are displayed at (from
+  the ``wp:extent`` of every picture that shows them) at a target
+  resolution, and re-encoded without text metadata. Images whose visible
+  pixels are all one colour (rendered glyphs on a transparent background)
+  become palette PNGs whose entries are that colour at a few alpha levels.
+- Styles that nothing references, directly or through ``basedOn``/``next``/
+  ``link``, are removed from ``word/styles.xml``.
+- XML parts are deflated at the highest level; media is stored as is.
+
+A rewritten image is kept only if it is smaller than the original, and
+images shown somewhere the size cannot be read from (VML shapes, for
+instance) are never downscaled.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import math
+import posixpath
+import sys
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from app.latex_renderer import DISPLAY_DPI
+
+# Display resolution kept by default, the same as display-size formula renders
+DEFAULT_DPI = DISPLAY_DPI
+# Palette entries (alpha levels) for single-colour images: 16 is a 4-bit PNG
+DEFAULT_COLORS = 16
+DEFAULT_PATHS = ("GiaoAn", "TaiLieu")
+
+_EMU_PER_INCH = 914400
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NAMESPACES = {
+    "w": _W,
+    "wp": "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing",
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+}
+_STYLES_PART = "word/styles.xml"
+# Elements whose w:val names a style
+_STYLE_REFERENCES = ("pStyle", "rStyle", "tblStyle", "styleLink", "numStyleLink")
+# Already-compressed formats are stored, not deflated again
+_STORED_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif")
+
+# Largest display size of a media part in EMU, or None if it is shown
+# somewhere the size is unknown
+DisplaySize = Optional[Tuple[int, int]]
+
+
+@dataclass
+class OptimizationReport:
+    """What ``optimize_docx`` did to one package."""
+
+    original_bytes: int
+    optimized_bytes: int
+    images: int = 0
+    images_rewritten: int = 0
+    image_bytes_before: int = 0
+    image_bytes_after: int = 0
+    styles_removed: int = 0
+    seconds: float = 0.0
+    path: Optional[Path] = None
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.optimized_bytes
+
+    @property
+    def saved_ratio(self) -> float:
+        """Fraction of the original size saved (0.0 to 1.0)."""
+        return self.saved_bytes / self.original_bytes if self.original_bytes else 0.0
+
+
+def _single_colour(image: Any) -> Optional[Tuple[int, int, int]]:
+    """Return the colour of all visible pixels of an RGBA image, if there is one."""
+    visible = image.getchannel("A").point(lambda a: 255 if a else 0)
+    histogram = image.convert("RGB").histogram(mask=visible)
+    colour = []
+    for channel in range(3):
+        counts = histogram[channel * 256 : (channel + 1) * 256]
+        values = [value for value, count in enumerate(counts) if count]
+        if len(values) > 1:
+            return None
+        colour.append(values[0] if values else 0)
+    return (colour[0], colour[1], colour[2])
+
+
+def _alpha_palette(image: Any, colour: Tuple[int, int, int], colors: int) -> Any:
+    """Encode a single-colour RGBA image as a palette image of alpha levels."""
+    levels = max(2, min(colors, 256))
+    step = 255 / (levels - 1)
+    indices = image.getchannel("A").point(lambda a: int(a / step + 0.5))
+    palette_image = indices.convert("P")
+    palette_image.putpalette(list(colour) * levels)
+    palette_image.info["transparency"] = bytes(int(i * step + 0.5) for i in range(levels))
+    return palette_image
+
+
+def optimize_png(
+    data: bytes,
+    display_size: DisplaySize = None,
+    dpi: int = DEFAULT_DPI,
+    colors: int = DEFAULT_COLORS,
+) -> bytes:
+    """Downscale and re-encode one PNG image.
+
+    Args:
+        data: PNG file contents
+        display_size: Largest (cx, cy) in EMU the image is shown at; None
+            keeps the pixel size
+        dpi: Resolution to keep at the display size
+        colors: Palette entries for single-colour images
+
+    Returns:
+        The re-encoded PNG, or ``data`` itself if that is not larger
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    source_dpi = image.info.get("dpi")
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+
+    if display_size is not None:
+        width, height = image.size
+        target_w = math.ceil(display_size[0] / _EMU_PER_INCH * dpi)
+        target_h = math.ceil(display_size[1] / _EMU_PER_INCH * dpi)
+        scale = max(target_w / width, target_h / height)
+        if scale < 1:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            # Resample premultiplied so transparent pixels do not bleed in
+            image = image.convert("RGBa").resize(size, Image.LANCZOS).convert("RGBA")
+            source_dpi = (dpi, dpi)
+
+    colour = _single_colour(image)
+    if colour is not None:
+        image = _alpha_palette(image, colour, colors)
+
+    options: Dict[str, Any] = {"optimize": True}
+    if source_dpi:
+        options["dpi"] = tuple(round(value) for value in source_dpi)
+    if "transparency" in image.info:
+        options["transparency"] = image.info["transparency"]
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", **options)
+    result = buffer.getvalue()
+    return result if len(result) < len(data) else data
+
+
+def _rels_name(part_name: str) -> str:
+    directory, name = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _relationship_targets(rels_xml: bytes, part_name: str) -> Dict[str, str]:
+    """Map relationship ids of a part to the part names they point at."""
+    from lxml import etree
+
+    targets = {}
+    directory = posixpath.dirname(part_name)
+    for rel in etree.fromstring(rels_xml):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            name = target.lstrip("/")
+        else:
+            name = posixpath.normpath(posixpath.join(directory, target))
+        targets[rel.get("Id")] = name
+    return targets
+
+
+def _merge_size(sizes: Dict[str, DisplaySize], name: str, size: DisplaySize) -> None:
+    if name in sizes and (sizes[name] is None or size is None):
+        sizes[name] = None
+    elif name in sizes:
+        current = sizes[name]
+        sizes[name] = (max(current[0], size[0]), max(current[1], size[1]))
+    else:
+        sizes[name] = size
+
+
+def display_sizes(parts: Dict[str, bytes]) -> Dict[str, DisplaySize]:
+    """Find the largest size every referenced media part is displayed at.
+
+    Args:
+        parts: Package contents by part name
+
+    Returns:
+        Display size in EMU per media part name; None where some reference
+        has no readable size
+    """
+    from lxml import etree
+
+    sizes: Dict[str, DisplaySize] = {}
+    for name, data in parts.items():
+        rels = parts.get(_rels_name(name))
+        if not name.endswith(".xml") or rels is None:
+            continue
+        targets = _relationship_targets(rels, name)
+        media = {rel_id: target for rel_id, target in targets.items() if "/media/" in target}
+        if not media:
+            continue
+        root = etree.fromstring(data)
+        sized: Set[Any] = set()
+        for drawing in root.xpath("//wp:inline | //wp:anchor", namespaces=_NAMESPACES):
+            extents = drawing.xpath("wp:extent", namespaces=_NAMESPACES)
+            for attribute in drawing.xpath(".//a:blip/@r:embed", namespaces={**_NAMESPACES, "r": _R}):
+                if attribute not in media:
+                    continue
+                size = None
+                if extents:
+                    size = (int(extents[0].get("cx")), int(extents[0].get("cy")))
+                _merge_size(sizes, media[attribute], size)
+                sized.add(attribute)
+        for attribute in root.xpath("//@*[namespace-uri()=$ns]", ns=_R):
+            if attribute in media and attribute not in sized:
+                _merge_size(sizes, media[attribute], None)
+    return sizes
+
+
+def prune_styles(parts: Dict[str, bytes]) -> int:
+    """Remove styles that no part references from ``word/styles.xml``.
+
+    Default styles and everything kept styles point at through ``basedOn``,
+    ``next`` or ``link`` stay.
+
+    Args:
+        parts: Package contents by part name; updated in place
+
+    Returns:
+        Number of styles removed
+    """
+    from lxml import etree
+
+    if _STYLES_PART not in parts:
+        return 0
+    used: Set[str] = set()
+    query = " | ".join(f"//w:{element}/@w:val" for element in _STYLE_REFERENCES)
+    for name, data in parts.items():
+        if name == _STYLES_PART or not name.startswith("word/") or not name.endswith(".xml"):
+            continue
+        used.update(etree.fromstring(data).xpath(query, namespaces=_NAMESPACES))
+
+    root = etree.fromstring(parts[_STYLES_PART])
+    styles = {style.get(f"{{{_W}}}styleId"): style for style in root.iterfind("w:style", _NAMESPACES)}
+    pending = [
+        style_id
+        for style_id, style in styles.items()
+        if style_id in used or style.get(f"{{{_W}}}default") in ("1", "true", "on")
+    ]
+    keep: Set[str] = set()
+    while pending:
+        style_id = pending.pop()
+        if style_id in keep or style_id not in styles:
+            continue
+        keep.add(style_id)
+        for link in ("basedOn", "next", "link"):
+            pending.extend(styles[style_id].xpath(f"w:{link}/@w:val", namespaces=_NAMESPACES))
+
+    removed = 0
+    for style_id, style in styles.items():
+        if style_id not in keep:
+            root.remove(style)
+            removed += 1
+    if removed:
+        parts[_STYLES_PART] = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    return removed
+
+
+def optimize_docx(
+    source: Union[str, Path, IO[bytes]],
+    target: Union[str, Path, IO[bytes]],
+    dpi: int = DEFAULT_DPI,
+    colors: int = DEFAULT_COLORS,
+    remove_unused_styles: bool = True,
+    compresslevel: int = 9,
+) -> OptimizationReport:
+    """Write a smaller copy of a .docx package.
+
+    The source is read completely first, so ``target`` may be the same path.
+
+    Args:
+        source: .docx path or binary stream
+        target: Path or writable binary stream for the result
+        dpi: Resolution to keep for images at their display size
+        colors: Palette entries for single-colour images (16: 4-bit PNG)
+        remove_unused_styles: Drop styles nothing references
+        compresslevel: zlib level 0-9 for XML parts
+
+    Returns:
+        OptimizationReport with sizes before and after
+
+    Raises:
+        zipfile.BadZipFile: If ``source`` is not a zip package
+    """
+    start = time.perf_counter()
+    data = Path(source).read_bytes() if isinstance(source, (str, Path)) else source.read()
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = archive.namelist()
+        parts = {name: archive.read(name) for name in names}
+
+    report = OptimizationReport(original_bytes=len(data), optimized_bytes=0)
+    for name, size in display_sizes(parts).items():
+        if not name.lower().endswith(".png") or name not in parts:
+            continue
+        before = parts[name]
+        after = optimize_png(before, size, dpi=dpi, colors=colors)
+        report.images += 1
+        report.image_bytes_before += len(before)
+        report.image_bytes_after += len(after)
+        if after is not before:
+            report.images_rewritten += 1
+            parts[name] = after
+    if remove_unused_styles:
+        report.styles_removed = prune_styles(parts)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in names:
+            if name.lower().endswith(_STORED_SUFFIXES):
+                archive.writestr(name, parts[name], compress_type=zipfile.ZIP_STORED)
+            else:
+                archive.writestr(
+                    name, parts[name], compress_type=zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+                )
+    result = buffer.getvalue()
+    if isinstance(target, (str, Path)):
+        Path(target).write_bytes(result)
+        report.path = Path(target)
+    else:
+        target.write(result)
+    report.optimized_bytes = len(result)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def find_documents(paths: Iterable[Path]) -> List[Path]:
+    """Expand directories into the .docx files below them (sorted)."""
+    documents: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            documents.extend(sorted(p for p in path.rglob("*.docx") if not p.name.startswith("~$")))
+        else:
+            documents.append(path)
+    return documents
+
+
+def output_path(output_dir: Path, document: Path, roots: Iterable[Path]) -> Path:
+    """Where ``--output-dir`` writes the optimized copy of ``document``.
+
+    A document found below a directory argument keeps its path relative to
+    that directory, under the directory's name (``GiaoAn/bai1.docx`` ->
+    ``OUT/GiaoAn/bai1.docx``), so same-named files from different folders
+    do not collide. Documents given directly are written by name.
+    """
+    for root in roots:
+        if root.is_dir():
+            try:
+                relative = document.relative_to(root)
+            except ValueError:
+                continue
+            return output_dir / root.resolve().name / relative
+    return output_dir / document.name
+
+
+def _format_size(size: int) -> str:
+    return f"{size / 1024:.1f} KB"
+
+
+def format_report(reports: List[OptimizationReport]) -> str:
+    """Render reports as a plain-text table with a total row."""
+    header = ("Tệp", "Trước", "Sau", "Giảm", "Ảnh", "Style bỏ", "Thời gian")
+    rows = [
+        (
+            str(report.path),
+            _format_size(report.original_bytes),
+            _format_size(report.optimized_bytes),
+            f"{report.saved_ratio:.0%}",
+            f"{report.images_rewritten}/{report.images}",
+            str(report.styles_removed),
+            f"{report.seconds * 1000:.0f} ms",
+        )
+        for report in reports
+    ]
+    before = sum(report.original_bytes for report in reports)
+    after = sum(report.optimized_bytes for report in reports)
+    rows.append(
+        (
+            "Tổng",
+            _format_size(before),
+            _format_size(after),
+            f"{(before - after) / before:.0%}" if before else "0%",
+            f"{sum(r.images_rewritten for r in reports)}/{sum(r.images for r in reports)}",
+            str(sum(report.styles_removed for report in reports)),
+            f"{sum(report.seconds for report in reports) * 1000:.0f} ms",
+        )
+    )
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in [header, *rows]]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Giảm dung lượng tệp .docx: thu nhỏ ảnh công thức về kích thước hiển thị, "
+            "chuyển sang PNG bảng màu, bỏ style không dùng và nén lại. "
+            "Mặc định chỉ báo cáo, không ghi tệp."
+        )
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        default=[Path(p) for p in DEFAULT_PATHS],
+        help="Tệp .docx hoặc thư mục (mặc định: GiaoAn TaiLieu).",
+    )
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("-o", "--output-dir", type=Path, help="Ghi tệp đã tối ưu vào thư mục này.")
+    output.add_argument("--in-place", action="store_true", help="Ghi đè tệp gốc.")
+    parser.add_argument(
+        "--dpi", type=int, default=DEFAULT_DPI, help=f"Độ phân giải ảnh giữ lại (mặc định {DEFAULT_DPI})."
+    )
+    parser.add_argument(
+        "--colors",
+        type=int,
+        default=DEFAULT_COLORS,
+        help=f"Số màu bảng màu cho ảnh công thức (mặc định {DEFAULT_COLORS}).",
+    )
+    parser.add_argument("--keep-styles", action="store_true", help="Không bỏ style không dùng.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    documents = find_documents(args.paths)
+    if not documents:
+        print("⚠️  Không tìm thấy tệp .docx nào.")
+        return 1
+
+    reports = []
+    written: Dict[Path, Path] = {}
+    for document in documents:
+        if args.in_place:
+            target: Union[Path, IO[bytes]] = document
+        elif args.output_dir:
+            target = output_path(args.output_dir, document, args.paths)
+            if target in written:
+                print(
+                    f"❌ Bỏ qua {document}: {target} đã được ghi từ {written[target]}",
+                    file=sys.stderr,
+                )
+                continue
+            written[target] = document
+            target.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            target = io.BytesIO()
+        try:
+            report = optimize_docx(
+                document,
+                target,
+                dpi=args.dpi,
+                colors=args.colors,
+                remove_unused_styles=not args.keep_styles,
+            )
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"❌ Lỗi khi xử lý {document}: {e}", file=sys.stderr)
+            continue
+        report.path = document
+        reports.append(report)
+
+    if reports:
+        print(format_report(reports))
+    if not args.in_place and not args.output_dir:
+        print("ℹ️  Chỉ báo cáo; dùng --output-dir hoặc --in-place để ghi tệp.")
+    return 0 if len(reports) == len(documents) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Bulk construction of Word tables.
+
+Building a table through python-docx proxies (``table.add_row()``, then
+``cell.text = ...`` and ``run.add_picture`` per cell) costs several proxy
+objects and XPath queries per cell, and every picture scans the whole
+document for the next free shape id. Tables with hundreds of rows take
+seconds that way.
+
+``add_table`` instead generates the WordprocessingML of all rows as one
+string, parses it once and appends the rows to a table created by
+python-docx (which supplies the grid and table properties). Pictures are
+registered beforehand with an ``ImageRegistry``, which returns the
+relationship id and size to reference from the generated ``w:drawing`` runs.
+
+The registry works from images whose pixel size, resolution and SHA-1 are
+already known (rendered formulas): it adds each image part once,
+without python-docx re-reading the PNG header or re-hashing every image in
+the package, and hands out shape ids from a counter instead of scanning the
+document for each picture. It can also attach an SVG version to an image:
+the picture then references the PNG as usual and the SVG through an
+``asvg:svgBlip`` extension, which Word 2016 and later display while older
+readers fall back to the PNG.
+"""
+
+from __future__ import annotations
+
+import itertools
+import re
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Sequence, Union
+from xml.sax.saxutils import escape
+
+if TYPE_CHECKING:
+    from docx.document import Document
+    from docx.parts.story import StoryPart
+    from docx.table import Table
+    from docx.text.run import Run
+
+    from app.latex_renderer import RenderedFormula
+
+_PICTURE_URI = "http://schemas.openxmlformats.org/drawingml/2006/picture"
+_SVG_NAMESPACE = "http://schemas.microsoft.com/office/drawing/2016/SVG/main"
+# a:ext uri under which Office stores the SVG version of a picture
+_SVG_EXTENSION_URI = "{96DAC541-7B7A-43D3-8B79-37D633B846F1}"
+_SVG_CONTENT_TYPE = "image/svg+xml"
+# Characters python-docx turns into w:tab / w:br when assigning run text
+_BREAKS = re.compile(r"(\t|\r\n|\n|\r)")
+
+
+@dataclass(frozen=True)
+class InlineImage:
+    """An image part already related to a document, ready to reference."""
+
+    rel_id: str
+    # Display size in EMU
+    cx: int
+    cy: int
+    filename: str
+    # Relationship id of an SVG version shown instead of the image, if any
+    svg_rel_id: Optional[str] = None
+
+
+Cell = Union[str, InlineImage, None]
+
+
+def _next_image_partname(part: StoryPart, ext: str) -> str:
+    """Return the first free ``/word/media/imageN.ext`` name, like python-docx."""
+    from docx.opc.packuri import PackURI
+
+    used = {image_part.partname.idx for image_part in part.package.image_parts}
+    number = next(n for n in itertools.count(1) if n not in used)
+    return PackURI(f"/word/media/image{number}.{ext}")
+
+
+class ImageRegistry:
+    """Image parts and shape ids of one document part, tracked incrementally.
+
+    Pictures added to the part by other means (``doc.add_picture``) are not
+    seen by the shape-id counter; call ``invalidate`` afterwards.
+    """
+
+    def __init__(self, part: StoryPart):
+        """Initialize the registry.
+
+        Args:
+            part: Story part the pictures appear in (usually ``doc.part``)
+        """
+        self.part = part
+        self._images: Dict[Hashable, InlineImage] = {}
+        self._rel_ids: Dict[str, str] = {}
+        self._next_shape_id: Optional[int] = None
+
+    def image(
+        self,
+        key: Hashable,
+        load: Callable[[], RenderedFormula],
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        load_svg: Optional[Callable[[], RenderedFormula]] = None,
+    ) -> InlineImage:
+        """Return the image registered under ``key``, adding it on first use.
+
+        Args:
+            key: Identifies the image and its display size (e.g. formula and height)
+            load: Called once to produce the rendered (PNG) image
+            width: Display width (EMU or a ``docx.shared`` length)
+            height: Display height; with only one of width/height given, the
+                other keeps the aspect ratio
+            load_svg: Called once to produce an SVG version of the image;
+                the PNG becomes its fallback
+
+        Returns:
+            InlineImage to place in table cells or runs
+
+        Raises:
+            Whatever ``load`` raises; nothing is registered in that case
+        """
+        image = self._images.get(key)
+        if image is None:
+            image = self._add(load(), width, height)
+            if load_svg is not None:
+                svg = load_svg()
+                image = replace(image, svg_rel_id=self._relate(svg, _SVG_CONTENT_TYPE))
+            self._images[key] = image
+        return image
+
+    def _relate(self, rendered: RenderedFormula, content_type: str, image: Any = None) -> str:
+        """Relate the part holding ``rendered`` to the story part, adding it once."""
+        from docx.opc.constants import RELATIONSHIP_TYPE as RT
+        from docx.parts.image import ImagePart
+
+        rel_id = self._rel_ids.get(rendered.sha1)
+        if rel_id is None:
+            partname = _next_image_partname(self.part, rendered.image_format)
+            image_part = ImagePart(partname, content_type, rendered.data, image)
+            self.part.package.image_parts.append(image_part)
+            rel_id = self.part.relate_to(image_part, RT.IMAGE)
+            self._rel_ids[rendered.sha1] = rel_id
+        return rel_id
+
+    def _add(
+        self, rendered: RenderedFormula, width: Optional[int], height: Optional[int]
+    ) -> InlineImage:
+        from docx.image.image import Image
+        from docx.image.png import Png
+
+        header = Png(rendered.width_px, rendered.height_px, rendered.dpi, rendered.dpi)
+        image = Image(rendered.data, rendered.filename, header)
+        rel_id = self._relate(rendered, image.content_type, image)
+        cx, cy = image.scaled_dimensions(width, height)
+        return InlineImage(rel_id=rel_id, cx=int(cx), cy=int(cy), filename=rendered.filename)
+
+    def next_shape_id(self) -> int:
+        """Reserve a document-unique id for a new picture."""
+        if self._next_shape_id is None:
+            self._next_shape_id = self.part.next_id
+        shape_id = self._next_shape_id
+        self._next_shape_id += 1
+        return shape_id
+
+    def invalidate(self) -> None:
+        """Rescan the document for the next shape id on the next picture."""
+        self._next_shape_id = None
+
+    def add_picture(self, run: Run, image: InlineImage) -> None:
+        """Append an inline picture to a run, like ``run.add_picture``."""
+        from docx.oxml.shape import CT_Inline
+        from docx.shared import Emu
+
+        inline = CT_Inline.new_pic_inline(
+            self.next_shape_id(), image.rel_id, image.filename, Emu(image.cx), Emu(image.cy)
+        )
+        if image.svg_rel_id is not None:
+            from docx.oxml import parse_xml
+            from docx.oxml.ns import nsdecls
+
+            extension = parse_xml(f"<a:extLst {nsdecls('a', 'r')}>{_svg_extension(image)}</a:extLst>")
+            inline.graphic.graphicData.pic.blipFill.blip.append(extension)
+        run._r.add_drawing(inline)
+
+
+def _svg_extension(image: InlineImage) -> str:
+    return (
+        f'<a:ext uri="{_SVG_EXTENSION_URI}">'
+        f'<asvg:svgBlip xmlns:asvg="{_SVG_NAMESPACE}" r:embed="{image.svg_rel_id}"/>'
+        "</a:ext>"
+    )
+
+
+def _text_runs(text: str, style_id: Optional[str] = None) -> str:
+    if not text:
+        return ""
+    rpr = f'<w:rPr><w:rStyle w:val="{style_id}"/></w:rPr>' if style_id else ""
+    parts = []
+    for piece in _BREAKS.split(text):
+        if not piece:
+            continue
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\n", "\r", "\r\n"):
+            parts.append("<w:br/>")
+        else:
+            space = ' xml:space="preserve"' if piece != piece.strip() else ""
+            parts.append(f"<w:t{space}>{escape(piece)}</w:t>")
+    return f"<w:r>{rpr}{''.join(parts)}</w:r>"
+
+
+def _image_run(image: InlineImage, shape_id: int) -> str:
+    name = escape(image.filename, {'"': "&quot;"})
+    blip = f'<a:blip r:embed="{image.rel_id}"/>'
+    if image.svg_rel_id is not None:
+        blip = f'<a:blip r:embed="{image.rel_id}"><a:extLst>{_svg_extension(image)}</a:extLst></a:blip>'
+    return (
+        "<w:r><w:drawing>"
+        "<wp:inline>"
+        f'<wp:extent cx="{image.cx}" cy="{image.cy}"/>'
+        f'<wp:docPr id="{shape_id}" name="Picture {shape_id}"/>'
+        '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+        f'<a:graphic><a:graphicData uri="{_PICTURE_URI}"><pic:pic>'
+        f'<pic:nvPicPr><pic:cNvPr id="0" name="{name}"/><pic:cNvPicPr/></pic:nvPicPr>'
+        f"<pic:blipFill>{blip}<a:stretch><a:fillRect/></a:stretch></pic:blipFill>"
+        '<pic:spPr><a:xfrm><a:off x="0" y="0"/>'
+        f'<a:ext cx="{image.cx}" cy="{image.cy}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"/></pic:spPr>'
+        "</pic:pic></a:graphicData></a:graphic></wp:inline>"
+        "</w:drawing></w:r>"
+    )
+
+
+def add_table(
+    doc: Document,
+    rows: Sequence[Sequence[Cell]],
+    header: Optional[Sequence[str]] = None,
+    style: Optional[str] = None,
+    header_style_id: Optional[str] = None,
+    images: Optional[ImageRegistry] = None,
+) -> Table:
+    """Append a table to a document, generating the XML of all rows at once.
+
+    Args:
+        doc: Document to append to
+        rows: Cell contents per row: text, an ``InlineImage`` from an
+            ``ImageRegistry``, or None for an empty cell
+        header: Optional header row texts
+        style: Table style name (e.g. "Light Grid Accent 1")
+        header_style_id: Character style ID for the header texts (e.g. "Strong")
+        images: Registry to take picture shape ids from, when the images
+            came from one
+
+    Returns:
+        The python-docx Table, usable like any other
+    """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    columns = len(header) if header is not None else max((len(row) for row in rows), default=1)
+    table = doc.add_table(rows=0, cols=columns)
+    if style:
+        table.style = style
+    widths = [gridCol.w.twips for gridCol in table._tbl.tblGrid.gridCol_lst]
+    cell_starts = [f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{w}"/></w:tcPr><w:p>' for w in widths]
+
+    next_shape_id = images.next_shape_id if images is not None else itertools.count(doc.part.next_id).__next__
+    xml = [f"<w:tbl {nsdecls('w', 'wp', 'a', 'pic', 'r')}>"]
+
+    def append_row(cells: Sequence[Cell], style_id: Optional[str] = None) -> None:
+        xml.append("<w:tr>")
+        for index, start in enumerate(cell_starts):
+            content: Any = cells[index] if index < len(cells) else None
+            xml.append(start)
+            if isinstance(content, InlineImage):
+                xml.append(_image_run(content, next_shape_id()))
+            elif content:
+                xml.append(_text_runs(str(content), style_id))
+            xml.append("</w:p></w:tc>")
+        xml.append("</w:tr>")
+
+    if header is not None:
+        append_row(header, header_style_id)
+    for row in rows:
+        append_row(row)
+    xml.append("</w:tbl>")
+
+    generated = parse_xml("".join(xml))
+    table._tbl.extend(list(generated))
+    return table
@@ -0,0 +1,353 @@
+"""Lab report generation for timeseries experiments.
+
+This module turns one or more timeseries data files into an experiment
+report (Word or Markdown) containing a metadata table, summary statistics,
+a chart of the measurements and the fitted linear model rendered as a
+LaTeX formula. Charts are cached by content hash so re-running a report
+over a whole class only draws charts whose data actually changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from app.timeseries_data import TimeseriesData
+
+
+@dataclass
+class SummaryStatistics:
+    """Summary statistics of the temperature column of an experiment."""
+
+    count: int
+    duration_s: float
+    min_C: float
+    max_C: float
+    mean_C: float
+    stdev_C: float
+    # Linear fit temp_C = intercept + slope * time_s
+    slope_C_per_s: float
+    intercept_C: float
+    r_squared: float
+
+    def fitted_model_latex(self) -> str:
+        """Return the fitted linear model as a LaTeX expression."""
+        sign = "+" if self.slope_C_per_s >= 0 else "-"
+        return (
+            f"T(t) = {self.intercept_C:.2f} {sign} "
+            f"{abs(self.slope_C_per_s):.3f}\\,t"
+        )
+
+
+def compute_statistics(data: TimeseriesData) -> SummaryStatistics:
+    """Compute summary statistics over whole columns of the data.
+
+    Args:
+        data: Timeseries data with at least one point
+
+    Returns:
+        SummaryStatistics for the temperature column
+
+    Raises:
+        ValueError: If the data contains no points
+    """
+    times = data.column("time_s")
+    temps = data.column("temp_C")
+    if not temps:
+        raise ValueError("Cannot compute statistics for empty timeseries")
+
+    mean_t = statistics.fmean(times)
+    mean_c = statistics.fmean(temps)
+    slope, intercept, r_squared = 0.0, temps[0], 0.0
+    # Least squares by hand: statistics.linear_regression needs Python 3.10
+    sxx = sum((t - mean_t) ** 2 for t in times)
+    if len(temps) >= 2 and sxx > 0:
+        sxy = sum((t - mean_t) * (c - mean_c) for t, c in zip(times, temps))
+        syy = sum((c - mean_c) ** 2 for c in temps)
+        slope = sxy / sxx
+        intercept = mean_c - slope * mean_t
+        if syy > 0:
+            r_squared = min(1.0, sxy * sxy / (sxx * syy))
+
+    return SummaryStatistics(
+        count=len(temps),
+        duration_s=max(times) - min(times),
+        min_C=min(temps),
+        max_C=max(temps),
+        mean_C=mean_c,
+        stdev_C=statistics.pstdev(temps),
+        slope_C_per_s=slope,
+        intercept_C=intercept,
+        r_squared=r_squared,
+    )
+
+
+def decimate(
+    times: Sequence[float], values: Sequence[float], max_points: int
+) -> Tuple[List[float], List[float]]:
+    """Reduce a series to at most ``max_points`` points for plotting.
+
+    Uses min/max bucketing: each bucket keeps its lowest and highest sample
+    in time order, so spikes stay visible in the chart.
+
+    Args:
+        times: Time column
+        values: Value column (same length as ``times``)
+        max_points: Upper bound on the number of returned points (>= 2)
+
+    Returns:
+        Tuple of (times, values) lists
+    """
+    n = len(values)
+    if n <= max_points or max_points < 2:
+        return list(times), list(values)
+
+    buckets = max_points // 2
+    out_t: List[float] = []
+    out_v: List[float] = []
+    for b in range(buckets):
+        lo = b * n // buckets
+        hi = (b + 1) * n // buckets
+        if hi <= lo:
+            continue
+        window = values[lo:hi]
+        i_min = lo + window.index(min(window))
+        i_max = lo + window.index(max(window))
+        for i in sorted({i_min, i_max}):
+            out_t.append(times[i])
+            out_v.append(values[i])
+    return out_t, out_v
+
+
+def render_chart(
+    data: TimeseriesData,
+    cache_dir: Path,
+    max_points: int = 500,
+    stats: Optional[SummaryStatistics] = None,
+) -> Path:
+    """Render the temperature chart to PNG, reusing a cached image if present.
+
+    The file name is derived from a hash of the decimated points, the title
+    and the fitted line, so identical data never gets drawn twice.
+
+    Args:
+        data: Timeseries data to plot
+        cache_dir: Directory holding cached chart images
+        max_points: Maximum number of points drawn after decimation
+        stats: Precomputed statistics used to draw the fitted line
+
+    Returns:
+        Path to the chart image
+    """
+    times, temps = decimate(data.column("time_s"), data.column("temp_C"), max_points)
+    fit = (stats.intercept_C, stats.slope_C_per_s) if stats else None
+
+    payload = json.dumps(
+        {"title": data.metadata.topic, "t": times, "v": temps, "fit": fit},
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    chart_path = cache_dir / f"chart_{digest}.png"
+    if chart_path.exists():
+        return chart_path
+
+    # Plotting libraries are only needed on a cache miss
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(6, 3.5))
+    try:
+        ax.plot(times, temps, marker="o" if len(times) <= 50 else None, linewidth=1.5)
+        if fit and times:
+            t0, t1 = min(times), max(times)
+            ax.plot(
+                [t0, t1],
+                [fit[0] + fit[1] * t0, fit[0] + fit[1] * t1],
+                linestyle="--",
+                color="gray",
+            )
+        ax.set_title(data.metadata.topic)
+        ax.set_xlabel("Thời gian (s)")
+        ax.set_ylabel("Nhiệt độ (°C)")
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(chart_path, dpi=150, format="png")
+    finally:
+        plt.close(fig)
+    return chart_path
+
+
+def _metadata_rows(data: TimeseriesData) -> List[Tuple[str, str]]:
+    variables = ", ".join(f"{var.name} ({var.unit})" for var in data.variables)
+    return [
+        ("Chủ đề", data.metadata.topic),
+        ("Thiết bị", data.metadata.device),
+        ("Tần số lấy mẫu", f"{data.metadata.sampling_rate_hz} Hz"),
+        ("Thời gian tạo", data.metadata.created_at or ""),
+        ("Biến số", variables),
+    ]
+
+
+def _statistics_rows(stats: SummaryStatistics) -> List[Tuple[str, str]]:
+    return [
+        ("Số điểm dữ liệu", str(stats.count)),
+        ("Khoảng thời gian", f"{stats.duration_s:g} s"),
+        ("Nhiệt độ thấp nhất", f"{stats.min_C:.2f} °C"),
+        ("Nhiệt độ cao nhất", f"{stats.max_C:.2f} °C"),
+        ("Nhiệt độ trung bình", f"{stats.mean_C:.2f} °C"),
+        ("Độ lệch chuẩn", f"{stats.stdev_C:.2f} °C"),
+        ("Tốc độ thay đổi", f"{stats.slope_C_per_s:.3f} °C/s"),
+        ("Hệ số xác định R²", f"{stats.r_squared:.4f}"),
+    ]
+
+
+def _markdown_table(headers: Tuple[str, str], rows: List[Tuple[str, str]]) -> str:
+    lines = [" | ".join(headers), " | ".join(["---"] * len(headers))]
+    lines.extend(f"{label} | {value or '-'}" for label, value in rows)
+    return "\n".join(lines)
+
+
+class ExperimentReport:
+    """Build experiment reports from one or more timeseries datasets."""
+
+    def __init__(self, output_dir: Optional[Path] = None, max_points: int = 500):
+        """Initialize the report builder.
+
+        Args:
+            output_dir: Directory for cached charts and formula images
+            max_points: Maximum number of points drawn in each chart
+        """
+        self.output_dir = output_dir or Path("outputs")
+        self.chart_dir = self.output_dir / "charts"
+        self.max_points = max_points
+
+    def _prepare(self, data: TimeseriesData) -> Tuple[SummaryStatistics, Path]:
+        stats = compute_statistics(data)
+        chart_path = render_chart(data, self.chart_dir, self.max_points, stats)
+        return stats, chart_path
+
+    def build_markdown(
+        self, datasets: Sequence[TimeseriesData], output_path: Path
+    ) -> str:
+        """Build a Markdown report; chart links are relative to ``output_path``.
+
+        Args:
+            datasets: Experiments to include, one section each
+            output_path: Where the Markdown file will be written
+
+        Returns:
+            Markdown text of the report
+        """
+        lines: List[str] = ["# Báo cáo thí nghiệm"]
+        for index, data in enumerate(datasets, 1):
+            stats, chart_path = self._prepare(data)
+            chart_link = Path(
+                os.path.relpath(chart_path, output_path.parent)
+            ).as_posix()
+
+            lines.append(f"## {index}. {data.metadata.topic}")
+            lines.append("### Thông tin thí nghiệm")
+            lines.append(_markdown_table(("Mục", "Giá trị"), _metadata_rows(data)))
+            lines.append("### Thống kê")
+            lines.append(_markdown_table(("Đại lượng", "Giá trị"), _statistics_rows(stats)))
+            lines.append("### Mô hình tuyến tính")
+            lines.append(f"$${stats.fitted_model_latex()}$$")
+            lines.append(f"![Đồ thị nhiệt độ theo thời gian]({chart_link})")
+        return "\n\n".join(lines) + "\n"
+
+    def export_markdown(
+        self, datasets: Sequence[TimeseriesData], output_path: Path
+    ) -> None:
+        """Write a Markdown report to ``output_path``."""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(
+            self.build_markdown(datasets, output_path), encoding="utf-8"
+        )
+
+    def export_docx(
+        self, datasets: Sequence[TimeseriesData], output_path: Path
+    ) -> None:
+        """Write a Word report to ``output_path``.
+
+        Args:
+            datasets: Experiments to include, one section each
+            output_path: Path where the Word document should be saved
+        """
+        from docx.shared import Inches
+
+        from app.word_exporter import WordExporter
+
+        exporter = WordExporter(output_dir=self.output_dir)
+        doc = exporter.new_document()
+        exporter.add_metadata_section(doc, {"title": "Báo cáo thí nghiệm"})
+
+        for index, data in enumerate(datasets, 1):
+            stats, chart_path = self._prepare(data)
+            exporter.add_heading(doc, f"{index}. {data.metadata.topic}", level=2)
+
+            exporter.add_heading(doc, "Thông tin thí nghiệm", level=3)
+            self._add_key_value_table(doc, _metadata_rows(data))
+
+            exporter.add_heading(doc, "Thống kê", level=3)
+            self._add_key_value_table(doc, _statistics_rows(stats))
+
+            exporter.add_heading(doc, "Mô hình tuyến tính", level=3)
+            para = doc.add_paragraph()
+            exporter.add_text_with_latex(
+                para, f"${stats.fitted_model_latex()}$", image_height=0.3
+            )
+
+            exporter.add_picture(doc, chart_path, width=Inches(6.0))
+            doc.add_paragraph()
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        doc.save(output_path)
+
+    @staticmethod
+    def _add_key_value_table(doc, rows: List[Tuple[str, str]]) -> None:
+        table = doc.add_table(rows=len(rows), cols=2)
+        table.style = "Light Grid Accent 1"
+        for row, (label, value) in zip(table.rows, rows):
+            row.cells[0].text = label
+            row.cells[1].text = value or "-"
+
+
+def generate_report(
+    input_paths: Sequence[Path],
+    output_path: Path,
+    start_s: Optional[float] = None,
+    end_s: Optional[float] = None,
+    max_points: int = 500,
+) -> None:
+    """Convenience function to build a report from data files.
+
+    The format follows the output suffix: ``.docx`` for Word, anything else
+    for Markdown.
+
+    Args:
+        input_paths: Timeseries JSON files to include
+        output_path: Report file to write
+        start_s: Optional window start in seconds
+        end_s: Optional window end in seconds
+        max_points: Maximum number of points drawn in each chart
+    """
+    datasets = []
+    for path in input_paths:
+        data = TimeseriesData.from_json_file(Path(path))
+        if start_s is not None or end_s is not None:
+            data = data.slice(start_s, end_s)
+        datasets.append(data)
+
+    report = ExperimentReport(output_dir=output_path.parent, max_points=max_points)
+    if output_path.suffix.lower() == ".docx":
+        report.export_docx(datasets, output_path)
+    else:
+        report.export_markdown(datasets, output_path)
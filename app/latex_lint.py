@@ -0,0 +1,354 @@
+"""Fast syntax check of mathtext formulas, and a lint command for configs.
+
+Matplotlib reports a broken formula only after a figure has been created
+and the text laid out, which costs milliseconds per attempt. ``check_syntax``
+finds the usual mistakes from the token stream alone, in microseconds:
+
+- unbalanced braces, and ``%`` or ``#`` without a backslash
+- commands mathtext does not know (``\\le``, ``\\ce``, ``\\dfrac`` typos)
+- missing, unbraced or empty arguments (``\\frac a b``, ``\\sqrt{}``)
+- ``^``/``_`` without an argument, double super- or subscripts
+- ``\\left``/``\\right`` without a delimiter or without their partner
+
+The check is conservative: everything it rejects, mathtext rejects too, but
+an expression that passes may still fail to render. The set of known
+commands is read from Matplotlib's mathtext tables the first time it is
+needed (this imports Matplotlib but creates no figure). Those tables are
+private; if a Matplotlib release moves them, the check is skipped and
+every expression is left to the renderer.
+
+``khtn lint-formulas PATHS`` reports every formula in JSON lesson configs
+and Markdown files that fails the check, with where it was found; with
+``--render`` it also renders the formulas that pass and reports those that
+still fail.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from app.latex_normalizer import tokenize
+
+DEFAULT_PATHS = ("GiaoAn", "TaiLieu", "samples")
+# Same as WordExporter._LATEX_PATTERN, but a formula never spans lines
+_INLINE = re.compile(r"\$([^\$\n]+)\$")
+
+# Commands followed by braced arguments: (count, whether they may be empty)
+_GROUP_ARGS = {
+    r"\frac": (2, False),
+    r"\dfrac": (2, False),
+    r"\binom": (2, False),
+    r"\sqrt": (1, False),
+    r"\overline": (1, False),
+    r"\underline": (1, False),
+    r"\overset": (2, True),
+    r"\underset": (2, True),
+    r"\genfrac": (6, True),
+    r"\text": (1, True),
+    r"\operatorname": (1, True),
+    r"\boldsymbol": (1, True),
+    r"\substack": (1, True),
+    r"\hspace": (1, True),
+    r"\phantom": (1, True),
+    r"\llap": (1, True),
+    r"\rlap": (1, True),
+}
+_DELIMITED = (r"\left", r"\middle", r"\right")
+# Control symbols mathtext draws as characters; the spacing ones (\, etc.)
+# come from its tables
+_CONTROL_SYMBOLS = frozenset({"\\%", "\\$", "\\{", "\\}", "\\[", "\\]", "\\_", "\\|", "\\\\"})
+
+
+@functools.lru_cache(maxsize=1)
+def _mathtext_tables() -> Optional[
+    Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str], FrozenSet[str]]
+]:
+    """Known command names, ``\\math<font>`` names, accents and delimiters.
+
+    Returns:
+        The tables, or None if this Matplotlib does not have them
+    """
+    try:
+        from matplotlib import _mathtext
+        from matplotlib._mathtext_data import tex2uni
+
+        parser = _mathtext.Parser
+        accents = {f"\\{name}" for name in [*parser._accent_map, *parser._wide_accents]}
+        fonts = {f"\\math{name}" for name in parser._fontnames}
+        known = {
+            *_CONTROL_SYMBOLS,
+            *(f"\\{name}" for name in tex2uni),
+            *(f"\\{name}" for name in parser._fontnames),
+            *(f"\\{name}" for name in parser._function_names),
+            *(name for name in parser._space_widths if name.startswith("\\")),
+            *accents,
+            *_GROUP_ARGS,
+            *_DELIMITED,
+        }
+        delimiters = frozenset(parser._delims)
+    except (ImportError, AttributeError, TypeError):
+        return None
+    if "\\alpha" not in known or "\\hat" not in accents or "(" not in delimiters:
+        # Tables that no longer hold what they used to would reject valid input
+        return None
+    return frozenset(known), frozenset(fonts), frozenset(accents), delimiters
+
+
+def _group_end(tokens: List[str], start: int) -> int:
+    """Index of the ``}`` closing the ``{`` at ``start``, or -1."""
+    depth = 0
+    for index in range(start, len(tokens)):
+        if tokens[index] == "{":
+            depth += 1
+        elif tokens[index] == "}":
+            depth -= 1
+            if depth == 0:
+                return index
+    return -1
+
+
+def check_syntax(latex_expr: str) -> Optional[str]:
+    """Check an expression for errors that make mathtext reject it.
+
+    Args:
+        latex_expr: LaTeX expression (without surrounding ``$``)
+
+    Returns:
+        Description of the first error found, or None if none was found
+        (always None if Matplotlib's mathtext tables are unavailable)
+    """
+    tables = _mathtext_tables()
+    if tables is None:
+        return None
+    known, fonts, accents, delimiters = tables
+    tokens: List[str] = []
+    # Indices of tokens directly followed by whitespace
+    spaced = set()
+    for token in tokenize(latex_expr.strip()):
+        if not token.isspace():
+            tokens.append(token)
+        elif tokens:
+            spaced.add(len(tokens) - 1)
+    depth = 0
+    open_delimiters = 0
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth < 0:
+                return "Unbalanced '}'"
+        elif token in ("%", "#"):
+            return f"Unescaped '{token}' (write \\{token})"
+        elif token in ("^", "_"):
+            if index in spaced:
+                # Mathtext takes the whitespace itself as the argument, so
+                # "x ^ 2 ^ 3" is x^{ }2^{ }3 while "x^ ^2" is a double script
+                if following == token:
+                    return "Double superscript" if token == "^" else "Double subscript"
+            elif following is None or following in ("}", "^", "_"):
+                return f"Missing argument after '{token}'"
+            else:
+                end = _group_end(tokens, index + 1) if following == "{" else index + 1
+                if end != -1 and end + 1 < len(tokens) and tokens[end + 1] == token:
+                    return "Double superscript" if token == "^" else "Double subscript"
+        elif token.startswith("\\") and token[1:2].isascii():
+            if token in fonts:
+                if following != "{":
+                    return f"{token} must be followed by a braced group"
+            elif token not in known:
+                return f"Unknown command {token}"
+            elif token in accents:
+                if following is None or following == "}":
+                    return f"Missing argument after {token}"
+            elif token in _DELIMITED:
+                if following not in delimiters:
+                    return f"{token} must be followed by a delimiter"
+                if token == r"\left":
+                    open_delimiters += 1
+                elif token == r"\right":
+                    open_delimiters -= 1
+                    if open_delimiters < 0:
+                        return r"\right without \left"
+                index += 1
+            elif token in _GROUP_ARGS:
+                count, may_be_empty = _GROUP_ARGS[token]
+                position = index + 1
+                if token == r"\sqrt" and following == "[":
+                    while position < len(tokens) and tokens[position] != "]":
+                        position += 1
+                    position += 1
+                for _ in range(count):
+                    if position >= len(tokens) or tokens[position] != "{":
+                        return f"{token} needs {count} braced argument{'s' if count > 1 else ''}"
+                    end = _group_end(tokens, position)
+                    if end == -1:
+                        return "Unbalanced '{'"
+                    if end == position + 1 and not may_be_empty:
+                        return f"Empty argument of {token}"
+                    if token == r"\text":
+                        # Text is drawn verbatim; skip it
+                        index = end
+                    position = end + 1
+        index += 1
+    if depth > 0:
+        return "Unbalanced '{'"
+    if open_delimiters > 0:
+        return r"\left without \right"
+    return None
+
+
+@dataclass(frozen=True)
+class FormulaLocation:
+    """A formula and where it was found."""
+
+    path: Path
+    # JSON path (e.g. "activities[0].steps[2].content") or "line N"
+    where: str
+    latex: str
+
+
+def _json_strings(value: Any, where: str = "") -> Iterator[Tuple[str, str]]:
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from _json_strings(child, f"{where}.{key}" if where else str(key))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield from _json_strings(child, f"{where}[{index}]")
+    elif isinstance(value, str):
+        yield where, value
+
+
+def find_formulas(path: Path) -> Iterator[FormulaLocation]:
+    """Yield the formulas in a JSON config or Markdown file.
+
+    In JSON, ``latex`` fields are formulas and other strings are searched
+    for inline ``$...$``; in Markdown, only inline ``$...$`` counts.
+    """
+    text = path.read_text(encoding="utf-8", errors="replace")
+    if path.suffix == ".json":
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        for where, value in _json_strings(data):
+            if where.rsplit(".", 1)[-1] == "latex":
+                if value.strip():
+                    yield FormulaLocation(path, where, value.strip())
+                continue
+            for match in _INLINE.finditer(value):
+                if match.group(1).strip():
+                    yield FormulaLocation(path, where, match.group(1).strip())
+        return
+    for number, line in enumerate(text.splitlines(), start=1):
+        for match in _INLINE.finditer(line):
+            if match.group(1).strip():
+                yield FormulaLocation(path, f"line {number}", match.group(1).strip())
+
+
+def collect_formulas(paths: Iterable[Path]) -> List[FormulaLocation]:
+    """Formulas in all .json and .md files under ``paths``."""
+    found: List[FormulaLocation] = []
+    for path in paths:
+        files = [path] if path.is_file() else sorted(path.rglob("*"))
+        for file in files:
+            if file.suffix in (".json", ".md") and file.is_file():
+                found.extend(find_formulas(file))
+    return found
+
+
+@dataclass(frozen=True)
+class LintIssue:
+    """A formula that fails the syntax check or fails to render."""
+
+    location: FormulaLocation
+    message: str
+
+
+def lint(formulas: Iterable[FormulaLocation], renderer: Any = None) -> List[LintIssue]:
+    """Check formulas, rendering the ones that pass when a renderer is given.
+
+    Args:
+        formulas: Formulas to check
+        renderer: ``LatexRenderer`` to render formulas that pass the syntax
+            check (failures also go into its negative cache); None to only
+            run the syntax check
+
+    Returns:
+        One issue per failing occurrence, in input order
+    """
+    issues = []
+    for formula in formulas:
+        message = check_syntax(formula.latex)
+        if message is None and renderer is not None:
+            try:
+                renderer.render(formula.latex)
+            except ValueError as error:
+                message = str(error)
+        if message is not None:
+            issues.append(LintIssue(formula, message))
+    return issues
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="khtn lint-formulas",
+        description="Kiểm tra cú pháp công thức LaTeX trong cấu hình JSON và tệp Markdown.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help=f"Tệp hoặc thư mục cần kiểm tra (mặc định: {', '.join(DEFAULT_PATHS)})",
+    )
+    parser.add_argument(
+        "--render",
+        action="store_true",
+        help="Vẽ thử các công thức hợp lệ cú pháp để tìm lỗi còn lại (chậm hơn)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("outputs"),
+        help="Thư mục outputs dùng chung bộ nhớ đệm công thức lỗi (mặc định: outputs)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Report broken formulas; exit status 1 if any were found."""
+    args = parse_args(argv)
+    paths = args.paths or [Path(name) for name in DEFAULT_PATHS if Path(name).exists()]
+    formulas = collect_formulas(paths)
+    renderer = None
+    if args.render:
+        from app.latex_renderer import LatexRenderer
+
+        renderer = LatexRenderer(output_dir=args.output_dir / "formulas")
+    issues = lint(formulas, renderer)
+
+    for issue in issues:
+        location = issue.location
+        print(f"❌ {location.path} ({location.where}): ${location.latex}$")
+        print(f"   {issue.message}")
+    broken = len({issue.location.latex for issue in issues})
+    if issues:
+        print(f"\n⚠️  {len(issues)}/{len(formulas)} công thức lỗi ({broken} biểu thức khác nhau)")
+        return 1
+    print(f"✅ {len(formulas)} công thức hợp lệ")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
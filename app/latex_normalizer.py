@@ -0,0 +1,175 @@
+"""Canonical form of LaTeX formulas, used to key rendered images.
+
+``F=ma``, ``F = ma`` and ``F  =  m a`` are drawn identically, but keyed on
+the raw string they are rendered and stored three times. ``normalize``
+maps such spellings to one canonical string:
+
+- spaces are dropped, except inside ``\\text{...}``, directly after
+  ``^``/``_`` (Matplotlib's mathtext draws ``x^ 2`` differently from
+  ``x^2``) and where a control word must stay separated from a letter;
+  tabs and line breaks are kept, since mathtext draws them as glyphs
+- doubled braces are collapsed (``{{a}}`` -> ``{a}``), except on a group
+  that takes a script (``{{a}}^2`` is drawn differently from ``{a}^2``);
+  other braces are kept, since ``a{+}b`` is spaced differently from
+  ``a+b``, and so are unbraced scripts (``\\sum_{i=1}^n`` and
+  ``\\sum_{i=1}^{n}`` place the limits differently)
+- macros that LaTeX defines as aliases of one another, and that mathtext
+  draws identically, are replaced by one spelling (``\\rightarrow`` ->
+  ``\\to``). Look-alikes that render differently, such as ``\\frac`` and
+  ``\\dfrac`` or ``\\dots`` and ``\\ldots``, are left alone.
+
+The canonical string is only a key: the renderer still draws the
+expression as written, so a formula looks exactly as it would without
+normalization. Expressions with unbalanced braces are returned stripped
+but otherwise unchanged.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from typing import List, Union
+
+# Control words (\alpha), control symbols (\{, \,, "\ "), whitespace runs,
+# then any other single character
+_TOKEN = re.compile(r"\\[A-Za-z]+|\\.|\s+|.", re.DOTALL)
+_CONTROL_WORD = re.compile(r"\\[A-Za-z]+")
+
+# Alias -> canonical spelling; each pair renders to identical bytes
+SYNONYMS = {
+    r"\rightarrow": r"\to",
+    r"\neq": r"\ne",
+    r"\lbrace": r"\{",
+    r"\rbrace": r"\}",
+    r"\vert": "|",
+}
+
+# Commands whose braced argument is text, where spaces are drawn
+_VERBATIM = frozenset({r"\text"})
+_SCRIPTS = frozenset({"^", "_"})
+
+Node = Union[str, List["Node"]]
+
+
+def tokenize(latex_expr: str) -> List[str]:
+    """Split a LaTeX expression into tokens.
+
+    Every character belongs to exactly one token, so joining the tokens
+    gives back the expression.
+
+    Args:
+        latex_expr: LaTeX expression (without surrounding ``$``)
+
+    Returns:
+        Control words, control symbols, whitespace runs and single characters
+    """
+    return _TOKEN.findall(latex_expr)
+
+
+def _parse(tokens: List[str]) -> List[Node]:
+    """Nest tokens into brace groups.
+
+    Raises:
+        ValueError: If the braces are unbalanced
+    """
+    stack: List[List[Node]] = [[]]
+    for token in tokens:
+        if token == "{":
+            group: List[Node] = []
+            stack[-1].append(group)
+            stack.append(group)
+        elif token == "}":
+            if len(stack) == 1:
+                raise ValueError("Unbalanced '}'")
+            stack.pop()
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1:
+        raise ValueError("Unbalanced '{'")
+    return stack[0]
+
+
+def _source(nodes: List[Node]) -> str:
+    return "".join(node if isinstance(node, str) else "{" + _source(node) + "}" for node in nodes)
+
+
+def _is_space(node: Node) -> bool:
+    """Whether a node is a run of spaces, which mathtext ignores."""
+    return isinstance(node, str) and node != "" and node.strip(" ") == ""
+
+
+def _significant(nodes: List[Node]) -> List[Node]:
+    return [node for node in nodes if not _is_space(node)]
+
+
+def _script_follows(nodes: List[Node], index: int) -> bool:
+    """Whether the first non-space node from ``index`` on is ``^`` or ``_``."""
+    for node in nodes[index:]:
+        if isinstance(node, list):
+            return False
+        if not _is_space(node):
+            return node in _SCRIPTS
+    return False
+
+
+def _braced(group: List[Node], collapse: bool) -> str:
+    """Canonical group; nested single groups are merged only if ``collapse``."""
+    depth = 1
+    content = _significant(group)
+    while len(content) == 1 and isinstance(content[0], list):
+        group = content[0]
+        content = _significant(group)
+        if not collapse:
+            depth += 1
+    return "{" * depth + _canonical(group) + "}" * depth
+
+
+def _canonical(nodes: List[Node]) -> str:
+    out: List[str] = []
+    index = 0
+    while index < len(nodes):
+        node = nodes[index]
+        index += 1
+        if isinstance(node, list):
+            out.append(_braced(node, collapse=not _script_follows(nodes, index)))
+        elif _is_space(node):
+            if index >= 2 and isinstance(nodes[index - 2], str) and nodes[index - 2] in _SCRIPTS:
+                out.append(" ")
+        elif node in _VERBATIM:
+            out.append(node)
+            while index < len(nodes) and _is_space(nodes[index]):
+                index += 1
+            if index < len(nodes) and isinstance(nodes[index], list):
+                out.append("{" + _source(nodes[index]) + "}")
+                index += 1
+        else:
+            out.append(SYNONYMS.get(node, node))
+
+    joined: List[str] = []
+    for token in out:
+        if joined and _CONTROL_WORD.fullmatch(joined[-1]) and token[:1].isalpha():
+            joined.append(" ")
+        joined.append(token)
+    return "".join(joined)
+
+
+# Called on every cache lookup; the same formulas recur throughout a document
+@functools.lru_cache(maxsize=4096)
+def normalize(latex_expr: str) -> str:
+    """Return the canonical spelling of a LaTeX expression.
+
+    Two expressions with the same canonical spelling render to the same
+    image, so it can key caches and file names.
+
+    Args:
+        latex_expr: LaTeX expression (without surrounding ``$``)
+
+    Returns:
+        Canonical expression; the stripped input if its braces are unbalanced
+    """
+    latex_expr = latex_expr.strip()
+    try:
+        nodes = _parse(tokenize(latex_expr))
+    except ValueError:
+        return latex_expr
+    return _canonical(nodes)
@@ -2,193 +2,698 @@
 
 This module provides functions to render LaTeX mathematical expressions
 as images (PNG format) that can be embedded in PDF and Word documents.
+
+Matplotlib is imported on the first actual render, not when this module is
+imported, so code paths that never draw a formula (Markdown generation,
+cache hits on disk) do not pay its import cost.
+
+``LatexRenderer.render`` returns a ``RenderedFormula`` carrying the PNG bytes
+together with their pixel size, resolution and SHA-1, so documents can embed
+the image without decoding or hashing it again.
+
+By default formulas are drawn at 20 pt and 300 dpi and left to the document
+to scale. Passing a ``FormulaSize`` instead renders them at the size they
+will be displayed: the font size is chosen so that the image has the
+requested width or height (or font size relative to the body text) at the
+requested resolution, so no pixels are drawn only to be scaled away.
+
+Formulas can also be written as SVG or PDF (``image_format``). Matplotlib
+draws each glyph's outline once per file and reuses it, and one vector
+image serves every zoom level. EMF is not available: Matplotlib has no EMF
+backend. Every format has its own cache keys and file extension, so a PNG
+and an SVG of the same formula never collide.
+
+Cache keys and file names are computed on the canonical spelling of an
+expression (``app.latex_normalizer``), so ``F=ma`` and ``F = ma`` share one
+image. The image itself is drawn from the expression as first requested.
+
+Broken formulas fail fast: ``app.latex_lint.check_syntax`` rejects most of
+them before a figure is created, and expressions that Matplotlib failed to
+draw are remembered in a ``FailureCache`` (persisted as
+``output_dir/failures.json``), so they are not drawn again in this or any
+later run.
 """
 
 from __future__ import annotations
 
+import functools
 import hashlib
 import io
+import json
+import math
+import os
+import re
+import struct
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import IO, TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+
+from app.latex_lint import check_syntax
+from app.latex_normalizer import normalize
+from app.metrics import REGISTRY
+from app.tracing import span
+
+if TYPE_CHECKING:
+    from app.render_pool import RenderPool
+
+_RENDERS = REGISTRY.counter(
+    "khtn_latex_renders_total", "Formula render requests, by output and cache result"
+)
+_RENDER_SECONDS = REGISTRY.histogram(
+    "khtn_latex_render_seconds", "Time spent drawing formulas that missed the cache"
+)
+_CACHE_ENTRIES = REGISTRY.gauge(
+    "khtn_latex_bytes_cache_entries", "Formulas held in the in-memory bytes caches"
+)
+_CACHE_BYTES = REGISTRY.gauge(
+    "khtn_latex_bytes_cache_bytes", "PNG bytes held in the in-memory bytes caches"
+)
+_CACHE_EVICTIONS = REGISTRY.counter(
+    "khtn_latex_bytes_cache_evictions_total", "Formulas evicted from the bytes caches"
+)
+
+_pyplot: Any = None
+
+# Unsized renders: font size in points and padding around the formula
+_BASE_FONT_SIZE = 20
+_PAD_INCHES = 0.1
+# Body text size of exported documents, the unit of FormulaSize.em
+BODY_FONT_PT = 13
+# Resolution for images rendered at their display size (Office's "Print" setting)
+DISPLAY_DPI = 220
+
+# Formats LatexRenderer can write; vector images are sized in points
+VECTOR_FORMATS = ("svg", "pdf")
+IMAGE_FORMATS = ("png",) + VECTOR_FORMATS
+# Leave out creation dates and tool names so identical formulas give identical bytes
+_VECTOR_METADATA = {
+    "svg": {"Date": None, "Creator": None, "Format": None, "Type": None},
+    "pdf": {"CreationDate": None, "Creator": None, "Producer": None},
+}
+_VECTOR_SIZE = {
+    "svg": re.compile(rb'<svg[^>]*?\swidth="([\d.]+)pt"\s+height="([\d.]+)pt"'),
+    "pdf": re.compile(rb"/MediaBox \[\s*0 0 ([\d.]+) ([\d.]+)\s*\]"),
+}
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _png_info(data: bytes) -> Tuple[int, int, Optional[int]]:
+    """Read the pixel size and resolution from a PNG's header chunks.
+
+    Args:
+        data: PNG file contents
+
+    Returns:
+        (width, height, dpi); dpi is None when the file has no pHYs chunk
+
+    Raises:
+        ValueError: If ``data`` is not a PNG
+    """
+    if data[:8] != _PNG_SIGNATURE or data[12:16] != b"IHDR":
+        raise ValueError("Not a PNG image")
+    width, height = struct.unpack(">II", data[16:24])
+    dpi = None
+    pos = 8
+    while pos + 8 <= len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos : pos + 8])
+        if chunk_type == b"pHYs":
+            per_unit_x, _, unit = struct.unpack(">IIB", data[pos + 8 : pos + 17])
+            if unit == 1:  # pixels per metre
+                dpi = int(round(per_unit_x * 0.0254))
+        elif chunk_type == b"IDAT":
+            break
+        pos += length + 12
+    return width, height, dpi
+
+
+@dataclass(frozen=True)
+class RenderedFormula:
+    """A formula rendered to PNG, with what is needed to embed it."""
+
+    latex: str
+    data: bytes
+    width_px: int
+    height_px: int
+    dpi: int
+    # Hex SHA-1 of ``data``, the key python-docx uses to share image parts
+    sha1: str
+    filename: str
+    # "png", or a vector format whose size is in points (width_px at 72 dpi)
+    image_format: str = "png"
+
+    @classmethod
+    def from_png(cls, latex: str, data: bytes, filename: str) -> RenderedFormula:
+        """Describe existing PNG bytes (for example a file rendered earlier).
+
+        A PNG without a resolution counts as 72 dpi, as in python-docx.
+
+        Args:
+            latex: Formula the image shows
+            data: PNG file contents
+            filename: Name to record for the image
+
+        Raises:
+            ValueError: If ``data`` is not a PNG
+        """
+        width, height, png_dpi = _png_info(data)
+        return cls(
+            latex=latex,
+            data=data,
+            width_px=width,
+            height_px=height,
+            dpi=png_dpi or 72,
+            sha1=hashlib.sha1(data).hexdigest(),
+            filename=filename,
+        )
+
+    @classmethod
+    def from_vector(
+        cls, latex: str, data: bytes, filename: str, image_format: str
+    ) -> RenderedFormula:
+        """Describe an SVG or PDF written by Matplotlib.
+
+        Args:
+            latex: Formula the image shows
+            data: File contents
+            filename: Name to record for the image
+            image_format: "svg" or "pdf"
+
+        Raises:
+            ValueError: If the image size cannot be found in ``data``
+        """
+        match = _VECTOR_SIZE[image_format].search(data)
+        if match is None:
+            raise ValueError(f"Cannot read the size of the {image_format.upper()} image")
+        width, height = (float(value) for value in match.groups())
+        return cls(
+            latex=latex,
+            data=data,
+            width_px=math.ceil(width),
+            height_px=math.ceil(height),
+            dpi=72,
+            sha1=hashlib.sha1(data).hexdigest(),
+            filename=filename,
+            image_format=image_format,
+        )
+
+    @classmethod
+    def from_data(
+        cls, latex: str, data: bytes, filename: str, image_format: str = "png"
+    ) -> RenderedFormula:
+        """Describe image data of any format in ``IMAGE_FORMATS``."""
+        if image_format == "png":
+            return cls.from_png(latex, data, filename)
+        return cls.from_vector(latex, data, filename, image_format)
+
+
+@dataclass(frozen=True)
+class FormulaSize:
+    """Size a formula image will be displayed at.
+
+    Exactly one of ``width``, ``height`` (whole image, in inches) or ``em``
+    (font size as a multiple of the 13 pt body text) is given. The padding
+    around the formula scales with the font, so an image rendered for a
+    size looks like the default 20 pt render scaled to that size.
+    """
+
+    width: Optional[float] = None
+    height: Optional[float] = None
+    em: Optional[float] = None
+    dpi: int = DISPLAY_DPI
+
+    def __post_init__(self) -> None:
+        given = [value for value in (self.width, self.height, self.em) if value is not None]
+        if len(given) != 1:
+            raise ValueError("Exactly one of width, height or em must be given")
+        if given[0] <= 0 or self.dpi <= 0:
+            raise ValueError("Formula size and dpi must be positive")
+
+    @property
+    def key(self) -> str:
+        """Short text identifying the size, used in cache keys and file names."""
+        if self.width is not None:
+            return f"w{self.width:g}in@{self.dpi}"
+        if self.height is not None:
+            return f"h{self.height:g}in@{self.dpi}"
+        return f"{self.em:g}em@{self.dpi}"
+
+
+def _get_pyplot() -> Any:
+    """Import matplotlib with the non-interactive Agg backend on first use."""
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
 
-import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib import mathtext
-from PIL import Image
+        # Use Agg backend for non-interactive rendering
+        matplotlib.use("Agg")
+        import matplotlib.pyplot
+
+        _pyplot = matplotlib.pyplot
+    return _pyplot
+
+
+def _check_format(image_format: str) -> None:
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(
+            f"Unsupported image format {image_format!r}; expected one of {', '.join(IMAGE_FORMATS)}"
+        )
+
+
+class RenderFailure(ValueError):
+    """A render that did not finish: it timed out, ran out of memory or
+    crashed the worker process drawing it (see ``app.render_pool``).
+    """
+
+    KINDS = ("timeout", "memory", "crashed")
+
+    def __init__(self, latex: str, kind: str, detail: str, seconds: float):
+        """Initialize the failure.
+
+        Args:
+            latex: Expression that was being rendered
+            kind: One of ``KINDS``
+            detail: Human-readable description
+            seconds: Wall-clock time spent before giving up
+        """
+        super().__init__(f"{detail} ({kind})")
+        self.latex = latex
+        self.kind = kind
+        self.detail = detail
+        self.seconds = seconds
+
+
+def draw_formula(
+    latex_expr: str,
+    target: Union[Path, IO[bytes]],
+    size: Optional[FormulaSize],
+    image_format: str,
+    dpi: int,
+) -> None:
+    """Draw a cleaned expression as a transparent, tightly cropped image.
+
+    Args:
+        latex_expr: Expression without surrounding ``$``
+        target: File path or binary stream to write the image to
+        size: Display size to fit, or None for 20 pt
+        image_format: One of ``IMAGE_FORMATS``
+        dpi: Output resolution
+    """
+    plt = _get_pyplot()
+    # Create a figure with transparent background, laid out at the output
+    # resolution so that measuring the text sees the same glyph hinting
+    fig = plt.figure(figsize=(10, 2), dpi=dpi)
+    fig.patch.set_alpha(0.0)
+    try:
+        # Render the LaTeX expression
+        # Use displaystyle for better formatting of fractions, etc.
+        text = fig.text(
+            0.5,
+            0.5,
+            f"${latex_expr}$",
+            fontsize=_BASE_FONT_SIZE,
+            ha="center",
+            va="center",
+            usetex=False,  # Use matplotlib's built-in LaTeX parser
+        )
+        fontsize = _BASE_FONT_SIZE
+        if size is not None:
+            fontsize = _fit_font_size(fig, text, size)
+            text.set_fontsize(fontsize)
+
+        # Get the bounding box and save with tight layout
+        with plt.rc_context({"svg.hashsalt": "khtn"}):  # stable glyph ids
+            fig.savefig(
+                target,
+                dpi=dpi,
+                bbox_inches="tight",
+                pad_inches=_PAD_INCHES * fontsize / _BASE_FONT_SIZE,
+                transparent=True,
+                format=image_format,
+                metadata=_VECTOR_METADATA.get(image_format),
+            )
+    finally:
+        plt.close(fig)
+
+
+def _fit_font_size(fig: Any, text: Any, size: FormulaSize) -> float:
+    """Font size at which the cropped image has the requested size.
+
+    The text extent and the padding both scale linearly with the font
+    size, so one layout at the base size is enough to solve for it.
+    """
+    if size.em is not None:
+        return size.em * BODY_FONT_PT
+    extent = text.get_window_extent(renderer=fig.canvas.get_renderer())
+    if size.width is not None:
+        natural, wanted = extent.width / fig.dpi, size.width
+    else:
+        natural, wanted = extent.height / fig.dpi, size.height
+    return _BASE_FONT_SIZE * wanted / (natural + 2 * _PAD_INCHES)
 
-# Use Agg backend for non-interactive rendering
-matplotlib.use("Agg")
+
+@functools.lru_cache(maxsize=1)
+def _matplotlib_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("matplotlib")
+    except PackageNotFoundError:
+        return ""
+
+
+class FailureCache:
+    """Renders that failed, with their error messages (a negative cache).
+
+    With a path, the entries are kept in a JSON file shared by every
+    renderer using it, including those of other processes. The file records
+    the Matplotlib version and is ignored after an upgrade, since a newer
+    mathtext may draw what an older one rejected.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize the cache.
+
+        Args:
+            path: JSON file to load the entries from and save them to;
+                None keeps them in memory only
+        """
+        self.path = path
+        self._failures: Optional[Dict[str, str]] = None
+
+    def _read(self) -> Dict[str, str]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("matplotlib") != _matplotlib_version():
+            return {}
+        return dict(data.get("failures", {}))
+
+    @property
+    def failures(self) -> Dict[str, str]:
+        """Error message by render key, loaded from the file on first use."""
+        if self._failures is None:
+            self._failures = self._read()
+        return self._failures
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the error message recorded for ``key``, if any."""
+        return self.failures.get(key)
+
+    def add(self, key: str, message: str) -> None:
+        """Record a failed render and save the file.
+
+        Entries written by other processes since the file was loaded are
+        kept; the file is replaced atomically.
+        """
+        self.failures[key] = message
+        if self.path is None:
+            return
+        merged = {**self._read(), **self.failures}
+        payload = {"matplotlib": _matplotlib_version(), "failures": merged}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """Forget all entries and delete the file."""
+        self._failures = {}
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
 
 
 class LatexRenderer:
     """Renders LaTeX formulas to images using Matplotlib."""
 
-    def __init__(self, output_dir: Optional[Path] = None, dpi: int = 300, max_cache_size: int = 128):
+    def __init__(
+        self,
+        output_dir: Optional[Path] = None,
+        dpi: int = 300,
+        max_cache_size: int = 128,
+        persist_failures: bool = True,
+        pool: Optional[RenderPool] = None,
+    ):
         """Initialize the LaTeX renderer.
 
         Args:
             output_dir: Directory to save rendered images. If None, uses 'outputs/formulas'
             dpi: Resolution of the output images (default: 300 for high quality)
             max_cache_size: Maximum number of formulas to cache in memory (default: 128)
+            persist_failures: Keep formulas that failed to render in
+                ``output_dir/failures.json`` so later runs skip them too;
+                if False they are only remembered by this renderer
+            pool: Draw formulas in the pool's worker processes, with its
+                timeout and memory limit, instead of in this process
         """
         self.output_dir = output_dir or Path("outputs/formulas")
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.dpi = dpi
         self.max_cache_size = max_cache_size
-        # Cache for in-memory byte rendering to avoid re-rendering same formulas
+        # Cache for in-memory rendering to avoid re-rendering same formulas
         # Uses LRU eviction when cache exceeds max_cache_size
-        self._bytes_cache: Dict[str, bytes] = {}
+        self._bytes_cache: Dict[str, RenderedFormula] = {}
         self._cache_access_order: list = []  # Track access order for LRU eviction
-
-    def _generate_filename(self, latex_expr: str) -> str:
+        self.failures = FailureCache(self.output_dir / "failures.json" if persist_failures else None)
+        self.pool = pool
+        # Formulas that hit the pool's timeout or memory limit, by cache key;
+        # kept for this renderer only, since they depend on the limits
+        self.render_failures: Dict[str, RenderFailure] = {}
+
+    def _known_failure(self, latex_expr: str, key: str) -> Optional[str]:
+        """Why a render is bound to fail: a recorded failure or a syntax error."""
+        if key in self.render_failures:
+            return str(self.render_failures[key])
+        return self.failures.get(key) or check_syntax(latex_expr)
+
+    def _record_failure(self, key: str, error: Exception) -> None:
+        # mathtext reports bad input as ValueError; other errors (a full
+        # disk, a killed worker) say nothing about the expression
+        if isinstance(error, RenderFailure):
+            if error.kind != "crashed":
+                self.render_failures[key] = error
+        elif isinstance(error, ValueError):
+            self.failures.add(key, str(error).strip())
+
+    def _generate_filename(
+        self, latex_expr: str, size: Optional[FormulaSize] = None, image_format: str = "png"
+    ) -> str:
         """Generate a unique filename for a LaTeX expression.
 
+        Spellings with the same canonical form share the filename.
+
         Args:
             latex_expr: LaTeX expression string
+            size: Display size the image is rendered for, if any
+            image_format: Image format, used as the extension
 
         Returns:
-            Filename with .png extension
+            Filename with the format's extension
         """
         # Use hash to create unique but consistent filenames
-        hash_obj = hashlib.md5(latex_expr.encode("utf-8"))
-        return f"formula_{hash_obj.hexdigest()[:12]}.png"
+        latex_expr = normalize(latex_expr)
+        name = latex_expr if size is None else f"{latex_expr}@{size.key}"
+        hash_obj = hashlib.md5(name.encode("utf-8"))
+        return f"formula_{hash_obj.hexdigest()[:12]}.{image_format}"
+
+    def _cache_key(
+        self, latex_expr: str, size: Optional[FormulaSize], image_format: str
+    ) -> str:
+        """Key of a render in the bytes cache; PNG keys are "<expr>:<dpi or size>".
+
+        ``<expr>`` is the canonical spelling of the expression.
+        """
+        latex_expr = normalize(latex_expr)
+        if image_format == "png":
+            return f"{latex_expr}:{self.dpi if size is None else size.key}"
+        return f"{image_format}:{latex_expr}:{'' if size is None else size.key}"
+
+    def _draw(
+        self,
+        latex_expr: str,
+        target: Union[Path, IO[bytes]],
+        size: Optional[FormulaSize],
+        image_format: str = "png",
+    ) -> None:
+        """Draw a cleaned expression, in this process or in ``self.pool``."""
+        dpi = self.dpi if size is None else size.dpi
+        if self.pool is None:
+            draw_formula(latex_expr, target, size, image_format, dpi)
+            return
+        data = self.pool.render(latex_expr, size, image_format, dpi)
+        if isinstance(target, Path):
+            target.write_bytes(data)
+        else:
+            target.write(data)
 
     def render_to_file(
-        self, latex_expr: str, output_path: Optional[Path] = None
+        self,
+        latex_expr: str,
+        output_path: Optional[Path] = None,
+        size: Optional[FormulaSize] = None,
+        image_format: str = "png",
     ) -> Path:
-        """Render a LaTeX expression to a PNG file.
+        """Render a LaTeX expression to an image file.
 
         Args:
             latex_expr: LaTeX expression (e.g., "F = ma" or "\\frac{a}{b}")
             output_path: Path to save the image. If None, generates a unique filename.
+            size: Render for this display size instead of 20 pt at ``self.dpi``
+            image_format: One of ``IMAGE_FORMATS``
 
         Returns:
             Path to the saved image file
 
         Raises:
             ValueError: If LaTeX expression is invalid or cannot be rendered
+            RenderFailure: If a pool worker timed out, ran out of memory or
+                crashed while drawing it (a ValueError subclass)
         """
-        if not latex_expr or not latex_expr.strip():
-            raise ValueError("LaTeX expression cannot be empty")
-
-        # Clean the expression (remove surrounding $ if present)
-        latex_expr = latex_expr.strip()
-        if latex_expr.startswith("$") and latex_expr.endswith("$"):
-            latex_expr = latex_expr[1:-1].strip()
-
-        if output_path is None:
-            filename = self._generate_filename(latex_expr)
-            output_path = self.output_dir / filename
-
-        # Check if file already exists to avoid re-rendering
-        if output_path.exists():
-            return output_path
-
-        try:
-            # Create a figure with transparent background
-            fig = plt.figure(figsize=(10, 2))
-            fig.patch.set_alpha(0.0)
-
-            # Render the LaTeX expression
-            # Use displaystyle for better formatting of fractions, etc.
-            text = fig.text(
-                0.5,
-                0.5,
-                f"${latex_expr}$",
-                fontsize=20,
-                ha="center",
-                va="center",
-                usetex=False,  # Use matplotlib's built-in LaTeX parser
-            )
+        with span("latex.render_to_file") as trace:
+            if not latex_expr or not latex_expr.strip():
+                raise ValueError("LaTeX expression cannot be empty")
+
+            # Clean the expression (remove surrounding $ if present)
+            latex_expr = latex_expr.strip()
+            if latex_expr.startswith("$") and latex_expr.endswith("$"):
+                latex_expr = latex_expr[1:-1].strip()
+
+            _check_format(image_format)
+            if output_path is None:
+                filename = self._generate_filename(latex_expr, size, image_format)
+                output_path = self.output_dir / filename
+
+            # Check if file already exists to avoid re-rendering
+            if output_path.exists():
+                trace.set(cache="hit")
+                _RENDERS.inc(output="file", cache="hit")
+                return output_path
+            cache_key = self._cache_key(latex_expr, size, image_format)
+            error = self._known_failure(latex_expr, cache_key)
+            if error is not None:
+                trace.set(cache="rejected")
+                _RENDERS.inc(output="file", cache="rejected")
+                raise ValueError(f"Failed to render LaTeX expression: {error}")
+            trace.set(cache="miss")
+            _RENDERS.inc(output="file", cache="miss")
+            start = time.perf_counter()
+
+            try:
+                self._draw(latex_expr, output_path, size, image_format)
+                _RENDER_SECONDS.observe(time.perf_counter() - start, output="file")
+
+                return output_path
+
+            except RenderFailure as failure:
+                self._record_failure(cache_key, failure)
+                raise
+            except Exception as e:
+                self._record_failure(cache_key, e)
+                raise ValueError(f"Failed to render LaTeX expression: {e}") from e
+
+    def render_to_bytes(
+        self, latex_expr: str, size: Optional[FormulaSize] = None, image_format: str = "png"
+    ) -> bytes:
+        """Render a LaTeX expression to image bytes in memory.
 
-            # Get the bounding box and save with tight layout
-            fig.savefig(
-                output_path,
-                dpi=self.dpi,
-                bbox_inches="tight",
-                pad_inches=0.1,
-                transparent=True,
-                format="png",
-            )
-            plt.close(fig)
+        Args:
+            latex_expr: LaTeX expression
+            size: Render for this display size instead of 20 pt at ``self.dpi``
+            image_format: One of ``IMAGE_FORMATS``
 
-            return output_path
+        Returns:
+            Image data as bytes (PNG by default)
 
-        except Exception as e:
-            raise ValueError(f"Failed to render LaTeX expression: {e}") from e
+        Raises:
+            ValueError: If LaTeX expression is invalid or cannot be rendered
+        """
+        return self.render(latex_expr, size, image_format).data
 
-    def render_to_bytes(self, latex_expr: str) -> bytes:
-        """Render a LaTeX expression to PNG bytes in memory.
+    def render(
+        self, latex_expr: str, size: Optional[FormulaSize] = None, image_format: str = "png"
+    ) -> RenderedFormula:
+        """Render a LaTeX expression in memory, with the image's properties.
 
         Uses bounded LRU caching to avoid re-rendering the same formula multiple times,
         while preventing unbounded memory growth in long-running applications.
 
         Args:
             latex_expr: LaTeX expression
+            size: Render for this display size instead of 20 pt at ``self.dpi``
+            image_format: One of ``IMAGE_FORMATS``
 
         Returns:
-            PNG image data as bytes
+            RenderedFormula with the image bytes, size, dpi and SHA-1
 
         Raises:
             ValueError: If LaTeX expression is invalid or cannot be rendered
+            RenderFailure: If a pool worker timed out, ran out of memory or
+                crashed while drawing it (a ValueError subclass)
         """
-        if not latex_expr or not latex_expr.strip():
-            raise ValueError("LaTeX expression cannot be empty")
-
-        # Clean the expression
-        latex_expr = latex_expr.strip()
-        if latex_expr.startswith("$") and latex_expr.endswith("$"):
-            latex_expr = latex_expr[1:-1].strip()
-
-        # Check cache first
-        cache_key = f"{latex_expr}:{self.dpi}"
-        if cache_key in self._bytes_cache:
-            # Update LRU order: move to end (most recently used)
-            self._cache_access_order.remove(cache_key)
-            self._cache_access_order.append(cache_key)
-            return self._bytes_cache[cache_key]
-
-        try:
-            fig = plt.figure(figsize=(10, 2))
-            fig.patch.set_alpha(0.0)
-
-            text = fig.text(
-                0.5,
-                0.5,
-                f"${latex_expr}$",
-                fontsize=20,
-                ha="center",
-                va="center",
-                usetex=False,
-            )
-
-            # Save to bytes buffer
-            buf = io.BytesIO()
-            fig.savefig(
-                buf,
-                dpi=self.dpi,
-                bbox_inches="tight",
-                pad_inches=0.1,
-                transparent=True,
-                format="png",
-            )
-            plt.close(fig)
-
-            buf.seek(0)
-            result = buf.getvalue()
+        with span("latex.render_to_bytes") as trace:
+            if not latex_expr or not latex_expr.strip():
+                raise ValueError("LaTeX expression cannot be empty")
+
+            # Clean the expression
+            latex_expr = latex_expr.strip()
+            if latex_expr.startswith("$") and latex_expr.endswith("$"):
+                latex_expr = latex_expr[1:-1].strip()
+
+            _check_format(image_format)
+            # Check cache first
+            cache_key = self._cache_key(latex_expr, size, image_format)
+            if cache_key in self._bytes_cache:
+                # Update LRU order: move to end (most recently used)
+                self._cache_access_order.remove(cache_key)
+                self._cache_access_order.append(cache_key)
+                trace.set(cache="hit")
+                _RENDERS.inc(output="bytes", cache="hit")
+                return self._bytes_cache[cache_key]
+            error = self._known_failure(latex_expr, cache_key)
+            if error is not None:
+                trace.set(cache="rejected")
+                _RENDERS.inc(output="bytes", cache="rejected")
+                raise ValueError(f"Failed to render LaTeX expression: {error}")
+            trace.set(cache="miss")
+            _RENDERS.inc(output="bytes", cache="miss")
+            start = time.perf_counter()
+
+            try:
+                # Save to bytes buffer
+                buf = io.BytesIO()
+                self._draw(latex_expr, buf, size, image_format)
+                result = RenderedFormula.from_data(
+                    latex_expr,
+                    buf.getvalue(),
+                    self._generate_filename(latex_expr, size, image_format),
+                    image_format,
+                )
+                _RENDER_SECONDS.observe(time.perf_counter() - start, output="bytes")
             
-            # Evict least recently used item if cache is full
-            if len(self._bytes_cache) >= self.max_cache_size:
-                lru_key = self._cache_access_order.pop(0)
-                del self._bytes_cache[lru_key]
+                # Evict least recently used item if cache is full
+                if len(self._bytes_cache) >= self.max_cache_size:
+                    lru_key = self._cache_access_order.pop(0)
+                    _CACHE_BYTES.dec(len(self._bytes_cache.pop(lru_key).data))
+                    _CACHE_ENTRIES.dec()
+                    _CACHE_EVICTIONS.inc()
             
-            # Cache the result
-            self._bytes_cache[cache_key] = result
-            self._cache_access_order.append(cache_key)
-            return result
-
-        except Exception as e:
-            raise ValueError(f"Failed to render LaTeX expression: {e}") from e
+                # Cache the result
+                self._bytes_cache[cache_key] = result
+                self._cache_access_order.append(cache_key)
+                _CACHE_ENTRIES.inc()
+                _CACHE_BYTES.inc(len(result.data))
+                return result
+
+            except RenderFailure as failure:
+                self._record_failure(cache_key, failure)
+                raise
+            except Exception as e:
+                self._record_failure(cache_key, e)
+                raise ValueError(f"Failed to render LaTeX expression: {e}") from e
 
 
 def render_latex_to_file(
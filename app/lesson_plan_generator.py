@@ -21,6 +21,10 @@ _script_dir = Path(__file__).parent.parent
 if str(_script_dir) not in sys.path:
     sys.path.insert(0, str(_script_dir))
 
+from app.metrics import REGISTRY, add_metrics_arguments, metrics_path
+from app.profiling import add_profile_arguments, profile_options, run_profiled
+from app.tracing import add_trace_arguments, run_traced, span, trace_path
+
 
 @dataclass
 class Step:
@@ -61,7 +65,7 @@ class Activity:
 
 
 def _read_json(path: Path) -> Dict[str, Any]:
-    with path.open("r", encoding="utf-8") as stream:
+    with span("lesson_plan.read_json"), path.open("r", encoding="utf-8") as stream:
         return json.load(stream)
 
 
@@ -124,6 +128,11 @@ def _format_table_section(
 
 
 def build_markdown(config: Dict[str, Any]) -> str:
+    with span("lesson_plan.build_markdown"):
+        return _build_markdown(config)
+
+
+def _build_markdown(config: Dict[str, Any]) -> str:
     metadata = config.get("metadata", {})
     title = metadata.get("title") or "Kế hoạch bài dạy Khoa học Tự nhiên"
     lesson_date = metadata.get("date") or date.today().isoformat()
@@ -218,10 +227,11 @@ def build_markdown(config: Dict[str, Any]) -> str:
 def generate_markdown(config_path: Path, output_path: Path) -> None:
     config = _read_json(config_path)
     markdown = build_markdown(config)
-    output_path.write_text(markdown, encoding="utf-8")
+    with span("lesson_plan.write_markdown"):
+        output_path.write_text(markdown, encoding="utf-8")
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Tạo kế hoạch bài dạy/bài giảng điện tử môn Khoa học Tự nhiên ở định dạng Markdown hoặc Word."
     )
@@ -249,11 +259,65 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Render công thức LaTeX thành ảnh (cho PDF/Word).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--docx-compression",
+        choices=["none", "fast", "default", "small"],
+        default="default",
+        help="Mức nén tệp .docx: fast (ghi nhanh), small (tệp nhỏ nhất), none (không nén).",
+    )
+    parser.add_argument(
+        "--formula-format",
+        choices=["png", "svg"],
+        default="png",
+        help="Định dạng ảnh công thức trong tệp Word: png (mặc định) hoặc svg (kèm PNG dự phòng).",
+    )
+    parser.add_argument(
+        "--optimize-docx",
+        action="store_true",
+        help="Tối ưu tệp .docx sau khi xuất: thu nhỏ ảnh công thức, bỏ style không dùng.",
+    )
+    parser.add_argument(
+        "--isolated-render",
+        action="store_true",
+        help="Vẽ công thức trong tiến trình riêng: công thức treo hoặc tốn bộ nhớ được thay bằng chữ.",
+    )
+    parser.add_argument(
+        "--render-timeout",
+        type=float,
+        default=10.0,
+        help="Thời gian tối đa (giây) để vẽ một công thức khi dùng --isolated-render (mặc định: 10).",
+    )
+    parser.add_argument(
+        "--render-memory",
+        type=int,
+        default=1024,
+        help="Bộ nhớ tối đa (MB) một công thức được dùng khi dùng --isolated-render (mặc định: 1024).",
+    )
+    add_profile_arguments(parser)
+    add_trace_arguments(parser)
+    add_metrics_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    try:
+        run_profiled(
+            run_traced,
+            profile_options(args, "lesson_plan_generator"),
+            "lesson_plan_generator",
+            _run,
+            trace_path(args),
+            args.trace_format,
+            args,
+        )
+    finally:
+        metrics_file = metrics_path(args)
+        if metrics_file:
+            REGISTRY.write_textfile(metrics_file)
 
 
-def main() -> None:
-    args = parse_args()
+def _run(args: argparse.Namespace) -> None:
     config_path: Path = args.config
     output_format: str = args.format
 
@@ -296,12 +360,39 @@ def main() -> None:
     # Generate Word document
     if word_output:
         try:
-            from app.word_exporter import export_to_word
+            from app.word_exporter import COMPRESSION_LEVELS, export_to_word
 
             word_output.parent.mkdir(parents=True, exist_ok=True)
             config = _read_json(config_path)
-            export_to_word(config, word_output)
+            render_pool = None
+            if args.isolated_render:
+                from app.render_pool import RenderPool
+
+                render_pool = RenderPool(
+                    timeout=args.render_timeout, memory_limit=args.render_memory * 1024 * 1024
+                )
+            try:
+                with span("lesson_plan.export_word"):
+                    export_to_word(
+                        config,
+                        word_output,
+                        COMPRESSION_LEVELS[args.docx_compression],
+                        args.formula_format,
+                        render_pool,
+                    )
+            finally:
+                if render_pool is not None:
+                    render_pool.close()
             print(f"✅ Đã tạo kế hoạch bài dạy Word tại: {word_output}")
+            if args.optimize_docx:
+                from app.docx_optimizer import optimize_docx
+
+                with span("lesson_plan.optimize_docx"):
+                    report = optimize_docx(word_output, word_output)
+                print(
+                    f"🗜️  Đã tối ưu tệp Word: {report.original_bytes // 1024} KB → "
+                    f"{report.optimized_bytes // 1024} KB (giảm {report.saved_ratio:.0%})"
+                )
         except ImportError as e:
             print(f"⚠️  Không thể xuất Word: Thiếu thư viện python-docx. Chạy: pip install python-docx")
         except Exception as e:
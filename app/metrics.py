@@ -0,0 +1,406 @@
+"""Process-wide metrics for long-running generator processes.
+
+A small, dependency-free registry of counters, gauges and latency
+histograms in the spirit of the Prometheus client. ``LatexRenderer``,
+``WordExporter`` and the timeseries tools update the default registry;
+its contents can be written as a Prometheus text-format file (e.g. for the
+node_exporter textfile collector) or served from a local ``/metrics``
+endpoint with ``start_http_server``.
+
+Example::
+
+    from app.metrics import REGISTRY, start_http_server
+
+    server = start_http_server(9100)   # curl localhost:9100/metrics
+    ...
+    REGISTRY.write_textfile(Path("/var/lib/node_exporter/khtn.prom"))
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+ENV_VAR = "KHTN_METRICS_FILE"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# Metric name -> (kind, help, values by label key, histogram buckets or None)
+Snapshot = Dict[str, Tuple[str, str, Dict[LabelKey, Any], Optional[Tuple[float, ...]]]]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def _copy_values(self) -> Dict[LabelKey, Any]:
+        with self._lock:
+            return copy.deepcopy(self._values)  # type: ignore[attr-defined]
+
+    def render(self) -> str:
+        """Return the metric in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        """Increase the counter.
+
+        Raises:
+            ValueError: If ``amount`` is negative
+        """
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        """Current value for one label combination."""
+        return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (cache sizes, in-flight requests)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        """Set the gauge to ``value``."""
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        """Add ``amount`` (may be negative) to the gauge."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        """Subtract ``amount`` from the gauge."""
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: object) -> float:
+        """Current value for one label combination."""
+        return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        """Record one observation (e.g. a latency in seconds)."""
+        key = _label_key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the duration of a ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _add(self, key: LabelKey, counts: List[int], total: float, count: int) -> None:
+        with self._lock:
+            old_counts, old_total, old_count = self._values.get(key) or (
+                [0] * len(self.buckets), 0.0, 0
+            )
+            merged = [old + new for old, new in zip(old_counts, counts)]
+            self._values[key] = (merged, old_total + total, old_count + count)
+
+    def count(self, **labels: object) -> int:
+        """Number of observations for one label combination."""
+        entry = self._values.get(_label_key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics; ``counter``/``gauge``/``histogram`` get or create."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, help: str, **kwargs: object) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        """Return the counter ``name``, creating it if needed."""
+        return self._get_or_create(Counter, name, help)  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        """Return the gauge ``name``, creating it if needed."""
+        return self._get_or_create(Gauge, name, help)  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Return the histogram ``name``, creating it if needed."""
+        return self._get_or_create(Histogram, name, help, buckets=buckets)  # type: ignore[return-value]
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Return a registered metric or None."""
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Snapshot:
+        """Picklable copy of all metric values, e.g. to send to another process."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: (
+                metric.kind,
+                metric.help,
+                metric._copy_values(),
+                getattr(metric, "buckets", None),
+            )
+            for metric in metrics
+        }
+
+    def changes_since(self, previous: Snapshot) -> Snapshot:
+        """Counter and histogram increments since ``previous``, and current gauges.
+
+        Args:
+            previous: Earlier ``snapshot()`` of this registry
+
+        Returns:
+            Snapshot holding only what changed, for ``merge`` in another registry
+        """
+        changes: Snapshot = {}
+        for name, (kind, help, values, buckets) in self.snapshot().items():
+            before = previous[name][2] if name in previous else {}
+            changed: Dict[LabelKey, Any] = {}
+            for key, value in values.items():
+                old = before.get(key)
+                if kind == "counter":
+                    if value != (old or 0.0):
+                        changed[key] = value - (old or 0.0)
+                elif kind == "histogram":
+                    if old is None:
+                        changed[key] = value
+                    elif value[2] != old[2]:
+                        counts = [new - prior for new, prior in zip(value[0], old[0])]
+                        changed[key] = (counts, value[1] - old[1], value[2] - old[2])
+                else:
+                    changed[key] = value
+            if changed:
+                changes[name] = (kind, help, changed, buckets)
+        return changes
+
+    def merge(self, snapshot: Snapshot, **labels: object) -> None:
+        """Add another process's metrics (see ``changes_since``) to this registry.
+
+        Counter and histogram values are added. Gauges describe one process
+        (e.g. its cache size), so they are set with ``labels`` added to tell
+        the processes apart.
+
+        Args:
+            snapshot: Values to merge
+            **labels: Labels added to merged gauges, e.g. ``worker=pid``
+        """
+        for name, (kind, help, values, buckets) in snapshot.items():
+            if kind == "counter":
+                counter = self.counter(name, help)
+                for key, amount in values.items():
+                    counter.inc(amount, **dict(key))
+            elif kind == "histogram":
+                histogram = self.histogram(name, help, buckets or DEFAULT_BUCKETS)
+                for key, (counts, total, count) in values.items():
+                    histogram._add(key, counts, total, count)
+            elif kind == "gauge":
+                gauge = self.gauge(name, help)
+                for key, value in values.items():
+                    gauge.set(value, **{**dict(key), **labels})
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+    def write_textfile(self, path: Path) -> Path:
+        """Write the metrics to ``path`` atomically (write, then rename).
+
+        Args:
+            path: Output file, conventionally with a ``.prom`` suffix
+
+        Returns:
+            The output path
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _handler_for(registry: MetricsRegistry) -> type:
+    # Imported here: http.server pulls in the email/http.client stack, which
+    # every CLI would otherwise pay for at startup
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            return None
+
+    return MetricsHandler
+
+
+def start_http_server(
+    port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY
+) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread.
+
+    Args:
+        port: TCP port; 0 picks a free port (see ``server.server_address``)
+        host: Interface to bind, local only by default
+        registry: Registry to expose
+
+    Returns:
+        The running server; call ``shutdown()`` to stop it
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), _handler_for(registry))
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the ``--metrics-file`` option to a command line parser."""
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help=f"Ghi số liệu (định dạng Prometheus) vào FILE khi kết thúc "
+        f"(hoặc đặt biến môi trường {ENV_VAR})",
+    )
+
+
+def metrics_path(args: argparse.Namespace, environ: Optional[Dict[str, str]] = None) -> Optional[Path]:
+    """Return the metrics file from ``--metrics-file`` or ``KHTN_METRICS_FILE``."""
+    environ = os.environ if environ is None else environ
+    path = getattr(args, "metrics_file", None)
+    if path is None and environ.get(ENV_VAR):
+        path = Path(environ[ENV_VAR])
+    return path
@@ -0,0 +1,277 @@
+"""Opt-in profiling for the command line entry points.
+
+Profiling is enabled with the ``--profile`` flag of a CLI or with the
+``KHTN_PROFILE`` environment variable (``1`` for the default directory or
+a directory path). The command then runs under cProfile and writes, in the
+output directory:
+
+- ``<name>-<timestamp>.pstats``: raw cProfile statistics, readable with
+  ``python -m pstats`` or snakeviz
+- ``<name>-<timestamp>.collapsed``: one ``frame;frame;frame count`` line per
+  stack, the input format of flamegraph.pl and speedscope
+
+With ``--profile-sample MS`` (or ``KHTN_PROFILE_SAMPLE``) a timer-signal
+sampler records real call stacks every MS milliseconds of CPU time. Without
+it, the collapsed stacks are approximated from the cProfile call graph by
+following the heaviest caller of each function. The top functions by
+cumulative time are printed to stderr when the command finishes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from types import FrameType
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import cProfile
+    import pstats
+
+ENV_VAR = "KHTN_PROFILE"
+SAMPLE_ENV_VAR = "KHTN_PROFILE_SAMPLE"
+DEFAULT_OUTPUT_DIR = Path("profiles")
+
+# pstats function key: (filename, line number, function name)
+FunctionKey = Tuple[str, int, str]
+
+
+@dataclass
+class ProfileOptions:
+    """Where and how to profile one command."""
+
+    name: str
+    output_dir: Path = DEFAULT_OUTPUT_DIR
+    # Sampling interval in milliseconds, or None to derive stacks from pstats
+    sample_interval_ms: Optional[float] = None
+    top: int = 20
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the ``--profile`` options to a command line parser."""
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_OUTPUT_DIR,
+        default=None,
+        type=Path,
+        metavar="DIR",
+        help=f"Đo hiệu năng bằng cProfile, ghi .pstats và .collapsed vào DIR "
+        f"(mặc định: {DEFAULT_OUTPUT_DIR}/; hoặc đặt biến môi trường {ENV_VAR})",
+    )
+    parser.add_argument(
+        "--profile-sample",
+        type=float,
+        default=None,
+        metavar="MS",
+        help="Lấy mẫu ngăn xếp mỗi MS mili giây thời gian CPU (cho flamegraph)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Số hàm tốn thời gian nhất được in ra (mặc định: 20)",
+    )
+
+
+def profile_options(
+    args: argparse.Namespace, name: str, environ: Optional[Dict[str, str]] = None
+) -> Optional[ProfileOptions]:
+    """Build profiling options from parsed arguments and the environment.
+
+    Args:
+        args: Namespace from a parser set up with ``add_profile_arguments``
+        name: Prefix of the output files (usually the command name)
+        environ: Environment to read (defaults to ``os.environ``)
+
+    Returns:
+        ProfileOptions, or None when profiling is not requested
+    """
+    environ = os.environ if environ is None else environ
+    output_dir = getattr(args, "profile", None)
+    env_value = environ.get(ENV_VAR, "").strip()
+    if output_dir is None and env_value and env_value.lower() not in ("0", "false", "no"):
+        output_dir = (
+            DEFAULT_OUTPUT_DIR if env_value.lower() in ("1", "true", "yes") else Path(env_value)
+        )
+    if output_dir is None:
+        return None
+
+    interval = getattr(args, "profile_sample", None)
+    if interval is None and environ.get(SAMPLE_ENV_VAR):
+        interval = float(environ[SAMPLE_ENV_VAR])
+    return ProfileOptions(
+        name=name,
+        output_dir=Path(output_dir),
+        sample_interval_ms=interval,
+        top=getattr(args, "profile_top", 20),
+    )
+
+
+def _frame_label(filename: str, function: str) -> str:
+    # ";" separates frames in the collapsed format, so it must not appear
+    return f"{Path(filename).name}:{function}".replace(";", ":")
+
+
+class StackSampler:
+    """Sample the main thread's call stack on a CPU-time timer signal.
+
+    Uses ``ITIMER_PROF``, so only time spent running (not sleeping or
+    waiting for I/O) is sampled. Only available on POSIX systems and only
+    from the main thread.
+    """
+
+    def __init__(self, interval_ms: float = 1.0):
+        """Initialize the sampler.
+
+        Args:
+            interval_ms: CPU time between samples in milliseconds
+        """
+        self.interval = interval_ms / 1000.0
+        self.stacks: Counter = Counter()
+        self._previous_handler: Any = None
+
+    @staticmethod
+    def available() -> bool:
+        """Whether timer-signal sampling is supported on this platform."""
+        return hasattr(signal, "setitimer") and hasattr(signal, "SIGPROF")
+
+    def _handle(self, signum: int, frame: Optional[FrameType]) -> None:
+        labels: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            labels.append(_frame_label(code.co_filename, code.co_name))
+            frame = frame.f_back
+        if labels:
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def start(self) -> None:
+        """Install the signal handler and start the timer."""
+        self._previous_handler = signal.signal(signal.SIGPROF, self._handle)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        """Stop the timer and restore the previous signal handler."""
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+
+def collapsed_from_stats(stats: pstats.Stats) -> Dict[str, int]:
+    """Approximate collapsed stacks from a cProfile call graph.
+
+    cProfile only records caller/callee pairs, not full stacks. Each
+    function's own time is attributed to the stack obtained by repeatedly
+    following its most expensive caller up to a root.
+
+    Args:
+        stats: Loaded profile statistics
+
+    Returns:
+        Mapping of ``frame;frame;frame`` to own time in microseconds
+    """
+    raw: Dict[FunctionKey, Any] = stats.stats  # type: ignore[attr-defined]
+    stacks: Counter = Counter()
+    for func, (_, _, tottime, _, callers) in raw.items():
+        weight = int(tottime * 1_000_000)
+        if weight <= 0:
+            continue
+        chain = [func]
+        seen = {func}
+        current_callers = callers
+        while current_callers:
+            # callers maps caller -> (cc, nc, tottime, cumtime)
+            parent = max(current_callers, key=lambda c: current_callers[c][3])
+            if parent in seen:
+                break
+            chain.append(parent)
+            seen.add(parent)
+            current_callers = raw.get(parent, (0, 0, 0, 0, {}))[4]
+        labels = [_frame_label(filename, name) for filename, _, name in reversed(chain)]
+        stacks[";".join(labels)] += weight
+    return dict(stacks)
+
+
+def write_collapsed(stacks: Dict[str, int], path: Path) -> Path:
+    """Write collapsed stacks, heaviest first."""
+    lines = [
+        f"{stack} {count}"
+        for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+    ]
+    path.write_text("\n".join(lines) + "\n" if lines else "", encoding="utf-8")
+    return path
+
+
+def run_profiled(
+    func: Callable[..., Any],
+    options: Optional[ProfileOptions],
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    """Call ``func``, profiling it when ``options`` is given.
+
+    The profile files are written and the summary printed even if the
+    command raises (including ``SystemExit``).
+
+    Args:
+        func: Command to run
+        options: Profiling options, or None to call ``func`` directly
+        *args: Positional arguments for ``func``
+        **kwargs: Keyword arguments for ``func``
+
+    Returns:
+        Whatever ``func`` returns
+    """
+    if options is None:
+        return func(*args, **kwargs)
+
+    sampler: Optional[StackSampler] = None
+    if options.sample_interval_ms:
+        if StackSampler.available():
+            sampler = StackSampler(options.sample_interval_ms)
+        else:
+            print(
+                "⚠️  Lấy mẫu ngăn xếp không được hỗ trợ trên hệ điều hành này, "
+                "dùng ngăn xếp suy ra từ cProfile.",
+                file=sys.stderr,
+            )
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    if sampler:
+        sampler.start()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        if sampler:
+            sampler.stop()
+        _write_profile(profiler, sampler, options)
+
+
+def _write_profile(
+    profiler: cProfile.Profile, sampler: Optional[StackSampler], options: ProfileOptions
+) -> None:
+    import pstats
+
+    options.output_dir.mkdir(parents=True, exist_ok=True)
+    base = options.output_dir / f"{options.name}-{time.strftime('%Y%m%d-%H%M%S')}"
+    stats_path = base.with_suffix(".pstats")
+    profiler.dump_stats(str(stats_path))
+
+    stats = pstats.Stats(profiler, stream=sys.stderr)
+    stacks = sampler.stacks if sampler and sampler.stacks else collapsed_from_stats(stats)
+    collapsed_path = write_collapsed(stacks, base.with_suffix(".collapsed"))
+
+    print(f"\n📊 Top {options.top} hàm theo thời gian tích lũy:", file=sys.stderr)
+    stats.sort_stats("cumulative").print_stats(options.top)
+    print(f"📁 Hồ sơ hiệu năng: {stats_path}", file=sys.stderr)
+    print(f"🔥 Ngăn xếp cho flamegraph: {collapsed_path}", file=sys.stderr)
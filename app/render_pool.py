@@ -0,0 +1,272 @@
+"""Formula rendering in supervised worker processes.
+
+Matplotlib's mathtext runs in the calling process, so one pathological
+expression (deeply nested fractions, a formula pasted a thousand times)
+can spin for seconds or exhaust memory inside ``LatexRenderer`` and stall
+or kill the whole export. ``RenderPool`` draws formulas in worker processes
+instead and supervises them:
+
+- every render has a wall-clock timeout; a worker that exceeds it is
+  killed and replaced, and the caller gets a ``RenderFailure`` of kind
+  "timeout" instead of a hang
+- each worker's address space is capped with ``RLIMIT_AS`` (where the
+  platform has it) at its size after start-up plus ``memory_limit``, so a
+  runaway render fails with kind "memory" instead of swapping the machine
+- a worker that dies (a segfault, the OOM killer) is replaced and the
+  render fails with kind "crashed"
+- workers are replaced after ``max_renders`` renders, which bounds what
+  pyplot and the font caches leak over a long run
+
+Workers are started on first use. Like the generator service, the pool
+imports pyplot in the parent before starting them, so forked workers
+inherit it instead of importing it again.
+
+Use it through ``LatexRenderer(pool=...)``, ``WordExporter(render_pool=...)``
+or ``lesson-plan --isolated-render``.
+"""
+
+from __future__ import annotations
+
+import io
+import queue
+import time
+from typing import Any, Optional
+
+from app.latex_renderer import FormulaSize, RenderFailure, _get_pyplot, draw_formula
+from app.metrics import REGISTRY
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024
+DEFAULT_MAX_RENDERS = 200
+# Time a new worker may take to import and warm Matplotlib
+_STARTUP_TIMEOUT = 60.0
+
+_FAILURES = REGISTRY.counter(
+    "khtn_latex_render_failures_total", "Isolated renders that did not finish, by kind"
+)
+_WORKERS_STARTED = REGISTRY.counter(
+    "khtn_latex_render_workers_started_total", "Render worker processes started, by reason"
+)
+
+
+def _address_space() -> Optional[int]:
+    """Current virtual memory size of this process in bytes, if known."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    import resource
+
+    return pages * resource.getpagesize()
+
+
+def _limit_memory(memory_limit: int) -> None:
+    """Cap this process's address space at its current size plus ``memory_limit``."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    current = _address_space() or 0
+    limit = current + memory_limit
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _serve(conn: Any, memory_limit: Optional[int]) -> None:
+    """Worker loop: draw requested formulas until the pipe closes."""
+    _get_pyplot()
+    if memory_limit:
+        _limit_memory(memory_limit)
+    conn.send(("ready", None))
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        latex_expr, size, image_format, dpi = request
+        buffer = io.BytesIO()
+        try:
+            draw_formula(latex_expr, buffer, size, image_format, dpi)
+        except MemoryError:
+            del buffer
+            conn.send(("memory", None))
+        except Exception as error:
+            conn.send(("error", f"{error}"))
+        else:
+            conn.send(("ok", buffer.getvalue()))
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context: Any, memory_limit: Optional[int]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_serve, args=(child_conn, memory_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.renders = 0
+
+    def wait_ready(self) -> bool:
+        """Wait for the worker to finish starting; False if it did not."""
+        if not self.ready:
+            try:
+                self.ready = self.conn.poll(_STARTUP_TIMEOUT) and self.conn.recv()[0] == "ready"
+            except (EOFError, OSError):
+                self.ready = False
+        return self.ready
+
+    def stop(self) -> None:
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1.0)
+        self.kill()
+
+    def kill(self) -> Optional[int]:
+        """Kill the worker (if still running) and return its exit code."""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+        return self.process.exitcode
+
+
+class RenderPool:
+    """Worker processes that draw formulas under a timeout and memory limit.
+
+    ``render`` is thread-safe: with several workers, that many threads can
+    render at once and the rest wait for a free worker.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        timeout: float = DEFAULT_TIMEOUT,
+        memory_limit: Optional[int] = DEFAULT_MEMORY_LIMIT,
+        max_renders: int = DEFAULT_MAX_RENDERS,
+    ):
+        """Initialize the pool; workers are started on first use.
+
+        Args:
+            workers: Number of worker processes
+            timeout: Seconds a single render may take
+            memory_limit: Bytes a worker's address space may grow by after
+                start-up; None for no limit
+            max_renders: Renders after which a worker is replaced
+        """
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_renders = max(1, max_renders)
+        self._context: Any = None
+        # Free slots; None stands for a worker not started yet
+        self._idle: queue.Queue[Optional[_Worker]] = queue.Queue()
+        for _ in range(self.workers):
+            self._idle.put(None)
+
+    def _start_worker(self, reason: str) -> _Worker:
+        if self._context is None:
+            import multiprocessing
+
+            # Forked workers inherit the parent's pyplot instead of importing it
+            _get_pyplot()
+            self._context = multiprocessing.get_context()
+        _WORKERS_STARTED.inc(reason=reason)
+        return _Worker(self._context, self.memory_limit)
+
+    def render(
+        self, latex_expr: str, size: Optional[FormulaSize], image_format: str, dpi: int
+    ) -> bytes:
+        """Draw a formula in a worker process.
+
+        Args:
+            latex_expr: Expression without surrounding ``$``
+            size: Display size to fit, or None for 20 pt
+            image_format: One of ``IMAGE_FORMATS``
+            dpi: Output resolution
+
+        Returns:
+            Image bytes
+
+        Raises:
+            ValueError: If Matplotlib cannot draw the expression
+            RenderFailure: If the render timed out, ran out of memory or
+                the worker died
+        """
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = self._start_worker("new" if worker is None else "died")
+            if not worker.wait_ready():
+                exitcode = worker.kill()
+                worker = None
+                _FAILURES.inc(kind="crashed")
+                raise RenderFailure(
+                    latex_expr, "crashed", f"Render worker failed to start (exit code {exitcode})", 0.0
+                )
+
+            start = time.perf_counter()
+            try:
+                worker.conn.send((latex_expr, size, image_format, dpi))
+                finished = worker.conn.poll(self.timeout)
+            except (BrokenPipeError, OSError):
+                finished = True
+            seconds = time.perf_counter() - start
+            if not finished:
+                worker.kill()
+                worker = None
+                _FAILURES.inc(kind="timeout")
+                raise RenderFailure(
+                    latex_expr, "timeout", f"Rendering took longer than {self.timeout:g} s", seconds
+                )
+            try:
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                exitcode = worker.kill()
+                worker = None
+                _FAILURES.inc(kind="crashed")
+                raise RenderFailure(
+                    latex_expr, "crashed", f"Render worker exited with code {exitcode}", seconds
+                ) from None
+
+            worker.renders += 1
+            if status == "memory" or worker.renders >= self.max_renders:
+                # A worker that hit its memory limit may be in a bad state
+                worker.stop()
+                worker = None
+            if status == "memory":
+                _FAILURES.inc(kind="memory")
+                limit_mb = (self.memory_limit or 0) // (1024 * 1024)
+                raise RenderFailure(
+                    latex_expr, "memory", f"Rendering exceeded the {limit_mb} MB memory limit", seconds
+                )
+            if status == "error":
+                raise ValueError(payload)
+            return payload
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        """Stop all started workers; the pool starts new ones if used again."""
+        for _ in range(self.workers):
+            worker = self._idle.get()
+            if worker is not None:
+                worker.stop()
+        for _ in range(self.workers):
+            self._idle.put(None)
+
+    def __enter__(self) -> RenderPool:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,409 @@
+"""Outlier and sensor-fault detection for timeseries measurements.
+
+Digital thermometers such as the DS18B20 emit well-known fault readings:
+85 °C when a conversion is read before it completes after power-on, and
+-127 °C when the probe is disconnected. This module flags those sentinels
+and readings outside the sensor's valid range, for series recorded with a
+known sensor (see ``profile_for``), as well as physically impossible jumps
+(rate-of-change limit) and isolated spikes (Hampel filter over a rolling
+median/MAD window) in any series.
+
+The batch functions work on the cached columns of ``TimeseriesData`` and
+return boolean masks, so the measurement points themselves are never
+copied. ``StreamingFaultDetector`` applies the same checks one sample at a
+time for data arriving from a live sensor.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.timeseries_data import TimeseriesData
+
+# Scale factor turning the median absolute deviation into a standard
+# deviation estimate for normally distributed noise
+_MAD_SCALE = 1.4826
+
+
+@dataclass(frozen=True)
+class SensorProfile:
+    """Known fault signatures of a sensor model."""
+
+    name: str
+    # Readings that are always faults
+    sentinels: Tuple[float, ...] = ()
+    # Readings that are faults unless the neighbouring samples agree with them
+    contextual_sentinels: Tuple[float, ...] = ()
+    valid_range: Optional[Tuple[float, float]] = None
+    # Tolerance used for the contextual check, in the measured unit
+    context_tolerance: float = 2.0
+
+
+DS18B20 = SensorProfile(
+    name="DS18B20",
+    sentinels=(-127.0,),
+    contextual_sentinels=(85.0,),
+    valid_range=(-55.0, 125.0),
+)
+
+# Known sensors by upper-case name
+PROFILES: Dict[str, SensorProfile] = {DS18B20.name: DS18B20}
+
+
+def profile_for(device: str) -> Optional[SensorProfile]:
+    """Return the profile of the sensor a device description names, if any.
+
+    Args:
+        device: ``metadata.device`` of a series, e.g. "Nhiệt kế điện tử DS18B20"
+
+    Returns:
+        The matching profile, or None if no known sensor is named
+    """
+    words = device.upper().replace("-", "").split()
+    return next((PROFILES[word] for word in words if word in PROFILES), None)
+
+
+def sentinel_mask(values: Sequence[float], profile: SensorProfile = DS18B20) -> List[bool]:
+    """Flag the sensor's sentinel readings.
+
+    A contextual sentinel (e.g. 85 °C) is only flagged when it does not lie
+    between its neighbouring samples (widened by the profile's tolerance),
+    so real water temperatures passing through 85 °C are kept.
+
+    Args:
+        values: Measured values
+        profile: Sensor fault signatures
+
+    Returns:
+        List of booleans, True where the reading is a fault
+    """
+    sentinels = set(profile.sentinels)
+    contextual = set(profile.contextual_sentinels)
+    tol = profile.context_tolerance
+    n = len(values)
+    mask = [False] * n
+    for i, value in enumerate(values):
+        if value in sentinels:
+            mask[i] = True
+        elif value in contextual:
+            neighbours = [values[j] for j in (i - 1, i + 1) if 0 <= j < n]
+            mask[i] = not neighbours or not (
+                min(neighbours) - tol <= value <= max(neighbours) + tol
+            )
+    return mask
+
+
+def range_mask(values: Sequence[float], profile: SensorProfile = DS18B20) -> List[bool]:
+    """Flag readings outside the sensor's valid range.
+
+    Sentinels inside the range (85 °C) are left to ``sentinel_mask``;
+    out-of-range sentinels (-127 °C) are flagged by both.
+
+    Args:
+        values: Measured values
+        profile: Sensor fault signatures
+
+    Returns:
+        List of booleans, True where the reading cannot come from the sensor
+    """
+    if profile.valid_range is None:
+        return [False] * len(values)
+    low, high = profile.valid_range
+    return [not low <= value <= high for value in values]
+
+
+def rate_of_change_mask(
+    times: Sequence[float],
+    values: Sequence[float],
+    max_rate: float,
+    skip: Optional[Sequence[bool]] = None,
+    reanchor_after: int = 3,
+) -> List[bool]:
+    """Flag samples that change faster than ``max_rate`` units per second.
+
+    Each sample is compared with the last sample that was not flagged, so
+    the reading that follows a spike is not flagged as well. After
+    ``reanchor_after`` consecutive rejections the current sample becomes the
+    new reference, so a genuine step change is not rejected forever.
+
+    Args:
+        times: Time column in seconds
+        values: Value column
+        max_rate: Largest plausible absolute rate of change
+        skip: Mask of samples already known to be faulty (e.g. sentinels);
+            they are never used as the reference
+        reanchor_after: Consecutive rejections before re-anchoring
+
+    Returns:
+        List of booleans, True where the change is implausible
+    """
+    mask = [False] * len(values)
+    last_t: Optional[float] = None
+    last_v = 0.0
+    rejected_run = 0
+    for i, (t, v) in enumerate(zip(times, values)):
+        if skip is not None and skip[i]:
+            continue
+        if last_t is not None:
+            dt = t - last_t
+            if dt <= 0 or abs(v - last_v) > max_rate * dt:
+                rejected_run += 1
+                if rejected_run < reanchor_after:
+                    mask[i] = True
+                    continue
+        rejected_run = 0
+        last_t, last_v = t, v
+    return mask
+
+
+def hampel_mask(
+    values: Sequence[float],
+    half_window: int = 3,
+    n_sigmas: float = 3.0,
+    min_deviation: float = 0.5,
+) -> List[bool]:
+    """Flag isolated spikes with a Hampel filter (rolling median and MAD).
+
+    The window is kept as a sorted list that is updated incrementally as it
+    slides, so each step costs O(window) instead of a full sort.
+
+    Args:
+        values: Value column
+        half_window: Number of neighbours on each side of the sample
+        n_sigmas: Threshold in robust standard deviations
+        min_deviation: Lower bound on the threshold, so flat signals with a
+            zero MAD do not flag every small quantisation step
+
+    Returns:
+        List of booleans, True where the sample is an outlier
+    """
+    n = len(values)
+    mask = [False] * n
+    if n == 0:
+        return mask
+
+    window = sorted(values[: min(n, half_window + 1)])
+    lo, hi = 0, len(window)  # values[lo:hi] is the current window
+    for i in range(n):
+        start = max(0, i - half_window)
+        end = min(n, i + half_window + 1)
+        while hi < end:
+            insort(window, values[hi])
+            hi += 1
+        while lo < start:
+            del window[bisect_left(window, values[lo])]
+            lo += 1
+
+        median = _sorted_median(window)
+        mad = _sorted_median(sorted(abs(v - median) for v in window))
+        threshold = max(n_sigmas * _MAD_SCALE * mad, min_deviation)
+        mask[i] = abs(values[i] - median) > threshold
+    return mask
+
+
+def _sorted_median(sorted_values: Sequence[float]) -> float:
+    mid = len(sorted_values) // 2
+    if len(sorted_values) % 2:
+        return sorted_values[mid]
+    return (sorted_values[mid - 1] + sorted_values[mid]) / 2.0
+
+
+@dataclass
+class FaultReport:
+    """Masks produced by fault detection over one column."""
+
+    masks: Dict[str, List[bool]] = field(default_factory=dict)
+
+    @property
+    def combined(self) -> List[bool]:
+        """Mask that is True where any detector flagged the sample."""
+        return [any(flags) for flags in zip(*self.masks.values())]
+
+    @property
+    def indices(self) -> List[int]:
+        """Positions of flagged samples."""
+        return [i for i, flagged in enumerate(self.combined) if flagged]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of samples flagged by each detector."""
+        return {name: sum(mask) for name, mask in self.masks.items()}
+
+
+def detect_faults(
+    data: TimeseriesData,
+    profile: Optional[SensorProfile] = None,
+    max_rate: Optional[float] = 5.0,
+    half_window: int = 3,
+    n_sigmas: float = 3.0,
+) -> FaultReport:
+    """Run the fault detectors over the temperature column.
+
+    Args:
+        data: Timeseries data to check
+        profile: Sensor fault signatures (e.g. ``profile_for(data.metadata.device)``),
+            or None to skip the sentinel and range checks
+        max_rate: Maximum plausible change in °C per second, or None to skip
+        half_window: Hampel half-window; 0 disables the Hampel filter
+        n_sigmas: Hampel threshold in robust standard deviations
+
+    Returns:
+        FaultReport with one mask per enabled detector
+    """
+    times = data.column("time_s")
+    temps = data.column("temp_C")
+    report = FaultReport()
+    if profile is not None:
+        report.masks["sentinel"] = sentinel_mask(temps, profile)
+        report.masks["range"] = range_mask(temps, profile)
+    if max_rate is not None:
+        report.masks["rate"] = rate_of_change_mask(
+            times, temps, max_rate, skip=report.combined if report.masks else None
+        )
+    if half_window > 0:
+        report.masks["hampel"] = hampel_mask(temps, half_window, n_sigmas)
+    return report
+
+
+def cleaned_column(values: Sequence[float], mask: Sequence[bool]) -> List[float]:
+    """Return a copy of one column with flagged samples linearly interpolated.
+
+    Flagged samples at either end take the nearest good value. If every
+    sample is flagged the values are returned unchanged.
+
+    Args:
+        values: Value column
+        mask: Fault mask from one of the detectors
+
+    Returns:
+        Cleaned values (same length as ``values``)
+    """
+    good = [i for i, flagged in enumerate(mask) if not flagged]
+    result = list(values)
+    if not good or len(good) == len(result):
+        return result
+
+    g = 0
+    for i, flagged in enumerate(mask):
+        if not flagged:
+            continue
+        while g + 1 < len(good) and good[g + 1] < i:
+            g += 1
+        left = good[g] if good[g] < i else None
+        right = next((j for j in good[g:] if j > i), None)
+        if left is None:
+            result[i] = values[right]
+        elif right is None:
+            result[i] = values[left]
+        else:
+            weight = (i - left) / (right - left)
+            result[i] = values[left] + (values[right] - values[left]) * weight
+    return result
+
+
+class StreamingFaultDetector:
+    """Incremental fault detection for samples arriving one at a time.
+
+    Uses the sentinel, range and rate-of-change checks unchanged and a causal
+    Hampel filter: each sample is compared with the median/MAD of the
+    previous accepted samples, since future samples are not yet known.
+    A contextual sentinel arriving first (the DS18B20 power-on reading) is
+    flagged because there is no earlier sample to confirm it. After several
+    consecutive rejections the detector re-anchors on the new level, so a
+    genuine step change is not rejected forever.
+    """
+
+    def __init__(
+        self,
+        profile: Optional[SensorProfile] = None,
+        max_rate: Optional[float] = 5.0,
+        window: int = 7,
+        n_sigmas: float = 3.0,
+        min_deviation: float = 0.5,
+        reanchor_after: int = 3,
+    ):
+        """Initialize the detector.
+
+        Args:
+            profile: Sensor fault signatures, or None to skip the sentinel
+                and range checks
+            max_rate: Maximum plausible change per second, or None to skip
+            window: Number of previous accepted samples in the Hampel window
+            n_sigmas: Hampel threshold in robust standard deviations
+            min_deviation: Lower bound on the Hampel threshold
+            reanchor_after: Consecutive rate/Hampel rejections after which
+                the current sample is accepted as the new reference
+
+        Raises:
+            ValueError: If ``window`` is less than 1
+        """
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+        self.profile = profile
+        self.max_rate = max_rate
+        self.n_sigmas = n_sigmas
+        self.min_deviation = min_deviation
+        self.reanchor_after = reanchor_after
+        self._rejected_run = 0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._last: Optional[Tuple[float, float]] = None
+
+    def push(self, time_s: float, value: float) -> List[str]:
+        """Check one sample and update the detector state.
+
+        Flagged samples are not added to the reference window.
+
+        Args:
+            time_s: Sample time in seconds
+            value: Measured value
+
+        Returns:
+            Names of the detectors that flagged the sample (empty if accepted)
+        """
+        reasons: List[str] = []
+        profile = self.profile
+        if profile is not None:
+            low, high = profile.valid_range or (float("-inf"), float("inf"))
+            if value in profile.sentinels:
+                reasons.append("sentinel")
+            elif value in profile.contextual_sentinels:
+                tolerance = profile.context_tolerance
+                if self._last is not None and self.max_rate is not None:
+                    tolerance += self.max_rate * max(0.0, time_s - self._last[0])
+                if self._last is None or abs(value - self._last[1]) > tolerance:
+                    reasons.append("sentinel")
+            if not low <= value <= high:
+                reasons.append("range")
+        if reasons:
+            return reasons
+
+        if self.max_rate is not None and self._last is not None:
+            dt = time_s - self._last[0]
+            if dt <= 0 or abs(value - self._last[1]) > self.max_rate * dt:
+                reasons.append("rate")
+
+        if len(self._sorted) >= 3:
+            median = _sorted_median(self._sorted)
+            mad = _sorted_median(sorted(abs(v - median) for v in self._sorted))
+            threshold = max(self.n_sigmas * _MAD_SCALE * mad, self.min_deviation)
+            if abs(value - median) > threshold:
+                reasons.append("hampel")
+
+        if reasons:
+            self._rejected_run += 1
+            if self._rejected_run < self.reanchor_after:
+                return reasons
+            self._recent.clear()
+            self._sorted.clear()
+            reasons = []
+
+        self._rejected_run = 0
+        if len(self._recent) == self._recent.maxlen:
+            del self._sorted[bisect_left(self._sorted, self._recent[0])]
+        self._recent.append(value)
+        insort(self._sorted, value)
+        self._last = (time_s, value)
+        return reasons
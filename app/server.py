@@ -0,0 +1,484 @@
+"""Long-running lesson plan generator service.
+
+Shelling out to ``app/lesson_plan_generator.py`` for every request pays the
+interpreter, matplotlib and python-docx startup each time and throws the
+formula caches away. This module keeps them warm instead: a pool of worker
+processes is started once, each with its own ``WordExporter`` (and
+``LatexRenderer``) created by the pool initializer, and a threaded HTTP
+server accepts lesson plan JSON over TCP or a UNIX socket:
+
+- ``POST /markdown``: lesson JSON in, Markdown (UTF-8) out
+- ``POST /docx``: lesson JSON in, .docx bytes out
+- ``GET /health``: liveness and queue status as JSON
+- ``GET /metrics``: Prometheus metrics (see ``app.metrics``)
+
+At most ``max_pending`` requests are admitted at a time; further requests
+are rejected immediately with ``503`` and a ``Retry-After`` header rather
+than queueing without bound, so callers can back off. A request that times
+out keeps its slot until its worker has actually finished the job.
+
+Workers send the changes to their metrics (renders, exports) back with each
+result, and the server merges them into its own registry, so ``/metrics``
+covers the work done in the pool.
+
+Run with ``khtn serve`` or ``python -m app.server``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.lesson_plan_generator import build_markdown
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.metrics import REGISTRY, Snapshot
+from app.word_exporter import COMPRESSION_LEVELS
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MARKDOWN_CONTENT_TYPE = "text/markdown; charset=utf-8"
+_CHUNK_SIZE = 64 * 1024
+
+_REQUESTS = REGISTRY.counter("khtn_server_requests_total", "HTTP requests, by endpoint and status")
+_LATENCY = REGISTRY.histogram(
+    "khtn_server_request_seconds", "Time to answer a generation request, by endpoint"
+)
+_IN_FLIGHT = REGISTRY.gauge("khtn_server_in_flight", "Generation requests being processed")
+_REJECTED = REGISTRY.counter(
+    "khtn_server_rejected_total", "Requests rejected with 503 because the queue was full"
+)
+
+# Per-process exporter, created by the pool initializer
+_worker_exporter: Any = None
+
+
+_worker_compresslevel: Optional[int] = None
+# Worker metrics already sent to the parent
+_worker_metrics: Snapshot = {}
+
+
+def _init_worker(output_dir: str, compresslevel: Optional[int]) -> None:
+    """Create the worker's exporter and warm its imports and caches."""
+    global _worker_exporter, _worker_compresslevel, _worker_metrics
+    from app.word_exporter import WordExporter
+
+    # Formula images come from the renderer's memory cache, not from disk
+    _worker_exporter = WordExporter(output_dir=Path(output_dir), in_memory_images=True)
+    _worker_compresslevel = compresslevel
+    # Draw one formula so matplotlib's fonts and mathtext parser are loaded
+    _worker_exporter.latex_renderer.render_to_bytes("x")
+    # Report only the work done for requests, not the warm-up or the values
+    # inherited from the parent when forking
+    _worker_metrics = REGISTRY.snapshot()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _build_docx(config: Dict[str, Any]) -> Tuple[bytes, int, Snapshot]:
+    """Build a lesson plan .docx in a worker process.
+
+    Returns:
+        The document bytes, the worker's pid and its metric changes since
+        the last result
+    """
+    global _worker_metrics
+    buffer = io.BytesIO()
+    _worker_exporter.export_to_stream(config, buffer, _worker_compresslevel)
+    # The changes of a failed export go out with the next result
+    changes = REGISTRY.changes_since(_worker_metrics)
+    _worker_metrics = REGISTRY.snapshot()
+    return buffer.getvalue(), os.getpid(), changes
+
+
+def _pool_context() -> Any:
+    """Start method for worker processes.
+
+    Pools are also rebuilt from request threads after a worker dies, and
+    forking a threaded process can copy a lock some other thread holds.
+    Workers therefore come from a fork server (spawned on platforms without
+    one), which imports the heavy libraries once and forks warm workers
+    from a single-threaded process.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["app.word_exporter", "app.latex_renderer"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when the service already has ``max_pending`` requests."""
+
+
+class GeneratorService:
+    """Pool of warm worker processes with bounded admission."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 8,
+        output_dir: Optional[Path] = None,
+        request_timeout: float = 60.0,
+        compresslevel: Optional[int] = 1,
+    ):
+        """Initialize the service (call ``start`` before submitting work).
+
+        Args:
+            workers: Number of worker processes building documents
+            max_pending: Requests admitted at once (queued plus running);
+                further requests raise ServiceBusy
+            output_dir: Output directory of the workers' exporters
+            request_timeout: Seconds to wait for a worker before giving up
+            compresslevel: zlib level for the .docx zip; the fast level 1 by
+                default, since responses rarely leave the machine
+        """
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.output_dir = output_dir or Path("outputs")
+        self.request_timeout = request_timeout
+        self.compresslevel = compresslevel
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Jobs not finished yet, by pool, so they can be cancelled with it
+        self._futures: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._context: Any = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        if self._context is None:
+            self._context = _pool_context()
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(str(self.output_dir), self.compresslevel),
+        )
+        futures = [pool.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        return pool
+
+    def start(self) -> None:
+        """Start the worker processes and wait until they are warm."""
+        self._pool = self._new_pool()
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a broken pool, once, however many requests saw it break."""
+        with self._restart_lock:
+            if self._pool is not broken:
+                return
+            # The old pool stays in place until the new one is warm, so
+            # concurrent requests never find the service without a pool
+            self._pool = self._new_pool()
+        broken.shutdown(wait=False)
+        self._cancel_pending(broken)
+
+    def close(self) -> None:
+        """Stop the worker processes, cancelling jobs that have not started."""
+        with self._restart_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            self._cancel_pending(pool)
+            pool.shutdown(wait=True)
+
+    def _cancel_pending(self, pool: ProcessPoolExecutor) -> None:
+        # Done by hand: shutdown(cancel_futures=True) needs Python 3.9
+        with self._lock:
+            futures = list(self._futures.pop(pool, ()))
+        for future in futures:
+            future.cancel()
+
+    def _track(self, pool: ProcessPoolExecutor, future: Future) -> None:
+        with self._lock:
+            self._futures.setdefault(pool, set()).add(future)
+
+        def done(_: Future) -> None:
+            with self._lock:
+                self._futures.get(pool, set()).discard(future)
+            self._release()
+
+        future.add_done_callback(done)
+
+    @property
+    def pending(self) -> int:
+        """Requests currently admitted."""
+        return self._pending
+
+    def _admit(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            _REJECTED.inc()
+            raise ServiceBusy("Too many pending requests")
+        with self._lock:
+            self._pending += 1
+        _IN_FLIGHT.inc()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        _IN_FLIGHT.dec()
+        self._slots.release()
+
+    def markdown(self, config: Dict[str, Any]) -> bytes:
+        """Build Markdown for a lesson plan (runs in the calling thread).
+
+        Raises:
+            ServiceBusy: If ``max_pending`` requests are already admitted
+        """
+        self._admit()
+        try:
+            return build_markdown(config).encode("utf-8")
+        finally:
+            self._release()
+
+    def docx(self, config: Dict[str, Any]) -> bytes:
+        """Build a .docx for a lesson plan in a worker process.
+
+        The request's slot is released when the worker has finished the
+        job, not when the caller stops waiting for it: a timed-out job that
+        is still running keeps counting against ``max_pending``.
+
+        Raises:
+            ServiceBusy: If ``max_pending`` requests are already admitted
+            TimeoutError: If no worker answered within ``request_timeout``
+            RuntimeError: If the service is not started
+            BrokenProcessPool: If a worker died; the pool is replaced
+        """
+        pool = self._pool
+        if pool is None:
+            raise RuntimeError("Service is not started")
+        self._admit()
+        try:
+            future = pool.submit(_build_docx, config)
+        except BaseException as error:
+            self._release()
+            if isinstance(error, BrokenProcessPool):
+                self._restart(pool)
+            raise
+        self._track(pool, future)
+        try:
+            data, worker, metrics = future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            # Frees the slot at once if the job has not started yet
+            future.cancel()
+            raise TimeoutError(f"No result within {self.request_timeout:.0f} s") from None
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OS); start a fresh pool
+            self._restart(pool)
+            raise
+        REGISTRY.merge(metrics, worker=worker)
+        return data
+
+
+def _make_handler(service: GeneratorService, max_body_bytes: int) -> type:
+    class GeneratorHandler(BaseHTTPRequestHandler):
+        server_version = "khtn-server/1.0"
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return None
+
+        def _send(self, status: int, body: bytes, content_type: str, endpoint: str,
+                  headers: Optional[Dict[str, str]] = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            view = memoryview(body)
+            for offset in range(0, len(view), _CHUNK_SIZE):
+                self.wfile.write(view[offset : offset + _CHUNK_SIZE])
+            _REQUESTS.inc(endpoint=endpoint, status=status)
+
+        def _send_error_json(self, status: int, message: str, endpoint: str,
+                             headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+            self._send(status, body, "application/json; charset=utf-8", endpoint, headers)
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            path = self.path.split("?", 1)[0]
+            if path == "/health":
+                body = json.dumps(
+                    {
+                        "status": "ok",
+                        "workers": service.workers,
+                        "pending": service.pending,
+                        "max_pending": service.max_pending,
+                    }
+                ).encode("utf-8")
+                self._send(200, body, "application/json", "health")
+            elif path == "/metrics":
+                self._send(200, REGISTRY.render().encode("utf-8"), METRICS_CONTENT_TYPE, "metrics")
+            else:
+                self._send_error_json(404, "Not found", "unknown")
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            path = self.path.split("?", 1)[0]
+            endpoints = {
+                "/markdown": (service.markdown, MARKDOWN_CONTENT_TYPE),
+                "/docx": (service.docx, DOCX_CONTENT_TYPE),
+            }
+            endpoint = path.strip("/") or "unknown"
+            if path not in endpoints:
+                self._send_error_json(404, "Not found", "unknown")
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True
+                self._send_error_json(400, "Invalid Content-Length", endpoint)
+                return
+            if length > max_body_bytes:
+                self.close_connection = True
+                self._send_error_json(413, "Request body too large", endpoint)
+                return
+            try:
+                config = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(config, dict):
+                    raise ValueError("lesson plan must be a JSON object")
+            except ValueError as e:
+                self._send_error_json(400, f"Invalid JSON: {e}", endpoint)
+                return
+
+            generate, content_type = endpoints[path]
+            start = time.perf_counter()
+            try:
+                body = generate(config)
+            except ServiceBusy as e:
+                self._send_error_json(503, str(e), endpoint, {"Retry-After": "1"})
+                return
+            except TimeoutError as e:
+                self._send_error_json(504, str(e), endpoint)
+                return
+            except Exception as e:
+                self._send_error_json(500, f"Generation failed: {e}", endpoint)
+                return
+            _LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+            self._send(200, body, content_type, endpoint)
+
+    return GeneratorHandler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """HTTP over a UNIX domain socket."""
+
+    daemon_threads = True
+
+    def get_request(self) -> Tuple[Any, Tuple[str, int]]:
+        request, _ = super().get_request()
+        # http.server expects an (address, port) pair for logging
+        return request, ("unix", 0)
+
+
+def create_server(
+    service: GeneratorService,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: Optional[Path] = None,
+    max_body_bytes: int = 4 * 1024 * 1024,
+) -> socketserver.BaseServer:
+    """Create (but do not start) the HTTP server for a service.
+
+    Args:
+        service: Started generator service
+        host: Interface for TCP mode
+        port: TCP port; 0 picks a free port
+        unix_socket: Serve on this UNIX socket path instead of TCP
+        max_body_bytes: Largest accepted request body
+
+    Returns:
+        Server; call ``serve_forever()`` to run it
+    """
+    handler = _make_handler(service, max_body_bytes)
+    if unix_socket is not None:
+        if unix_socket.exists():
+            unix_socket.unlink()
+        return ThreadingUnixHTTPServer(str(unix_socket), handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Máy chủ tạo kế hoạch bài dạy (Markdown/Word) với tiến trình xử lý luôn sẵn sàng."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Địa chỉ lắng nghe (mặc định: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Cổng TCP (mặc định: 8765)")
+    parser.add_argument("--unix", type=Path, default=None, help="Lắng nghe trên UNIX socket thay vì TCP")
+    parser.add_argument(
+        "--workers", type=int, default=2, help="Số tiến trình tạo tệp Word (mặc định: 2)"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=8,
+        help="Số yêu cầu tối đa đang xử lý; vượt quá sẽ trả về 503 (mặc định: 8)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=60.0, help="Thời gian chờ tối đa mỗi yêu cầu (giây)"
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path("outputs"), help="Thư mục đầu ra của các tiến trình xử lý"
+    )
+    parser.add_argument(
+        "--docx-compression",
+        choices=["none", "fast", "default", "small"],
+        default="fast",
+        help="Mức nén tệp .docx trả về (mặc định: fast)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Start the service and serve until interrupted."""
+    args = parse_args(argv)
+    service = GeneratorService(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        output_dir=args.output_dir,
+        request_timeout=args.timeout,
+        compresslevel=COMPRESSION_LEVELS[args.docx_compression],
+    )
+    print(f"⏳ Đang khởi động {service.workers} tiến trình xử lý...")
+    service.start()
+    server = create_server(service, args.host, args.port, args.unix)
+    where = args.unix if args.unix else "http://%s:%d" % server.server_address[:2]
+    print(f"✅ Máy chủ sẵn sàng tại {where} (POST /markdown, POST /docx, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Đang dừng máy chủ...")
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix and args.unix.exists():
+            args.unix.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,10 +8,24 @@ to support laboratory experiments where measurements are taken over time.
 from __future__ import annotations
 
 import json
+import time
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.metrics import REGISTRY
+
+_FILES_LOADED = REGISTRY.counter(
+    "khtn_timeseries_files_loaded_total", "Timeseries JSON files loaded"
+)
+_POINTS_LOADED = REGISTRY.counter(
+    "khtn_timeseries_points_loaded_total", "Measurement points loaded from JSON files"
+)
+_LOAD_SECONDS = REGISTRY.histogram(
+    "khtn_timeseries_load_seconds", "Time spent loading one timeseries JSON file"
+)
 
 
 @dataclass
@@ -75,6 +89,10 @@ class TimeseriesData:
     timeseries: List[TimeseriesDataPoint] = field(default_factory=list)
     # Internal cache for to_dict() to avoid redundant conversions
     _dict_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False)
+    # Internal cache for column views (e.g. the sorted time index) keyed by name.
+    # Tagged with the number of points it was built from so appends invalidate it.
+    _column_cache: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _column_cache_len: int = field(default=-1, init=False, repr=False)
 
     def validate(self) -> tuple[bool, Optional[str]]:
         """Validate the timeseries data against schema requirements.
@@ -142,6 +160,124 @@ class TimeseriesData:
         self._dict_cache = result
         return result
 
+    def invalidate_cache(self) -> None:
+        """Drop cached conversions after the data has been modified in place."""
+        self._dict_cache = None
+        self._column_cache = {}
+        self._column_cache_len = -1
+
+    def _cached_columns(self) -> Dict[str, Any]:
+        """Return the column cache, resetting it if points were added or removed."""
+        if self._column_cache_len != len(self.timeseries):
+            self._column_cache = {}
+            self._column_cache_len = len(self.timeseries)
+        return self._column_cache
+
+    def column(self, name: str) -> List[float]:
+        """Return one measurement field as a flat list of floats, in stored order.
+
+        Column views let statistics and conversions run over whole columns
+        instead of attribute lookups per point. The result is cached and must
+        not be modified by the caller.
+
+        Args:
+            name: Field name of TimeseriesDataPoint ("time_s" or "temp_C")
+
+        Returns:
+            List of values for that field
+        """
+        if name not in TimeseriesDataPoint.__dataclass_fields__:
+            raise KeyError(f"Unknown timeseries column: {name}")
+        cache = self._cached_columns()
+        values = cache.get(name)
+        if values is None:
+            values = [float(getattr(point, name)) for point in self.timeseries]
+            cache[name] = values
+        return values
+
+    def derived_column(
+        self, key: str, compute: Callable[[], List[float]]
+    ) -> List[float]:
+        """Return a computed column, evaluating ``compute`` only on a cache miss.
+
+        Derived columns share the column cache, so they are dropped together
+        with it when points are added or removed.
+
+        Args:
+            key: Unique name of the derived column (including its parameters)
+            compute: Function producing the column values
+
+        Returns:
+            Cached list of values
+        """
+        cache = self._cached_columns()
+        cache_key = f"derived:{key}"
+        values = cache.get(cache_key)
+        if values is None:
+            values = compute()
+            cache[cache_key] = values
+        return values
+
+    def _time_index(self) -> Tuple[List[float], List[TimeseriesDataPoint]]:
+        """Return the sorted time column and the points in the same order.
+
+        The index is built once and cached. Recorded data is normally already
+        in time order, in which case the points list is shared rather than copied.
+        """
+        cache = self._cached_columns()
+        index = cache.get("time_index")
+        if index is None:
+            times = [point.time_s for point in self.timeseries]
+            if all(a <= b for a, b in zip(times, times[1:])):
+                index = (times, self.timeseries)
+            else:
+                points = sorted(self.timeseries, key=lambda point: point.time_s)
+                index = ([point.time_s for point in points], points)
+            cache["time_index"] = index
+        return index
+
+    def index_range(
+        self, start_s: Optional[float] = None, end_s: Optional[float] = None
+    ) -> Tuple[int, int]:
+        """Locate the points with ``start_s <= time_s <= end_s`` by binary search.
+
+        Args:
+            start_s: Inclusive window start in seconds (None for the beginning)
+            end_s: Inclusive window end in seconds (None for the end)
+
+        Returns:
+            Tuple of (lo, hi) positions into the time-sorted points
+        """
+        times, _ = self._time_index()
+        lo = 0 if start_s is None else bisect_left(times, start_s)
+        hi = len(times) if end_s is None else bisect_right(times, end_s)
+        return lo, max(lo, hi)
+
+    def slice(
+        self, start_s: Optional[float] = None, end_s: Optional[float] = None
+    ) -> TimeseriesData:
+        """Return the measurements inside a time window.
+
+        The lookup costs O(log n) plus the size of the window. Metadata and
+        variables are shared with the original object.
+
+        Args:
+            start_s: Inclusive window start in seconds (None for the beginning)
+            end_s: Inclusive window end in seconds (None for the end)
+
+        Returns:
+            TimeseriesData containing only the points in the window
+        """
+        if start_s is not None and end_s is not None and start_s > end_s:
+            raise ValueError(
+                f"start_s ({start_s}) must not be greater than end_s ({end_s})"
+            )
+        lo, hi = self.index_range(start_s, end_s)
+        _, points = self._time_index()
+        return TimeseriesData(
+            metadata=self.metadata, variables=self.variables, timeseries=points[lo:hi]
+        )
+
     def to_json(self, indent: int = 2) -> str:
         """Convert to JSON string."""
         return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
@@ -201,9 +337,14 @@ class TimeseriesData:
         Returns:
             TimeseriesData instance
         """
+        start = time.perf_counter()
         with path.open("r", encoding="utf-8") as f:
             data = json.load(f)
-        return cls.from_dict(data)
+        result = cls.from_dict(data)
+        _LOAD_SECONDS.observe(time.perf_counter() - start)
+        _FILES_LOADED.inc()
+        _POINTS_LOADED.inc(len(result.timeseries))
+        return result
 
 
 def create_sample_timeseries(
@@ -6,14 +6,60 @@ from science experiments.
 """
 
 import argparse
+import csv
+import json
+import os
 import sys
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # Add parent directory to path to import app modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.metrics import REGISTRY, add_metrics_arguments, metrics_path
+from app.profiling import add_profile_arguments, profile_options, run_profiled
 from app.timeseries_data import TimeseriesData, create_sample_timeseries
 
+_FILES_VALIDATED = REGISTRY.counter(
+    "khtn_timeseries_files_validated_total", "Timeseries files validated, by result"
+)
+
+
+def _load_window(input_path: Path, args: argparse.Namespace) -> TimeseriesData:
+    """Load a data file and apply the optional --from/--to time window.
+
+    Args:
+        input_path: Path to the JSON data file
+        args: Command-line arguments (may define ``start`` and ``end``)
+
+    Returns:
+        TimeseriesData restricted to the requested window
+    """
+    data = TimeseriesData.from_json_file(input_path)
+    start_s = getattr(args, "start", None)
+    end_s = getattr(args, "end", None)
+    if start_s is None and end_s is None:
+        return data
+    return data.slice(start_s, end_s)
+
+
+def _add_window_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the --from/--to time window options on a subcommand."""
+    parser.add_argument(
+        "--from",
+        dest="start",
+        type=float,
+        default=None,
+        help="Chỉ xét các điểm có thời gian >= giá trị này (giây)",
+    )
+    parser.add_argument(
+        "--to",
+        dest="end",
+        type=float,
+        default=None,
+        help="Chỉ xét các điểm có thời gian <= giá trị này (giây)",
+    )
+
 
 def validate_command(args: argparse.Namespace) -> int:
     """Validate a timeseries data file.
@@ -33,6 +79,7 @@ def validate_command(args: argparse.Namespace) -> int:
     try:
         data = TimeseriesData.from_json_file(input_path)
         is_valid, error_msg = data.validate()
+        _FILES_VALIDATED.inc(result="valid" if is_valid else "invalid")
 
         if is_valid:
             print(f"✅ Dữ liệu hợp lệ!")
@@ -40,6 +87,29 @@ def validate_command(args: argparse.Namespace) -> int:
             print(f"   🔬 Chủ đề: {data.metadata.topic}")
             print(f"   📱 Thiết bị: {data.metadata.device}")
             print(f"   ⏱️  Tần số lấy mẫu: {data.metadata.sampling_rate_hz} Hz")
+
+            from app.sensor_faults import profile_for, range_mask, sentinel_mask
+
+            profile = profile_for(data.metadata.device)
+            if profile is not None:
+                temps = data.column("temp_C")
+                suspect = sum(sentinel_mask(temps, profile))
+                out_of_range = sum(range_mask(temps, profile))
+                if suspect:
+                    sentinels = "/".join(
+                        f"{value:g}°C"
+                        for value in profile.contextual_sentinels + profile.sentinels
+                    )
+                    print(
+                        f"   ⚠️  Có {suspect} giá trị lỗi cảm biến {profile.name} ({sentinels}). "
+                        "Chạy lệnh 'faults' để xem chi tiết."
+                    )
+                if out_of_range and profile.valid_range is not None:
+                    low, high = profile.valid_range
+                    print(
+                        f"   ⚠️  Có {out_of_range} giá trị ngoài dải đo của {profile.name} "
+                        f"({low:g}°C đến {high:g}°C)."
+                    )
             return 0
         else:
             print(f"❌ Dữ liệu không hợp lệ: {error_msg}")
@@ -49,6 +119,102 @@ def validate_command(args: argparse.Namespace) -> int:
         return 1
 
 
+def _validate_path(path_str: str) -> Dict[str, Any]:
+    """Validate one file and return a picklable status record.
+
+    Runs inside worker processes of ``validate-all``, so it must not print.
+
+    Args:
+        path_str: Path to the JSON data file
+
+    Returns:
+        Dictionary with ``path``, ``valid``, ``points`` and ``error`` keys
+    """
+    try:
+        data = TimeseriesData.from_json_file(Path(path_str))
+        is_valid, error_msg = data.validate()
+        return {
+            "path": path_str,
+            "valid": is_valid,
+            "points": len(data.timeseries),
+            "error": error_msg or "",
+        }
+    except Exception as e:
+        return {"path": path_str, "valid": False, "points": 0, "error": str(e)}
+
+
+def _write_summary(
+    summary_path: Path, results: List[Dict[str, Any]], totals: Dict[str, int]
+) -> None:
+    """Write the validate-all summary as JSON or CSV depending on the suffix."""
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    if summary_path.suffix.lower() == ".csv":
+        with summary_path.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["path", "valid", "points", "error"])
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        payload = {"totals": totals, "files": results}
+        summary_path.write_text(
+            json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+
+def validate_all_command(args: argparse.Namespace) -> int:
+    """Validate every data file in a directory using a process pool.
+
+    Args:
+        args: Command-line arguments
+
+    Returns:
+        Exit code (0 if every file is valid, 1 otherwise)
+    """
+    directory = Path(args.directory)
+
+    if not directory.is_dir():
+        print(f"❌ Lỗi: Không tìm thấy thư mục {directory}")
+        return 1
+
+    matches = directory.rglob(args.pattern) if args.recursive else directory.glob(args.pattern)
+    paths = sorted(str(path) for path in matches if path.is_file())
+    if not paths:
+        print(f"⚠️  Không có tệp nào khớp với mẫu '{args.pattern}' trong {directory}")
+        return 1
+
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) == 1:
+        results = [_validate_path(path) for path in paths]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Large chunks amortize the inter-process round trip for small files
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_validate_path, paths, chunksize=chunksize))
+
+    for result in results:
+        _FILES_VALIDATED.inc(result="valid" if result["valid"] else "invalid")
+        if result["valid"]:
+            if not args.quiet:
+                print(f"✅ {result['path']} ({result['points']} điểm)")
+        else:
+            print(f"❌ {result['path']}: {result['error']}")
+
+    invalid = sum(1 for result in results if not result["valid"])
+    totals = {"files": len(results), "valid": len(results) - invalid, "invalid": invalid}
+    print(
+        f"\n📊 Tổng cộng: {totals['files']} tệp, "
+        f"{totals['valid']} hợp lệ, {totals['invalid']} không hợp lệ"
+    )
+
+    if args.summary:
+        summary_path = Path(args.summary)
+        _write_summary(summary_path, results, totals)
+        print(f"📝 Đã ghi báo cáo tổng hợp tại: {summary_path}")
+
+    return 0 if invalid == 0 else 1
+
+
 def create_sample_command(args: argparse.Namespace) -> int:
     """Create a sample timeseries data file.
 
@@ -93,7 +259,7 @@ def info_command(args: argparse.Namespace) -> int:
         return 1
 
     try:
-        data = TimeseriesData.from_json_file(input_path)
+        data = _load_window(input_path, args)
 
         print("=" * 60)
         print("📊 THÔNG TIN DỮ LIỆU THÍ NGHIỆM")
@@ -130,12 +296,192 @@ def info_command(args: argparse.Namespace) -> int:
         return 1
 
 
-def parse_args() -> argparse.Namespace:
+def report_command(args: argparse.Namespace) -> int:
+    """Generate an experiment report (Word or Markdown) from data files.
+
+    Args:
+        args: Command-line arguments
+
+    Returns:
+        Exit code (0 for success, 1 for failure)
+    """
+    input_paths = [Path(path) for path in args.inputs]
+    missing = [path for path in input_paths if not path.exists()]
+    if missing:
+        print(f"❌ Lỗi: Không tìm thấy tệp {missing[0]}")
+        return 1
+
+    output_path = Path(args.output)
+    try:
+        from app.experiment_report import generate_report
+
+        generate_report(
+            input_paths,
+            output_path,
+            start_s=args.start,
+            end_s=args.end,
+            max_points=args.max_points,
+        )
+        print(f"✅ Đã tạo báo cáo thí nghiệm tại: {output_path}")
+        return 0
+    except ImportError:
+        print("⚠️  Thiếu thư viện để tạo báo cáo. Chạy: pip install -r requirements.txt")
+        return 1
+    except Exception as e:
+        print(f"❌ Lỗi khi tạo báo cáo: {e}")
+        return 1
+
+
+def derive_command(args: argparse.Namespace) -> int:
+    """Print or save converted/derived quantities of a data file as CSV.
+
+    Args:
+        args: Command-line arguments
+
+    Returns:
+        Exit code (0 for success, 1 for failure)
+    """
+    input_path = Path(args.input)
+
+    if not input_path.exists():
+        print(f"❌ Lỗi: Không tìm thấy tệp {input_path}")
+        return 1
+
+    try:
+        from app.units import DerivedColumns
+
+        data = _load_window(input_path, args)
+        engine = DerivedColumns(data)
+        columns = [("time_s", data.column("time_s"))]
+        for spec in args.quantities:
+            columns.append(
+                engine.evaluate(
+                    spec,
+                    mass=args.mass,
+                    specific_heat=args.specific_heat,
+                    mass_unit=args.mass_unit,
+                    energy_unit=args.energy_unit,
+                )
+            )
+    except Exception as e:
+        print(f"❌ Lỗi khi tính đại lượng: {e}")
+        return 1
+
+    headers = [label for label, _ in columns]
+    rows = zip(*(values for _, values in columns))
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        print(f"✅ Đã ghi {len(data.timeseries)} dòng tại: {output_path}")
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(headers)
+        writer.writerows((f"{value:.6g}" for value in row) for row in rows)
+    return 0
+
+
+def faults_command(args: argparse.Namespace) -> int:
+    """Detect sensor faults and outliers, optionally writing cleaned data.
+
+    Args:
+        args: Command-line arguments
+
+    Returns:
+        Exit code (0 if no faults were found or cleaned data was written,
+        1 otherwise)
+    """
+    input_path = Path(args.input)
+
+    if not input_path.exists():
+        print(f"❌ Lỗi: Không tìm thấy tệp {input_path}")
+        return 1
+
+    try:
+        from app.sensor_faults import PROFILES, cleaned_column, detect_faults, profile_for
+        from app.timeseries_data import TimeseriesDataPoint
+
+        data = _load_window(input_path, args)
+        if args.sensor == "auto":
+            profile = profile_for(data.metadata.device)
+        else:
+            profile = PROFILES.get(args.sensor)
+        report = detect_faults(
+            data,
+            profile=profile,
+            max_rate=args.max_rate,
+            half_window=args.half_window,
+            n_sigmas=args.sigmas,
+        )
+    except Exception as e:
+        print(f"❌ Lỗi khi đọc tệp: {e}")
+        return 1
+
+    indices = report.indices
+    counts = report.counts()
+    sensor = f" (cảm biến {profile.name})" if profile is not None else ""
+    print(f"🔎 Đã kiểm tra {len(data.timeseries)} điểm dữ liệu{sensor}")
+    print(
+        f"   Giá trị lỗi cảm biến: {counts.get('sentinel', 0)}, "
+        f"ngoài dải đo: {counts.get('range', 0)}, "
+        f"thay đổi quá nhanh: {counts.get('rate', 0)}, "
+        f"điểm bất thường (Hampel): {counts.get('hampel', 0)}"
+    )
+    for i in indices[: args.limit]:
+        point = data.timeseries[i]
+        detectors = ", ".join(name for name, mask in report.masks.items() if mask[i])
+        print(f"   ⚠️  #{i}: t={point.time_s}s, T={point.temp_C}°C ({detectors})")
+    if len(indices) > args.limit:
+        print(f"   ... và {len(indices) - args.limit} điểm khác")
+
+    if args.output:
+        if args.method == "drop":
+            flagged = set(indices)
+            points = [p for i, p in enumerate(data.timeseries) if i not in flagged]
+        else:
+            temps = cleaned_column(data.column("temp_C"), report.combined)
+            points = [
+                TimeseriesDataPoint(time_s=p.time_s, temp_C=t)
+                for p, t in zip(data.timeseries, temps)
+            ]
+        cleaned = TimeseriesData(
+            metadata=data.metadata, variables=data.variables, timeseries=points
+        )
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        cleaned.save(output_path)
+        print(f"✅ Đã ghi dữ liệu đã làm sạch tại: {output_path}")
+        return 0
+
+    if indices:
+        print(f"❌ Phát hiện {len(indices)} điểm nghi lỗi")
+        return 1
+    print("✅ Không phát hiện điểm bất thường")
+    return 0
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' không phải số nguyên") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"phải lớn hơn hoặc bằng 1, nhận được {number}")
+    return number
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(
         description="Công cụ xử lý dữ liệu chuỗi thời gian cho thí nghiệm khoa học."
     )
 
+    add_profile_arguments(parser)
+    add_metrics_arguments(parser)
     subparsers = parser.add_subparsers(dest="command", help="Lệnh thực hiện")
 
     # Validate command
@@ -144,6 +490,40 @@ def parse_args() -> argparse.Namespace:
     )
     validate_parser.add_argument("input", help="Đường dẫn tệp JSON cần kiểm tra")
 
+    # Validate-all command
+    validate_all_parser = subparsers.add_parser(
+        "validate-all", help="Kiểm tra song song tất cả tệp dữ liệu trong một thư mục"
+    )
+    validate_all_parser.add_argument("directory", help="Thư mục chứa các tệp JSON")
+    validate_all_parser.add_argument(
+        "--pattern",
+        default="*.json",
+        help="Mẫu tên tệp cần kiểm tra (mặc định: '*.json')",
+    )
+    validate_all_parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="Duyệt cả các thư mục con",
+    )
+    validate_all_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="Số tiến trình kiểm tra song song (mặc định: số CPU)",
+    )
+    validate_all_parser.add_argument(
+        "--summary",
+        default=None,
+        help="Ghi báo cáo tổng hợp ra tệp .json hoặc .csv",
+    )
+    validate_all_parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Chỉ in các tệp không hợp lệ",
+    )
+
     # Create sample command
     create_parser = subparsers.add_parser("create-sample", help="Tạo tệp dữ liệu mẫu")
     create_parser.add_argument("output", help="Đường dẫn tệp JSON đầu ra")
@@ -172,22 +552,134 @@ def parse_args() -> argparse.Namespace:
         "info", help="Hiển thị thông tin chi tiết về tệp dữ liệu"
     )
     info_parser.add_argument("input", help="Đường dẫn tệp JSON cần xem thông tin")
+    _add_window_arguments(info_parser)
 
-    return parser.parse_args()
+    # Derive command
+    derive_parser = subparsers.add_parser(
+        "derive", help="Đổi đơn vị hoặc tính đại lượng dẫn xuất (xuất CSV)"
+    )
+    derive_parser.add_argument("input", help="Đường dẫn tệp JSON dữ liệu")
+    derive_parser.add_argument(
+        "quantities",
+        nargs="+",
+        help="Đại lượng cần tính: <cột>:<đơn vị> (vd. temp_C:Kelvin, time_s:minutes), "
+        "delta_T, heat",
+    )
+    derive_parser.add_argument(
+        "--mass", type=float, default=None, help="Khối lượng vật được đun (cho 'heat')"
+    )
+    derive_parser.add_argument(
+        "--mass-unit", default="kg", help="Đơn vị khối lượng (mặc định: kg)"
+    )
+    derive_parser.add_argument(
+        "--specific-heat",
+        type=float,
+        default=4200.0,
+        help="Nhiệt dung riêng J/(kg·K) (mặc định: 4200, của nước)",
+    )
+    derive_parser.add_argument(
+        "--energy-unit", default="J", help="Đơn vị nhiệt lượng (mặc định: J)"
+    )
+    derive_parser.add_argument(
+        "-o", "--output", default=None, help="Tệp CSV đầu ra (mặc định: in ra màn hình)"
+    )
+    _add_window_arguments(derive_parser)
 
+    # Faults command
+    faults_parser = subparsers.add_parser(
+        "faults", help="Phát hiện giá trị lỗi cảm biến và điểm bất thường"
+    )
+    faults_parser.add_argument("input", help="Đường dẫn tệp JSON dữ liệu")
+    faults_parser.add_argument(
+        "--sensor",
+        choices=["auto", "DS18B20", "none"],
+        default="auto",
+        help="Loại cảm biến để kiểm tra giá trị lỗi và dải đo; auto: theo metadata.device "
+        "(mặc định: auto)",
+    )
+    faults_parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=5.0,
+        help="Tốc độ thay đổi tối đa hợp lý (°C/s) (mặc định: 5.0)",
+    )
+    faults_parser.add_argument(
+        "--half-window",
+        type=int,
+        default=3,
+        help="Nửa cửa sổ của bộ lọc Hampel, 0 để tắt (mặc định: 3)",
+    )
+    faults_parser.add_argument(
+        "--sigmas",
+        type=float,
+        default=3.0,
+        help="Ngưỡng bộ lọc Hampel theo độ lệch chuẩn (mặc định: 3.0)",
+    )
+    faults_parser.add_argument(
+        "-o", "--output", default=None, help="Ghi dữ liệu đã làm sạch ra tệp JSON"
+    )
+    faults_parser.add_argument(
+        "--method",
+        choices=["interpolate", "drop"],
+        default="interpolate",
+        help="Cách làm sạch: nội suy tuyến tính hoặc bỏ điểm lỗi (mặc định: interpolate)",
+    )
+    faults_parser.add_argument(
+        "--limit", type=int, default=20, help="Số điểm lỗi tối đa in ra (mặc định: 20)"
+    )
+    _add_window_arguments(faults_parser)
+
+    # Report command
+    report_parser = subparsers.add_parser(
+        "report", help="Tạo báo cáo thí nghiệm (Word hoặc Markdown)"
+    )
+    report_parser.add_argument("inputs", nargs="+", help="Các tệp JSON dữ liệu")
+    report_parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="Tệp báo cáo đầu ra (.docx cho Word, .md cho Markdown)",
+    )
+    report_parser.add_argument(
+        "--max-points",
+        type=int,
+        default=500,
+        help="Số điểm tối đa vẽ trên đồ thị (mặc định: 500)",
+    )
+    _add_window_arguments(report_parser)
 
-def main() -> int:
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Main entry point."""
-    args = parse_args()
+    args = parse_args(argv)
+    try:
+        return run_profiled(run_command, profile_options(args, "timeseries_tool"), args)
+    finally:
+        metrics_file = metrics_path(args)
+        if metrics_file:
+            REGISTRY.write_textfile(metrics_file)
+
 
+def run_command(args: argparse.Namespace) -> int:
+    """Dispatch parsed arguments to the selected command."""
     if args.command == "validate":
         return validate_command(args)
+    elif args.command == "validate-all":
+        return validate_all_command(args)
     elif args.command == "create-sample":
         return create_sample_command(args)
     elif args.command == "info":
         return info_command(args)
+    elif args.command == "derive":
+        return derive_command(args)
+    elif args.command == "faults":
+        return faults_command(args)
+    elif args.command == "report":
+        return report_command(args)
     else:
-        print("❌ Lỗi: Vui lòng chọn một lệnh (validate, create-sample, info)")
+        print("❌ Lỗi: Vui lòng chọn một lệnh (validate, validate-all, create-sample, info, derive, faults, report)")
         print("   Sử dụng --help để xem hướng dẫn")
         return 1
 
@@ -0,0 +1,330 @@
+"""Lightweight hierarchical timing spans.
+
+Code marks interesting regions with ``span``::
+
+    from app.tracing import span
+
+    with span("word.save"):
+        doc.save(path)
+
+    with span("latex.render_to_file") as s:
+        ...
+        s.set(cache="hit")
+
+When tracing is disabled (the default) ``span`` returns a shared no-op
+object, so an instrumented call costs one global lookup and a function
+call. ``enable_tracing`` (or the ``tracing`` context manager) installs a
+``Tracer`` that records nested spans per thread. A finished run can be
+written as a JSON tree of durations and counts, with identical sibling
+spans merged, or in the Chrome trace-event format for chrome://tracing,
+Perfetto or speedscope.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+ENV_VAR = "KHTN_TRACE"
+TRACE_FORMATS = ("chrome", "tree")
+
+
+@dataclass
+class Span:
+    """One timed region; nested spans are its children."""
+
+    name: str
+    start_ns: int = 0
+    end_ns: int = 0
+    thread_id: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes (e.g. ``cache="hit"``) to the span."""
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    """Stand-in returned by ``span`` while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Context manager that records a span into a tracer."""
+
+    __slots__ = ("_tracer", "_span")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self._tracer = tracer
+        self._span = Span(name=name, attrs=attrs)
+
+    def __enter__(self) -> Span:
+        self._tracer._push(self._span)
+        return self._span
+
+    def __exit__(self, *exc: Any) -> None:
+        self._tracer._pop(self._span)
+
+
+class Tracer:
+    """Collects the spans of one run."""
+
+    def __init__(self) -> None:
+        self.origin_ns = time.perf_counter_ns()
+        self.roots: List[Span] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs: Any) -> _ActiveSpan:
+        """Return a context manager that times a region as a child span."""
+        return _ActiveSpan(self, name, attrs)
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, span: Span) -> None:
+        stack = self._stack()
+        span.thread_id = threading.get_ident()
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            with self._lock:
+                self.roots.append(span)
+        stack.append(span)
+        span.start_ns = time.perf_counter_ns()
+
+    def _pop(self, span: Span) -> None:
+        span.end_ns = time.perf_counter_ns()
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+
+    def to_tree(self) -> List[Dict[str, Any]]:
+        """Summarize the run as a tree of durations and counts.
+
+        Sibling spans with the same name are merged: ``count`` is the number
+        of merged spans and ``total_ms`` their summed duration. Attribute
+        values are counted, e.g. ``{"cache": {"hit": 12, "miss": 3}}``.
+
+        Returns:
+            List of root nodes
+        """
+        return _merge(self.roots)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Return the spans as Chrome trace-event JSON ("X" complete events)."""
+        events: List[Dict[str, Any]] = []
+        pid = os.getpid()
+
+        def visit(span: Span) -> None:
+            events.append(
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": (span.start_ns - self.origin_ns) / 1000.0,
+                    "dur": span.duration_ns / 1000.0,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": {key: _jsonable(value) for key, value in span.attrs.items()},
+                }
+            )
+            for child in span.children:
+                visit(child)
+
+        for root in self.roots:
+            visit(root)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path, fmt: str = "chrome") -> Path:
+        """Write the trace as ``"chrome"`` trace events or a ``"tree"`` summary.
+
+        Args:
+            path: Output JSON file
+            fmt: One of ``TRACE_FORMATS``
+
+        Returns:
+            The output path
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if fmt == "chrome":
+            payload: Any = self.to_chrome_trace()
+        elif fmt == "tree":
+            payload = self.to_tree()
+        else:
+            raise ValueError(f"Unknown trace format: {fmt}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+
+def _jsonable(value: Any) -> Any:
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+def _merge(spans: List[Span]) -> List[Dict[str, Any]]:
+    groups: Dict[str, List[Span]] = {}
+    for span in spans:
+        groups.setdefault(span.name, []).append(span)
+
+    nodes = []
+    for name, group in groups.items():
+        attrs: Dict[str, Dict[str, int]] = {}
+        for span in group:
+            for key, value in span.attrs.items():
+                counts = attrs.setdefault(key, {})
+                label = str(_jsonable(value))
+                counts[label] = counts.get(label, 0) + 1
+        node: Dict[str, Any] = {
+            "name": name,
+            "count": len(group),
+            "total_ms": round(sum(s.duration_ns for s in group) / 1e6, 3),
+        }
+        if attrs:
+            node["attrs"] = attrs
+        children = _merge([child for span in group for child in span.children])
+        if children:
+            node["children"] = children
+        nodes.append(node)
+    return nodes
+
+
+_active: Optional[Tracer] = None
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Time a region as a span of the active tracer.
+
+    Args:
+        name: Span name, dotted by component (e.g. ``"word.save"``)
+        **attrs: Initial attributes of the span
+
+    Returns:
+        A context manager; its ``__enter__`` value supports ``set(**attrs)``
+    """
+    tracer = _active
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.span(name, **attrs)
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the active tracer, or None if tracing is disabled."""
+    return _active
+
+
+def enable_tracing() -> Tracer:
+    """Start recording spans into a new tracer and return it."""
+    global _active
+    _active = Tracer()
+    return _active
+
+
+def disable_tracing() -> Optional[Tracer]:
+    """Stop recording spans and return the tracer that was active."""
+    global _active
+    tracer, _active = _active, None
+    return tracer
+
+
+@contextmanager
+def tracing() -> Iterator[Tracer]:
+    """Enable tracing for the duration of a ``with`` block."""
+    global _active
+    previous = _active
+    tracer = enable_tracing()
+    try:
+        yield tracer
+    finally:
+        _active = previous
+
+
+def add_trace_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the ``--trace`` options to a command line parser."""
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help=f"Ghi thời gian từng bước xử lý vào tệp JSON (hoặc đặt biến môi trường {ENV_VAR})",
+    )
+    parser.add_argument(
+        "--trace-format",
+        choices=TRACE_FORMATS,
+        default="chrome",
+        help="Định dạng trace: chrome (chrome://tracing, Perfetto) hoặc tree (cây thời gian)",
+    )
+
+
+def trace_path(args: argparse.Namespace, environ: Optional[Dict[str, str]] = None) -> Optional[Path]:
+    """Return the trace output path from ``--trace`` or ``KHTN_TRACE``."""
+    environ = os.environ if environ is None else environ
+    path = getattr(args, "trace", None)
+    if path is None and environ.get(ENV_VAR):
+        path = Path(environ[ENV_VAR])
+    return path
+
+
+def run_traced(
+    name: str,
+    func: Callable[..., Any],
+    output_path: Optional[Path],
+    fmt: str = "chrome",
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    """Call ``func`` inside a root span and write the trace afterwards.
+
+    The trace is written even if ``func`` raises.
+
+    Args:
+        name: Name of the root span
+        func: Command to run
+        output_path: Trace file, or None to call ``func`` without tracing
+        fmt: One of ``TRACE_FORMATS``
+        *args: Positional arguments for ``func``
+        **kwargs: Keyword arguments for ``func``
+
+    Returns:
+        Whatever ``func`` returns
+    """
+    if output_path is None:
+        return func(*args, **kwargs)
+
+    with tracing() as tracer:
+        try:
+            with span(name):
+                return func(*args, **kwargs)
+        finally:
+            tracer.write(output_path, fmt)
+            print(f"⏱️  Đã ghi trace vào: {output_path}", file=sys.stderr)
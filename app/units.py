@@ -0,0 +1,250 @@
+"""Unit conversion and derived quantities for timeseries variables.
+
+This module provides a small unit registry (time, temperature, energy, mass)
+and an engine that computes converted or derived columns of
+``TimeseriesData``, such as temperature in Kelvin or heat absorbed
+Q = m·c·ΔT. Conversions are applied to whole columns at once, and results
+are cached on the data object until its points change.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.timeseries_data import TimeseriesData
+
+
+@dataclass(frozen=True)
+class Unit:
+    """A unit defined by a linear map to its dimension's base unit.
+
+    ``base_value = value * scale + offset``
+    """
+
+    name: str
+    dimension: str
+    scale: float
+    offset: float = 0.0
+    aliases: Tuple[str, ...] = ()
+
+
+class UnitRegistry:
+    """Lookup table of units by name or alias (case-insensitive)."""
+
+    def __init__(self, units: Iterable[Unit] = ()):
+        """Initialize the registry.
+
+        Args:
+            units: Units to register initially
+        """
+        self._units: Dict[str, Unit] = {}
+        for unit in units:
+            self.register(unit)
+
+    def register(self, unit: Unit) -> None:
+        """Register a unit under its name and all of its aliases."""
+        for key in (unit.name, *unit.aliases):
+            self._units[key.lower()] = unit
+
+    def get(self, name: str) -> Unit:
+        """Return the unit registered under ``name``.
+
+        Raises:
+            ValueError: If the unit is not known
+        """
+        unit = self._units.get(name.strip().lower())
+        if unit is None:
+            raise ValueError(f"Unknown unit: {name}")
+        return unit
+
+    def factors(
+        self, source: str, target: str, delta: bool = False
+    ) -> Tuple[float, float]:
+        """Return ``(factor, shift)`` such that ``target = source * factor + shift``.
+
+        Args:
+            source: Unit of the input values
+            target: Unit of the output values
+            delta: Convert differences (e.g. ΔT), which ignores unit offsets
+
+        Raises:
+            ValueError: If either unit is unknown or the dimensions differ
+        """
+        src = self.get(source)
+        dst = self.get(target)
+        if src.dimension != dst.dimension:
+            raise ValueError(
+                f"Cannot convert {src.name} ({src.dimension}) "
+                f"to {dst.name} ({dst.dimension})"
+            )
+        factor = src.scale / dst.scale
+        shift = 0.0 if delta else (src.offset - dst.offset) / dst.scale
+        return factor, shift
+
+    def convert(
+        self, values: Sequence[float], source: str, target: str, delta: bool = False
+    ) -> List[float]:
+        """Convert a whole column of values between units.
+
+        The affine map is resolved once, then applied in a single pass.
+        """
+        factor, shift = self.factors(source, target, delta=delta)
+        if factor == 1.0 and shift == 0.0:
+            return list(values)
+        return [value * factor + shift for value in values]
+
+
+DEFAULT_REGISTRY = UnitRegistry(
+    [
+        # Time (base: second)
+        Unit("seconds", "time", 1.0, aliases=("s", "sec", "second", "giây")),
+        Unit("milliseconds", "time", 1e-3, aliases=("ms", "millisecond")),
+        Unit("minutes", "time", 60.0, aliases=("min", "minute", "phút")),
+        Unit("hours", "time", 3600.0, aliases=("h", "hour", "giờ")),
+        # Temperature (base: Kelvin)
+        Unit("Kelvin", "temperature", 1.0, aliases=("K",)),
+        Unit("Celsius", "temperature", 1.0, 273.15, aliases=("C", "°C", "degC")),
+        Unit(
+            "Fahrenheit",
+            "temperature",
+            5.0 / 9.0,
+            273.15 - 32.0 * 5.0 / 9.0,
+            aliases=("F", "°F", "degF"),
+        ),
+        # Energy (base: joule)
+        Unit("joules", "energy", 1.0, aliases=("J", "joule")),
+        Unit("kilojoules", "energy", 1e3, aliases=("kJ", "kilojoule")),
+        Unit("calories", "energy", 4.184, aliases=("cal", "calorie")),
+        Unit("kilocalories", "energy", 4184.0, aliases=("kcal", "kilocalorie")),
+        # Mass (base: kilogram)
+        Unit("kilograms", "mass", 1.0, aliases=("kg", "kilogram")),
+        Unit("grams", "mass", 1e-3, aliases=("g", "gram")),
+    ]
+)
+
+# Default units of the TimeseriesDataPoint fields and the variable names that
+# describe them in the "variables" section of a data file
+_COLUMN_DEFAULTS = {"time_s": ("time", "seconds"), "temp_C": ("temperature", "Celsius")}
+
+
+class DerivedColumns:
+    """Compute converted and derived columns of a TimeseriesData object.
+
+    Results are stored in the data object's column cache, so they are
+    computed on first access and reused until points are added or removed
+    (or ``TimeseriesData.invalidate_cache()`` is called).
+    """
+
+    def __init__(self, data: TimeseriesData, registry: Optional[UnitRegistry] = None):
+        """Initialize the engine.
+
+        Args:
+            data: Source timeseries data
+            registry: Unit registry to use (default: DEFAULT_REGISTRY)
+        """
+        self.data = data
+        self.registry = registry or DEFAULT_REGISTRY
+
+    def source_unit(self, column: str) -> str:
+        """Return the unit of a raw column as declared in ``variables``.
+
+        Falls back to the schema default when the variable is missing or its
+        unit is not in the registry.
+        """
+        if column not in _COLUMN_DEFAULTS:
+            raise KeyError(f"Unknown timeseries column: {column}")
+        variable_name, default_unit = _COLUMN_DEFAULTS[column]
+        for var in self.data.variables:
+            if var.name == variable_name and var.unit:
+                try:
+                    self.registry.get(var.unit)
+                    return var.unit
+                except ValueError:
+                    break
+        return default_unit
+
+    def convert(self, column: str, unit: str) -> List[float]:
+        """Return ``column`` converted to ``unit``."""
+        source = self.source_unit(column)
+        # The declared unit can change between calls, so it is part of the key
+        key = f"convert:{column}:{self.registry.get(source).name}:{self.registry.get(unit).name}"
+        return self.data.derived_column(
+            key,
+            lambda: self.registry.convert(self.data.column(column), source, unit),
+        )
+
+    def delta(self, column: str = "temp_C") -> List[float]:
+        """Return the change of ``column`` relative to its first value."""
+
+        def compute() -> List[float]:
+            values = self.data.column(column)
+            if not values:
+                return []
+            first = values[0]
+            return [value - first for value in values]
+
+        return self.data.derived_column(f"delta:{column}", compute)
+
+    def heat(
+        self,
+        mass: float,
+        specific_heat: float = 4200.0,
+        mass_unit: str = "kg",
+        energy_unit: str = "J",
+    ) -> List[float]:
+        """Return the heat absorbed since the first sample, Q = m·c·ΔT.
+
+        Args:
+            mass: Mass of the heated body
+            specific_heat: Specific heat capacity in J/(kg·K) (water: 4200)
+            mass_unit: Unit of ``mass``
+            energy_unit: Unit of the returned values
+
+        Returns:
+            Heat absorbed at each sample
+        """
+        mass_kg = mass * self.registry.factors(mass_unit, "kg")[0]
+        to_energy = self.registry.factors("J", energy_unit)[0]
+        # ΔT in Kelvin has the same magnitude as in Celsius, but honour the
+        # declared unit in case the data was recorded in Fahrenheit
+        source = self.source_unit("temp_C")
+        kelvin_per_unit = self.registry.factors(source, "K", delta=True)[0]
+        factor = mass_kg * specific_heat * kelvin_per_unit * to_energy
+        key = (
+            f"heat:{self.registry.get(source).name}:{mass_kg!r}:{specific_heat!r}:"
+            f"{self.registry.get(energy_unit).name}"
+        )
+        return self.data.derived_column(
+            key, lambda: [value * factor for value in self.delta("temp_C")]
+        )
+
+    def evaluate(
+        self,
+        spec: str,
+        mass: Optional[float] = None,
+        specific_heat: float = 4200.0,
+        mass_unit: str = "kg",
+        energy_unit: str = "J",
+    ) -> Tuple[str, List[float]]:
+        """Evaluate a quantity specification used by the ``derive`` command.
+
+        Supported forms: ``<column>:<unit>`` (e.g. ``temp_C:Kelvin``),
+        ``delta_T`` and ``heat`` (requires ``mass``).
+
+        Returns:
+            Tuple of (column label, values)
+        """
+        if ":" in spec:
+            column, unit = spec.split(":", 1)
+            unit_name = self.registry.get(unit).name
+            return f"{column} [{unit_name}]", self.convert(column, unit)
+        if spec == "delta_T":
+            unit_name = self.registry.get(self.source_unit("temp_C")).name
+            return f"delta_T [{unit_name}]", self.delta("temp_C")
+        if spec == "heat":
+            if mass is None:
+                raise ValueError("Quantity 'heat' requires a mass")
+            values = self.heat(mass, specific_heat, mass_unit, energy_unit)
+            return f"Q [{self.registry.get(energy_unit).name}]", values
+        raise ValueError(f"Unknown quantity: {spec}")
@@ -1,22 +1,260 @@
 """Word document (.docx) export functionality for lesson plans.
 
 This module converts lesson plan data to Word format using python-docx,
-with support for embedding LaTeX formula images.
+with support for embedding LaTeX formula images. python-docx is imported
+when a document is built, so importing this module stays cheap.
+
+Documents can be saved to a path or written to any binary stream (an open
+file, a ``BytesIO`` or an HTTP response) with ``export_to_stream``; the zip
+parts are compressed and written one at a time, so the stream does not need
+to be seekable and nothing is staged in a temporary file.
+
+Formatting lives in the styles part rather than on individual runs: a base
+document with the fonts, sizes and colours defined in its styles is built
+once per process and deep-copied for each export, instead of loading
+python-docx's default template and restyling it every time.
+
+Formula images are added through an ``ImageRegistry`` per document: the
+renderer already knows each PNG's size, resolution and hash, so every
+distinct formula becomes one image part without python-docx decoding the
+PNG again or hashing all earlier images to look for a duplicate. Formulas
+are rendered at the size they are displayed at (``formula_dpi``) rather than
+oversampled at 300 dpi and scaled down by Word. With ``formula_format="svg"``
+each formula is also embedded once as SVG, which Word shows at any zoom,
+with the PNG kept as the fallback Office expects.
 """
 
 from __future__ import annotations
 
+import copy
+import io
 import re
-from dataclasses import dataclass
+import time
+import weakref
+import zipfile
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import IO, TYPE_CHECKING, Any, Dict, List, Optional, Union
+from xml.sax.saxutils import quoteattr
 
-from docx import Document
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.shared import Inches, Pt, RGBColor
-from docx.oxml.ns import qn
+from app.docx_tables import ImageRegistry, InlineImage, add_table
+from app.latex_normalizer import normalize
+from app.latex_renderer import DISPLAY_DPI, FormulaSize, LatexRenderer, RenderedFormula
+from app.metrics import REGISTRY
+from app.tracing import span
 
-from app.latex_renderer import LatexRenderer
+if TYPE_CHECKING:
+    from docx.document import Document
+
+    from app.render_pool import RenderPool
+
+_DOCUMENTS = REGISTRY.counter("khtn_word_documents_exported_total", "Word documents saved")
+_EXPORT_SECONDS = REGISTRY.histogram(
+    "khtn_word_export_seconds", "Time to build and save one Word document"
+)
+_BYTES_WRITTEN = REGISTRY.counter("khtn_word_bytes_written_total", "Bytes of .docx files written")
+_IMAGES = REGISTRY.counter(
+    "khtn_word_images_embedded_total", "Formula images embedded in Word documents"
+)
+
+_EMU_PER_INCH = 914400
+
+# Named zlib levels for the .docx zip; 0 stores parts uncompressed
+COMPRESSION_LEVELS = {"none": 0, "fast": 1, "default": 6, "small": 9}
+# Formula image formats Word documents can embed
+FORMULA_FORMATS = ("png", "svg")
+
+FONT_NAME = "Times New Roman"
+TITLE_STYLE = "Lesson Title"
+
+# Style IDs in the base template. Content references them directly: python-docx
+# resolves a style name by scanning every style (and looking up the default
+# style) on each add_paragraph/add_run call.
+TITLE_STYLE_ID = "LessonTitle"
+LABEL_STYLE_ID = "Strong"
+BULLET_STYLE_ID = "ListBullet"
+BULLET2_STYLE_ID = "ListBullet2"
+
+_base_template: Optional[Document] = None
+
+
+class _CountingStream:
+    """Write-only wrapper that counts bytes and hides ``seek``.
+
+    ``zipfile`` falls back to streaming mode (data descriptors after each
+    member) when the target cannot seek, which is what sockets and HTTP
+    responses need.
+    """
+
+    def __init__(self, stream: IO[bytes]):
+        self._stream = stream
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        self._stream.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def flush(self) -> None:
+        flush = getattr(self._stream, "flush", None)
+        if flush is not None:
+            flush()
+
+
+_CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_RELS_CONTENT_TYPE = "application/vnd.openxmlformats-package.relationships+xml"
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+
+def _content_types_xml(parts: List[Any]) -> bytes:
+    """Serialize ``[Content_Types].xml`` for the given package parts.
+
+    Relationship and plain XML parts, and images, are covered by a
+    ``Default`` per extension; every other part gets an ``Override``.
+    """
+    defaults = {"rels": _RELS_CONTENT_TYPE, "xml": "application/xml"}
+    overrides = []
+    for part in parts:
+        ext = part.partname.ext.lower()
+        if defaults.get(ext) == part.content_type:
+            continue
+        if ext not in defaults and part.content_type.startswith("image/"):
+            defaults[ext] = part.content_type
+            continue
+        overrides.append((str(part.partname), part.content_type))
+    xml = [_XML_HEADER, f'<Types xmlns="{_CONTENT_TYPES_NS}">']
+    xml.extend(
+        f"<Default Extension={quoteattr(ext)} ContentType={quoteattr(content_type)}/>"
+        for ext, content_type in defaults.items()
+    )
+    xml.extend(
+        f"<Override PartName={quoteattr(partname)} ContentType={quoteattr(content_type)}/>"
+        for partname, content_type in sorted(overrides)
+    )
+    xml.append("</Types>")
+    return "".join(xml).encode("utf-8")
+
+
+def write_document(
+    doc: Document, target: Union[str, Path, IO[bytes]], compresslevel: Optional[int] = None
+) -> None:
+    """Save a document to a path or binary stream.
+
+    Same package layout as ``Document.save``, but the zip compression level
+    can be chosen: 1 writes faster than python-docx's default (6) for a
+    slightly larger file, 9 is slowest and smallest, 0 stores the parts
+    uncompressed. Only python-docx's public part API is used, so the
+    content types are serialized here.
+
+    Args:
+        doc: python-docx Document
+        target: File path or writable binary stream (need not be seekable)
+        compresslevel: zlib level 0-9, or None for the zlib default
+    """
+    package = doc.part.package
+    parts = list(package.parts)
+    for part in parts:
+        part.before_marshal()
+    if compresslevel == 0:
+        archive = zipfile.ZipFile(target, "w", compression=zipfile.ZIP_STORED)
+    else:
+        archive = zipfile.ZipFile(
+            target, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+        )
+    with archive:
+        archive.writestr("[Content_Types].xml", _content_types_xml(parts))
+        archive.writestr("_rels/.rels", package.rels.xml)
+        for part in parts:
+            archive.writestr(part.partname.membername, part.blob)
+            if len(part.rels):
+                archive.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+
+def _set_style_font(style: Any, name: str) -> None:
+    """Use ``name`` for all scripts of a style, dropping theme fonts.
+
+    Theme font attributes (``w:asciiTheme`` etc.) take precedence over
+    explicit names, so they are removed.
+    """
+    from docx.oxml.ns import qn
+
+    rFonts = style.element.get_or_add_rPr().get_or_add_rFonts()
+    for script in ("ascii", "hAnsi", "eastAsia", "cs"):
+        rFonts.attrib.pop(qn(f"w:{script}Theme"), None)
+        rFonts.set(qn(f"w:{script}"), name)
+
+
+def define_base_styles(doc: Document) -> None:
+    """Define the lesson plan styles in a document's styles part.
+
+    - Normal: Times New Roman 13 pt, also for East-Asian text (Vietnamese)
+    - Heading 1-3: Times New Roman, black
+    - ``TITLE_STYLE``: 16 pt bold, centred
+    - List Bullet, List Bullet 2 and Strong (bold labels) come from the
+      python-docx template and inherit the Normal font
+
+    Args:
+        doc: Document whose styles are modified
+    """
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor
+
+    styles = doc.styles
+    normal = styles["Normal"]
+    normal.font.size = Pt(13)
+    _set_style_font(normal, FONT_NAME)
+
+    for level in (1, 2, 3):
+        heading = styles[f"Heading {level}"]
+        _set_style_font(heading, FONT_NAME)
+        heading.font.color.rgb = RGBColor(0, 0, 0)
+
+    title = styles.add_style(TITLE_STYLE, WD_STYLE_TYPE.PARAGRAPH)
+    title.base_style = normal
+    title.font.size = Pt(16)
+    title.font.bold = True
+    title.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+
+def _add_paragraph(container: Any, text: str = "", style_id: Optional[str] = None) -> Any:
+    """Append a paragraph to a document or cell, referencing a style by ID."""
+    paragraph = container.add_paragraph(text)
+    if style_id:
+        paragraph._p.style = style_id
+    return paragraph
+
+
+def _add_run(paragraph: Any, text: str, style_id: Optional[str] = None) -> Any:
+    """Append a run to a paragraph, referencing a character style by ID."""
+    run = paragraph.add_run(text)
+    if style_id:
+        run._r.style = style_id
+    return run
+
+
+def _template_document() -> Document:
+    """Return the pristine styled base document, building it on first use.
+
+    The document is only ever deep-copied, never read or modified: python-docx
+    caches proxies for sub-elements (such as the body) on first access, and
+    lxml elements do not honour ``deepcopy``'s memo, so a copy made after such
+    an access would write into a detached element. It is therefore reloaded
+    from its own bytes once after the styles are defined.
+    """
+    global _base_template
+    if _base_template is None:
+        import docx
+
+        doc = docx.Document()
+        define_base_styles(doc)
+        buffer = io.BytesIO()
+        write_document(doc, buffer, 0)
+        buffer.seek(0)
+        _base_template = docx.Document(buffer)
+    return _base_template
 
 
 class WordExporter:
@@ -25,29 +263,115 @@ class WordExporter:
     # Compile regex pattern once at class level for performance
     _LATEX_PATTERN = re.compile(r"\$([^\$]+)\$")
 
-    def __init__(self, output_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        output_dir: Optional[Path] = None,
+        in_memory_images: bool = False,
+        cache_template: bool = True,
+        formula_dpi: Optional[int] = DISPLAY_DPI,
+        formula_format: str = "png",
+        render_pool: Optional[RenderPool] = None,
+    ):
         """Initialize the Word exporter.
 
         Args:
             output_dir: Directory for temporary files (formula images, etc.)
+            in_memory_images: Embed formula images from the renderer's
+                in-memory cache instead of PNG files in ``output_dir/formulas``
+            cache_template: Copy the cached styled base document for each
+                export; if False, load and style a fresh template every time
+            formula_dpi: Render formula images at their display size with this
+                resolution; None renders them at 20 pt and the renderer's
+                300 dpi and lets Word scale them
+            formula_format: "png", or "svg" to add a vector version of every
+                formula (the PNG stays as fallback for older readers)
+            render_pool: Draw formulas in this pool's worker processes, so a
+                formula that hangs or exhausts memory falls back to text
+                instead of stalling the export
+
+        Raises:
+            ValueError: If ``formula_format`` is not supported
         """
+        if formula_format not in FORMULA_FORMATS:
+            raise ValueError(f"Unsupported formula format: {formula_format}")
         self.output_dir = output_dir or Path("outputs")
-        self.latex_renderer = LatexRenderer(output_dir=self.output_dir / "formulas")
-
-    def export_lesson_plan(self, config: Dict[str, Any], output_path: Path) -> None:
+        self.in_memory_images = in_memory_images
+        self.cache_template = cache_template
+        self.formula_dpi = formula_dpi
+        self.formula_format = formula_format
+        self.latex_renderer = LatexRenderer(
+            output_dir=self.output_dir / "formulas", pool=render_pool
+        )
+        # One registry per document part, dropped with the document
+        self._registries: weakref.WeakKeyDictionary[Any, ImageRegistry] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def export_lesson_plan(
+        self, config: Dict[str, Any], output_path: Path, compresslevel: Optional[int] = None
+    ) -> None:
         """Export a lesson plan configuration to a Word document.
 
         Args:
             config: Lesson plan configuration dictionary (same format as JSON input)
             output_path: Path where the Word document should be saved
+            compresslevel: zlib level 0-9 for the .docx zip (None: default)
         """
-        doc = Document()
+        start = time.perf_counter()
+        with span("word.export_lesson_plan"):
+            doc = self.build_document(config)
+
+            # Save the document
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with span("word.save"):
+                write_document(doc, output_path, compresslevel)
+        _EXPORT_SECONDS.observe(time.perf_counter() - start)
+        _DOCUMENTS.inc()
+        _BYTES_WRITTEN.inc(output_path.stat().st_size)
+
+    def export_to_stream(
+        self, config: Dict[str, Any], stream: IO[bytes], compresslevel: Optional[int] = None
+    ) -> int:
+        """Export a lesson plan as .docx bytes written to a binary stream.
 
-        # Set document properties
-        self._set_document_properties(doc)
+        Args:
+            config: Lesson plan configuration dictionary (same format as JSON input)
+            stream: Writable binary stream; it is not closed
+            compresslevel: zlib level 0-9 for the .docx zip (None: default)
+
+        Returns:
+            Number of bytes written
+        """
+        start = time.perf_counter()
+        counter = _CountingStream(stream)
+        with span("word.export_to_stream"):
+            doc = self.build_document(config)
+            with span("word.save"):
+                write_document(doc, counter, compresslevel)
+        _EXPORT_SECONDS.observe(time.perf_counter() - start)
+        _DOCUMENTS.inc()
+        _BYTES_WRITTEN.inc(counter.bytes_written)
+        return counter.bytes_written
+
+    def build_document(self, config: Dict[str, Any]) -> Document:
+        """Build the Word document for a lesson plan without saving it.
+
+        Args:
+            config: Lesson plan configuration dictionary (same format as JSON input)
+
+        Returns:
+            The populated python-docx Document
+        """
+        with span("word.build_document"):
+            return self._build_sections(config)
+
+    def _build_sections(self, config: Dict[str, Any]) -> Document:
+        with span("word.new_document"):
+            doc = self.new_document()
 
         # Add title and metadata
-        self._add_metadata_section(doc, config.get("metadata", {}))
+        with span("word.metadata"):
+            self.add_metadata_section(doc, config.get("metadata", {}))
 
         # Add objectives
         if config.get("objectives"):
@@ -71,11 +395,13 @@ class WordExporter:
 
         # Add formulas table
         if config.get("formulas"):
-            self._add_formulas_table(doc, config["formulas"])
+            with span("word.formulas_table", rows=len(config["formulas"])):
+                self._add_formulas_table(doc, config["formulas"])
 
         # Add activities
         if config.get("activities"):
-            self._add_activities_section(doc, config["activities"])
+            with span("word.activities", activities=len(config["activities"])):
+                self._add_activities_section(doc, config["activities"])
 
         # Add assessment
         if config.get("assessment"):
@@ -93,29 +419,81 @@ class WordExporter:
                 doc, "Ghi chú và tự đánh giá", config["reflection"]
             )
 
-        # Save the document
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        doc.save(output_path)
+        return doc
+
+    def new_document(self) -> Document:
+        """Create an empty document with the exporter's base styles defined."""
+        if self.cache_template:
+            # Copying the parsed package is cheaper than loading the template
+            return copy.deepcopy(_template_document())
+
+        import docx
 
-    def _set_document_properties(self, doc: Document) -> None:
-        """Set document-wide properties like font and spacing."""
-        # Set default font
-        style = doc.styles["Normal"]
-        font = style.font
-        font.name = "Times New Roman"
-        font.size = Pt(13)
+        doc = docx.Document()
+        define_base_styles(doc)
+        return doc
 
-        # Set Vietnamese font
-        style.element.rPr.rFonts.set(qn("w:eastAsia"), "Times New Roman")
+    def add_picture(self, doc: Document, path: Union[str, Path], width: Optional[int] = None) -> None:
+        """Add a picture file as its own paragraph (e.g. a chart).
 
-    def _add_metadata_section(self, doc: Document, metadata: Dict[str, Any]) -> None:
+        Use this rather than ``doc.add_picture`` in documents that also hold
+        formula images, so their shape ids stay unique.
+        """
+        doc.add_picture(str(path), width=width)
+        registry = self._registries.get(doc.part)
+        if registry is not None:
+            registry.invalidate()
+
+    def _images(self, part: Any) -> ImageRegistry:
+        registry = self._registries.get(part)
+        if registry is None:
+            registry = self._registries[part] = ImageRegistry(part)
+        return registry
+
+    def _render_formula(
+        self, latex_expr: str, size: Optional[FormulaSize] = None, image_format: str = "png"
+    ) -> RenderedFormula:
+        """Render a formula in memory or to ``output_dir/formulas``."""
+        if self.in_memory_images:
+            return self.latex_renderer.render(latex_expr, size, image_format)
+        path = self.latex_renderer.render_to_file(latex_expr, size=size, image_format=image_format)
+        return RenderedFormula.from_data(latex_expr, path.read_bytes(), path.name, image_format)
+
+    def _formula_image(
+        self,
+        part: Any,
+        latex_expr: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+    ) -> InlineImage:
+        """Return the formula's image in ``part``, rendering and adding it once.
+
+        With ``formula_dpi`` set, the image is rendered for the given width or
+        height (one of them), which it is then also displayed at. An SVG
+        version does not depend on the size, so one serves every occurrence.
+        """
+        size = None
+        if self.formula_dpi is not None and width is not None:
+            size = FormulaSize(width=width / _EMU_PER_INCH, dpi=self.formula_dpi)
+        elif self.formula_dpi is not None and height is not None:
+            size = FormulaSize(height=height / _EMU_PER_INCH, dpi=self.formula_dpi)
+        return self._images(part).image(
+            (normalize(latex_expr), width, height),
+            lambda: self._render_formula(latex_expr, size),
+            width=width,
+            height=height,
+            load_svg=(
+                (lambda: self._render_formula(latex_expr, image_format="svg"))
+                if self.formula_format == "svg"
+                else None
+            ),
+        )
+
+    def add_metadata_section(self, doc: Document, metadata: Dict[str, Any]) -> None:
         """Add the title and metadata section."""
         # Title
         title = metadata.get("title", "Kế hoạch bài dạy Khoa học Tự nhiên")
-        title_para = doc.add_paragraph(title)
-        title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        title_para.runs[0].font.size = Pt(16)
-        title_para.runs[0].font.bold = True
+        _add_paragraph(doc, title, TITLE_STYLE_ID)
 
         # Metadata items
         metadata_items = [
@@ -130,69 +508,69 @@ class WordExporter:
         for label, value in metadata_items:
             if value:
                 para = doc.add_paragraph()
-                para.add_run(f"{label}: ").bold = True
+                _add_run(para, f"{label}: ", LABEL_STYLE_ID)
                 para.add_run(str(value))
 
         # Add spacing
         doc.add_paragraph()
 
-    def _add_heading(self, doc: Document, text: str, level: int = 1) -> None:
-        """Add a heading with consistent formatting."""
-        heading = doc.add_heading(text, level=level)
-        heading.runs[0].font.name = "Times New Roman"
-        heading.runs[0].font.color.rgb = RGBColor(0, 0, 0)
+    def add_heading(self, doc: Document, text: str, level: int = 1) -> None:
+        """Add a heading; its font and colour come from the heading style."""
+        _add_paragraph(doc, text, f"Heading{level}")
 
     def _add_bullet_section(
         self, doc: Document, title: str, items: List[str]
     ) -> None:
         """Add a section with a heading and bullet points."""
-        self._add_heading(doc, title, level=2)
+        with span("word.bullet_section", section=title):
+            self.add_heading(doc, title, level=2)
 
-        for item in items:
-            if item:
-                # Check for LaTeX expressions and replace with images
-                item_with_images = self._process_latex_in_text(doc, item)
-                if not item_with_images:  # No LaTeX found, add as text
-                    doc.add_paragraph(item, style="List Bullet")
+            for item in items:
+                if item:
+                    # Check for LaTeX expressions and replace with images
+                    item_with_images = self._process_latex_in_text(doc, item)
+                    if not item_with_images:  # No LaTeX found, add as text
+                        _add_paragraph(doc, item, BULLET_STYLE_ID)
 
     def _add_formulas_table(self, doc: Document, formulas: List[Dict[str, Any]]) -> None:
-        """Add a table showing formulas with LaTeX rendered as images."""
-        self._add_heading(doc, "Công thức và ký hiệu sử dụng", level=2)
-
-        # Create table
-        table = doc.add_table(rows=1, cols=3)
-        table.style = "Light Grid Accent 1"
-
-        # Header row
-        header_cells = table.rows[0].cells
-        header_cells[0].text = "Ký hiệu"
-        header_cells[1].text = "Diễn giải"
-        header_cells[2].text = "Biểu thức"
-
-        # Make header bold
-        for cell in header_cells:
-            for paragraph in cell.paragraphs:
-                for run in paragraph.runs:
-                    run.font.bold = True
-
-        # Add formula rows
-        for formula in formulas:
-            row_cells = table.add_row().cells
-            row_cells[0].text = formula.get("symbol", "")
-            row_cells[1].text = formula.get("description", "")
+        """Add a table showing formulas with LaTeX rendered as images.
+
+        The rows are generated in bulk (see ``app.docx_tables``); each
+        distinct formula is rendered and added to the package once.
+        """
+        from docx.shared import Inches
+
+        self.add_heading(doc, "Công thức và ký hiệu sử dụng", level=2)
 
+        images: Dict[str, Any] = {}
+        rows = []
+        for formula in formulas:
             # Render LaTeX formula as image
             latex_expr = formula.get("latex", "")
+            cell: Any = None
             if latex_expr:
-                try:
-                    image_path = self.latex_renderer.render_to_file(latex_expr)
-                    # Add image to cell
-                    paragraph = row_cells[2].paragraphs[0]
-                    run = paragraph.add_run()
-                    run.add_picture(str(image_path), width=Inches(2.0))
-                except Exception as e:
-                    # Fallback to text if rendering fails
-                    row_cells[2].text = f"${latex_expr}$"
+                if latex_expr not in images:
+                    try:
+                        with span("word.add_picture"):
+                            images[latex_expr] = self._formula_image(
+                                doc.part, latex_expr, width=Inches(2.0)
+                            )
+                    except Exception:
+                        # Fallback to text if rendering fails
+                        images[latex_expr] = f"${latex_expr}$"
+                cell = images[latex_expr]
+                if not isinstance(cell, str):
+                    _IMAGES.inc()
+            rows.append((formula.get("symbol", ""), formula.get("description", ""), cell))
+
+        add_table(
+            doc,
+            rows,
+            header=("Ký hiệu", "Diễn giải", "Biểu thức"),
+            style="Light Grid Accent 1",
+            header_style_id=LABEL_STYLE_ID,
+            images=self._images(doc.part),
+        )
 
         doc.add_paragraph()  # Add spacing
 
@@ -200,48 +578,48 @@ class WordExporter:
         self, doc: Document, activities: List[Dict[str, Any]]
     ) -> None:
         """Add the teaching activities section."""
-        self._add_heading(doc, "Tiến trình dạy học", level=2)
+        self.add_heading(doc, "Tiến trình dạy học", level=2)
 
         for activity in activities:
             # Activity title
             title = activity.get("title", "Hoạt động")
-            self._add_heading(doc, title, level=3)
+            self.add_heading(doc, title, level=3)
 
             # Duration
             if activity.get("duration"):
                 para = doc.add_paragraph()
-                para.add_run("Thời lượng: ").bold = True
+                _add_run(para, "Thời lượng: ", LABEL_STYLE_ID)
                 para.add_run(activity["duration"])
 
             # Goals
             if activity.get("goals"):
                 para = doc.add_paragraph()
-                para.add_run("Mục tiêu hoạt động:").bold = True
+                _add_run(para, "Mục tiêu hoạt động:", LABEL_STYLE_ID)
                 for goal in activity["goals"]:
-                    doc.add_paragraph(goal, style="List Bullet 2")
+                    _add_paragraph(doc, goal, BULLET2_STYLE_ID)
 
             # Steps
             if activity.get("steps"):
                 para = doc.add_paragraph()
-                para.add_run("Tiến trình:").bold = True
+                _add_run(para, "Tiến trình:", LABEL_STYLE_ID)
                 for step in activity["steps"]:
                     actor = step.get("actor", "Giáo viên")
                     content = step.get("content", "")
-                    para = doc.add_paragraph(style="List Bullet 2")
-                    para.add_run(f"{actor}: ").bold = True
+                    para = _add_paragraph(doc, style_id=BULLET2_STYLE_ID)
+                    _add_run(para, f"{actor}: ", LABEL_STYLE_ID)
                     # Process LaTeX in content
-                    self._add_text_with_latex(para, content)
+                    self.add_text_with_latex(para, content)
 
             # Digital assets
             if activity.get("digital_assets"):
                 para = doc.add_paragraph()
-                para.add_run("Học liệu/Bài giảng điện tử:").bold = True
+                _add_run(para, "Học liệu/Bài giảng điện tử:", LABEL_STYLE_ID)
                 for asset in activity["digital_assets"]:
-                    doc.add_paragraph(asset, style="List Bullet 2")
+                    _add_paragraph(doc, asset, BULLET2_STYLE_ID)
 
             doc.add_paragraph()  # Add spacing
 
-    def _add_text_with_latex(
+    def add_text_with_latex(
         self, paragraph, text: str, image_height: float = 0.25
     ) -> None:
         """Add text to an existing paragraph, replacing LaTeX with images.
@@ -254,6 +632,8 @@ class WordExporter:
             text: Text that may contain LaTeX expressions like $...$
             image_height: Height of LaTeX images in inches (default: 0.25)
         """
+        from docx.shared import Inches
+
         matches = list(self._LATEX_PATTERN.finditer(text))
 
         if not matches:
@@ -269,9 +649,12 @@ class WordExporter:
             # Render and add LaTeX image
             latex_expr = match.group(1)
             try:
-                image_path = self.latex_renderer.render_to_file(latex_expr)
-                run = paragraph.add_run()
-                run.add_picture(str(image_path), height=Inches(image_height))
+                with span("word.add_picture"):
+                    image = self._formula_image(
+                        paragraph.part, latex_expr, height=Inches(image_height)
+                    )
+                    self._images(paragraph.part).add_picture(paragraph.add_run(), image)
+                _IMAGES.inc()
             except Exception:
                 paragraph.add_run(f"${latex_expr}$")
 
@@ -284,7 +667,7 @@ class WordExporter:
     def _process_latex_in_text(self, doc: Document, text: str) -> bool:
         """Process text containing LaTeX expressions and add as paragraph with images.
 
-        This is a convenience wrapper around _add_text_with_latex for creating
+        This is a convenience wrapper around add_text_with_latex for creating
         new bullet paragraphs.
 
         Args:
@@ -299,17 +682,46 @@ class WordExporter:
             return False
 
         # Create a paragraph and add text with images
-        para = doc.add_paragraph(style="List Bullet")
-        self._add_text_with_latex(para, text, image_height=0.3)
+        para = _add_paragraph(doc, style_id=BULLET_STYLE_ID)
+        self.add_text_with_latex(para, text, image_height=0.3)
         return True
 
 
-def export_to_word(config: Dict[str, Any], output_path: Path) -> None:
+def export_to_word(
+    config: Dict[str, Any],
+    output_path: Path,
+    compresslevel: Optional[int] = None,
+    formula_format: str = "png",
+    render_pool: Optional[RenderPool] = None,
+) -> None:
     """Convenience function to export a lesson plan configuration to Word.
 
     Args:
         config: Lesson plan configuration dictionary
         output_path: Path where the Word document should be saved
+        compresslevel: zlib level 0-9 for the .docx zip (None: default)
+        formula_format: "png", or "svg" for vector formulas with PNG fallback
+        render_pool: Draw formulas in this pool's worker processes
+    """
+    exporter = WordExporter(formula_format=formula_format, render_pool=render_pool)
+    exporter.export_lesson_plan(config, output_path, compresslevel)
+
+
+def export_to_stream(
+    config: Dict[str, Any], stream: IO[bytes], compresslevel: Optional[int] = None
+) -> int:
+    """Convenience function to write a lesson plan .docx to a binary stream.
+
+    Formula images are taken from the renderer's in-memory cache, so no
+    files are written.
+
+    Args:
+        config: Lesson plan configuration dictionary
+        stream: Writable binary stream (need not be seekable)
+        compresslevel: zlib level 0-9 for the .docx zip (None: default)
+
+    Returns:
+        Number of bytes written
     """
-    exporter = WordExporter()
-    exporter.export_lesson_plan(config, output_path)
+    exporter = WordExporter(in_memory_images=True)
+    return exporter.export_to_stream(config, stream, compresslevel)
@@ -0,0 +1,224 @@
+"""Tests for the benchmark runner's timing and baseline helpers."""
+
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools.benchmark import (
+    BenchmarkResult,
+    MemoryResult,
+    _percentile,
+    calibrate,
+    compare_memory_to_baseline,
+    compare_to_baseline,
+    main,
+    parse_args,
+)
+
+# The cheapest memory case, run by the exit-code tests
+MEMORY_CASE = "Timeseries: from_json_file (10,000 points)"
+
+
+class FakeClock:
+    """perf_counter_ns stand-in; each benchmarked call advances it by ``step``."""
+
+    def __init__(self, step: int) -> None:
+        self.now = 0
+        self.step = step
+        self.calls = 0
+
+    def __call__(self) -> int:
+        return self.now
+
+    def call(self) -> None:
+        self.calls += 1
+        self.now += self.step
+
+
+def _result(name: str, median_ns: float) -> BenchmarkResult:
+    return BenchmarkResult(
+        name=name,
+        iterations=1,
+        repeats=1,
+        median_ns=median_ns,
+        p95_ns=median_ns,
+        stdev_ns=0.0,
+        min_ns=median_ns,
+        mean_ns=median_ns,
+    )
+
+
+class PercentileTests(unittest.TestCase):
+    def test_nearest_rank(self) -> None:
+        samples = [float(i) for i in range(1, 21)]
+        self.assertEqual(_percentile(samples, 0.95), 19.0)
+        self.assertEqual(_percentile(samples, 0.5), 10.0)
+        self.assertEqual(_percentile(samples, 1.0), 20.0)
+
+    def test_small_samples(self) -> None:
+        self.assertEqual(_percentile([7.0], 0.95), 7.0)
+        self.assertEqual(_percentile([1.0, 2.0, 3.0], 0.0), 1.0)
+        self.assertEqual(_percentile([1.0, 2.0, 3.0], 0.95), 3.0)
+
+
+class CalibrateTests(unittest.TestCase):
+    def test_reaches_min_time(self) -> None:
+        clock = FakeClock(step=1_000)
+        with mock.patch("tools.benchmark.time.perf_counter_ns", clock):
+            iterations = calibrate(clock.call, min_time=0.001)
+        # 1 ms at 1 µs per call needs at least 1000 calls, without overshooting 10x
+        self.assertGreaterEqual(iterations, 1_000)
+        self.assertLess(iterations, 10_000)
+
+    def test_slow_call_needs_one_iteration(self) -> None:
+        clock = FakeClock(step=10_000_000)
+        with mock.patch("tools.benchmark.time.perf_counter_ns", clock):
+            self.assertEqual(calibrate(clock.call, min_time=0.001), 1)
+        self.assertEqual(clock.calls, 1)
+
+    def test_capped_by_max_iterations(self) -> None:
+        clock = FakeClock(step=0)
+        with mock.patch("tools.benchmark.time.perf_counter_ns", clock):
+            self.assertEqual(calibrate(clock.call, min_time=1.0, max_iterations=500), 500)
+
+
+class CompareToBaselineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.baseline = {
+            "results": [
+                {"name": "fast", "median_ns": 100.0},
+                {"name": "slow", "median_ns": 1_000.0},
+                {"name": "zero", "median_ns": 0.0},
+            ]
+        }
+
+    def test_within_threshold_passes(self) -> None:
+        results = [_result("fast", 110.0), _result("slow", 800.0)]
+        self.assertEqual(compare_to_baseline(results, self.baseline, 0.10), [])
+
+    def test_regression_reported(self) -> None:
+        results = [_result("fast", 100.0), _result("slow", 1_250.0)]
+        regressions = compare_to_baseline(results, self.baseline, 0.10)
+        self.assertEqual(regressions, [("slow", 1_000.0, 1_250.0, 1.25)])
+        self.assertEqual(compare_to_baseline(results, self.baseline, 0.30), [])
+
+    def test_missing_keys_skipped(self) -> None:
+        results = [_result("new", 5_000.0), _result("zero", 5_000.0)]
+        self.assertEqual(compare_to_baseline(results, self.baseline, 0.10), [])
+        self.assertEqual(compare_to_baseline(results, {}, 0.10), [])
+
+
+def _memory(name: str, peak_bytes: int) -> MemoryResult:
+    return MemoryResult(
+        name=name,
+        peak_bytes=peak_bytes,
+        retained_bytes=0,
+        blocks_delta=0,
+        rss_delta_bytes=0,
+        elapsed_ns=0,
+    )
+
+
+class CompareMemoryToBaselineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.baseline = {
+            "memory": [
+                {"name": "load", "peak_bytes": 1_000},
+                {"name": "export", "peak_bytes": 0},
+            ]
+        }
+
+    def test_threshold(self) -> None:
+        self.assertEqual(
+            compare_memory_to_baseline([_memory("load", 1_100)], self.baseline, 0.10), []
+        )
+        self.assertEqual(
+            compare_memory_to_baseline([_memory("load", 1_101)], self.baseline, 0.10),
+            [("load", 1_000, 1_101, 1.101)],
+        )
+        self.assertEqual(
+            compare_memory_to_baseline([_memory("load", 1_500)], self.baseline, 0.50), []
+        )
+        self.assertEqual(
+            compare_memory_to_baseline([_memory("load", 500)], self.baseline, 0.0), []
+        )
+
+    def test_missing_or_zero_baseline_skipped(self) -> None:
+        results = [_memory("new", 10**9), _memory("export", 10**9)]
+        self.assertEqual(compare_memory_to_baseline(results, self.baseline, 0.10), [])
+        # Timing-only baselines have no "memory" entries
+        self.assertEqual(compare_memory_to_baseline(results, {"results": []}, 0.10), [])
+
+
+class MemoryExitCodeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+        self.baseline = self.test_dir / "baseline.json"
+
+    def _main(self, *argv: str) -> tuple:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            code = main(
+                [
+                    "--memory",
+                    "--no-timing",
+                    "-q",
+                    "-k",
+                    MEMORY_CASE,
+                    "--baseline",
+                    str(self.baseline),
+                    *argv,
+                ]
+            )
+        return code, stdout.getvalue()
+
+    def _write_peak(self, peak_bytes: int) -> None:
+        report = json.loads(self.baseline.read_text(encoding="utf-8"))
+        report["memory"][0]["peak_bytes"] = peak_bytes
+        self.baseline.write_text(json.dumps(report), encoding="utf-8")
+
+    def test_exit_code(self) -> None:
+        code, output = self._main()
+        self.assertEqual(code, 0)
+        self.assertIn("Baseline written", output)
+        report = json.loads(self.baseline.read_text(encoding="utf-8"))
+        self.assertEqual([entry["name"] for entry in report["memory"]], [MEMORY_CASE])
+
+        self._write_peak(10**12)
+        code, output = self._main()
+        self.assertEqual(code, 0)
+        self.assertIn("No regressions", output)
+
+        self._write_peak(1)
+        code, output = self._main()
+        self.assertEqual(code, 1)
+        self.assertIn("Memory regressions", output)
+        self.assertIn(MEMORY_CASE, output)
+
+        # A regression is overwritten, not reported, when updating the baseline
+        code, output = self._main("--update-baseline")
+        self.assertEqual(code, 0)
+        report = json.loads(self.baseline.read_text(encoding="utf-8"))
+        self.assertGreater(report["memory"][0]["peak_bytes"], 1)
+
+
+class ParseArgsTests(unittest.TestCase):
+    def test_update_baseline_requires_baseline(self) -> None:
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(SystemExit) as caught:
+                parse_args(["--update-baseline"])
+        self.assertEqual(caught.exception.code, 2)
+        self.assertIn("--update-baseline requires --baseline", stderr.getvalue())
+
+        args = parse_args(["--update-baseline", "--baseline", "base.json"])
+        self.assertTrue(args.update_baseline)
+
+
+if __name__ == "__main__":
+    unittest.main()
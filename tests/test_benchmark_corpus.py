@@ -0,0 +1,83 @@
+"""Tests for the synthetic lesson-plan corpus."""
+
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from tools.benchmark_corpus import (
+    SCALES,
+    CorpusSpec,
+    generate_lesson_plan,
+    main,
+    write_corpus,
+)
+
+
+class CorpusDeterminismTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+
+    def test_same_seed_same_plan(self) -> None:
+        spec = CorpusSpec(activities=5, steps=3, formulas=12, duplicate_ratio=0.5, seed=7)
+        self.assertEqual(generate_lesson_plan(spec), generate_lesson_plan(spec))
+        other = CorpusSpec(activities=5, steps=3, formulas=12, duplicate_ratio=0.5, seed=8)
+        self.assertNotEqual(generate_lesson_plan(spec), generate_lesson_plan(other))
+
+    def test_write_corpus_twice_is_identical(self) -> None:
+        first = write_corpus(self.test_dir / "first")
+        second = write_corpus(self.test_dir / "second")
+
+        self.assertEqual([p.name for p in first], [p.name for p in second])
+        for label, spec, _ in SCALES:
+            with self.subTest(label=label):
+                names = {
+                    f"corpus_{label}.json",
+                    f"corpus_{label}_lesson_planner.json",
+                    f"corpus_{label}.spec.json",
+                }
+                for name in names:
+                    self.assertEqual(
+                        (self.test_dir / "first" / name).read_bytes(),
+                        (self.test_dir / "second" / name).read_bytes(),
+                    )
+                written = json.loads(
+                    (self.test_dir / "first" / f"corpus_{label}.spec.json").read_text(
+                        encoding="utf-8"
+                    )
+                )
+                self.assertEqual(CorpusSpec(**written), spec)
+
+        # Every file of the layout is accounted for, and only the plans are returned
+        on_disk = sorted(p.name for p in (self.test_dir / "first").iterdir())
+        self.assertEqual(len(on_disk), 3 * len(SCALES))
+        self.assertEqual(len(first), 2 * len(SCALES))
+        self.assertFalse(any(p.name.endswith(".spec.json") for p in first))
+
+    def test_plan_matches_spec(self) -> None:
+        spec = CorpusSpec(activities=3, steps=2, bullets=4, formulas=6)
+        config = generate_lesson_plan(spec)
+
+        self.assertEqual(len(config["activities"]), 3)
+        self.assertTrue(all(len(a["steps"]) == 2 for a in config["activities"]))
+        self.assertEqual(len(config["objectives"]), 4)
+        self.assertEqual(len(config["formulas"]), 3)
+        steps = " ".join(s["content"] for a in config["activities"] for s in a["steps"])
+        self.assertEqual(steps.count("Áp dụng $"), 3)
+
+    def test_main_writes_corpus(self) -> None:
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(main(["--write-corpus", str(self.test_dir / "cli")]), 0)
+        self.assertIn("corpus_S.json", stdout.getvalue())
+        self.assertEqual(
+            (self.test_dir / "cli" / "corpus_M.json").read_bytes(),
+            write_corpus(self.test_dir / "api")[2].read_bytes(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
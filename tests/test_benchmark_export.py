@@ -0,0 +1,104 @@
+"""Tests for the export benchmark cases."""
+
+import io
+import unittest
+
+from tools.benchmark_export import (
+    EXPORT_BENCHMARKS,
+    FORMULA_TEMPLATES,
+    PROXY_TABLE_ROWS,
+    TABLE_ROWS,
+    _WORK_DIR,
+    _export_case,
+    _table_case,
+    make_formula,
+    make_formula_config,
+    make_table_formulas,
+    proxy_formulas_table,
+)
+
+
+def _table_contents(table) -> list:
+    """Cell texts and embedded image count of each row."""
+    return [
+        ([cell.text for cell in row.cells], len(row._tr.xpath(".//pic:pic")))
+        for row in table.rows
+    ]
+
+
+class CaseBuilderTests(unittest.TestCase):
+    def test_formulas_unique_per_index(self) -> None:
+        formulas = [make_formula(i) for i in range(3 * len(FORMULA_TEMPLATES))]
+        self.assertEqual(len(set(formulas)), len(formulas))
+        self.assertEqual(make_formula(7), make_formula(7))
+        self.assertEqual(make_formula(0), "F_{0} = m a")
+
+    def test_config_splits_table_and_inline_formulas(self) -> None:
+        config = make_formula_config(10, offset=100)
+        table = [row["latex"] for row in config["formulas"]]
+        objectives = config["objectives"]
+        steps = [step["content"] for step in config["activities"][0]["steps"]]
+
+        self.assertEqual(table, [make_formula(100 + i) for i in range(5)])
+        self.assertEqual(len(objectives) + len(steps), 5)
+        inline = objectives + steps
+        for formula in (make_formula(100 + i) for i in range(5, 10)):
+            self.assertEqual(sum(f"${formula}$" in text for text in inline), 1)
+        self.assertEqual(make_formula_config(0)["formulas"], [])
+
+    def test_table_formulas_cycle(self) -> None:
+        rows = make_table_formulas(45, distinct=20)
+        self.assertEqual(len(rows), 45)
+        self.assertEqual(len({row["latex"] for row in rows}), 20)
+        self.assertEqual(rows[20]["latex"], rows[0]["latex"])
+        self.assertEqual(rows[44]["symbol"], "K44")
+
+    def test_case_settings(self) -> None:
+        warm = _export_case(100, cold=False)
+        cold = _export_case(100, cold=True)
+        self.assertEqual(warm.name, "Word: export 100 formulas (warm cache)")
+        self.assertEqual((warm.iterations, warm.repeats, warm.items), (None, None, 100))
+        self.assertEqual((cold.iterations, cold.repeats), (1, 3))
+        self.assertEqual(_export_case(0, cold=False).items, 1)
+
+        self.assertEqual(_table_case(100, bulk=True).iterations, None)
+        large = _table_case(1000, bulk=False)
+        self.assertEqual(large.name, "Word: formulas table 1000 rows (python-docx rows)")
+        self.assertEqual((large.iterations, large.repeats, large.items), (1, 3, 1000))
+
+    def test_suite_names_unique(self) -> None:
+        names = [case.name for case in EXPORT_BENCHMARKS]
+        self.assertEqual(len(names), len(set(names)))
+        for rows in TABLE_ROWS:
+            self.assertIn(f"Word: formulas table {rows} rows (bulk)", names)
+        for rows in PROXY_TABLE_ROWS:
+            self.assertIn(f"Word: formulas table {rows} rows (python-docx rows)", names)
+
+
+class BulkTableBaselineTests(unittest.TestCase):
+    """The bulk table builder is measured against the row-by-row reference."""
+
+    def test_bulk_matches_row_by_row_reference(self) -> None:
+        formulas = make_table_formulas(30, distinct=4)
+        case = _table_case(30, bulk=True)
+        exporter = case.setup()
+
+        bulk = exporter.new_document()
+        exporter._add_formulas_table(bulk, formulas)
+        reference = exporter.new_document()
+        proxy_formulas_table(exporter, reference, formulas)
+
+        self.assertEqual(_table_contents(bulk.tables[0]), _table_contents(reference.tables[0]))
+        for doc in (bulk, reference):
+            doc.save(io.BytesIO())
+
+    def test_cases_run(self) -> None:
+        for bulk in (True, False):
+            with self.subTest(bulk=bulk):
+                case = _table_case(5, bulk=bulk)
+                case.func(case.setup())
+        self.assertTrue(_WORK_DIR.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.cli import COMMANDS, completion_script, load_command, main
+
+
+class CliTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_registry_targets_resolve(self) -> None:
+        for name in COMMANDS:
+            with self.subTest(command=name):
+                self.assertTrue(callable(load_command(name)))
+
+    def test_dispatches_arguments_to_subcommand(self) -> None:
+        output = self.test_dir / "data.json"
+        with contextlib.redirect_stdout(io.StringIO()):
+            code = main(["timeseries", "create-sample", str(output), "--num-points", "5"])
+
+        self.assertEqual(code, 0)
+        self.assertTrue(output.exists())
+
+    def test_help_and_unknown_command(self) -> None:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(main(["--help"]), 0)
+        for name in COMMANDS:
+            self.assertIn(name, stdout.getvalue())
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["unknown"]), 2)
+
+    def test_completion_scripts(self) -> None:
+        bash = completion_script("bash")
+        self.assertIn("complete -o filenames -F _khtn khtn", bash)
+        self.assertIn("validate-all", bash)
+        self.assertIn("bashcompinit", completion_script("zsh"))
+        self.assertIn("__fish_use_subcommand", completion_script("fish"))
+        with self.assertRaises(ValueError):
+            completion_script("powershell")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Tests for the .docx size optimizer."""
+
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import docx
+from docx.shared import Inches
+from PIL import Image
+
+from app.docx_optimizer import display_sizes, main, optimize_docx, optimize_png
+from app.word_exporter import WordExporter
+
+
+class OptimizePngTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.renderer = WordExporter(output_dir=self.test_dir).latex_renderer
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_glyph_image_becomes_small_palette_png(self) -> None:
+        data = self.renderer.render_to_bytes(r"I = \dfrac{P}{4\pi r^2}")
+        optimized = optimize_png(data, display_size=(Inches(0.5), Inches(0.25)), dpi=200)
+
+        image = Image.open(io.BytesIO(optimized))
+        self.assertEqual(image.mode, "P")
+        # 378x261 source: the 100 px display width needs more than the 50 px height
+        self.assertEqual(image.size, (100, 69))
+        self.assertNotIn("Software", image.info)
+        self.assertLess(len(optimized), len(data) / 3)
+        alpha = image.convert("RGBA").getchannel("A")
+        self.assertEqual(alpha.getextrema(), (0, 255))
+
+    def test_photo_keeps_colours_and_is_never_upscaled(self) -> None:
+        photo = Image.new("RGB", (40, 20))
+        photo.putdata([(x * 6, y * 12, 100) for y in range(20) for x in range(40)])
+        buffer = io.BytesIO()
+        photo.save(buffer, format="PNG")
+
+        optimized = optimize_png(buffer.getvalue(), display_size=(Inches(4), Inches(2)))
+
+        image = Image.open(io.BytesIO(optimized))
+        self.assertEqual(image.size, (40, 20))
+        self.assertEqual(image.convert("RGB").getpixel((39, 19)), (234, 228, 100))
+
+
+class OptimizeDocxTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        config = {
+            "metadata": {"title": "Định luật II Newton"},
+            "objectives": ["Vận dụng $F = ma$"],
+            "formulas": [{"symbol": "F", "description": "Lực", "latex": "F = ma"}],
+        }
+        self.source = self.test_dir / "lesson.docx"
+        # Oversampled 300-dpi images, as exported before display-size rendering
+        exporter = WordExporter(output_dir=self.test_dir, formula_dpi=None)
+        exporter.export_lesson_plan(config, self.source)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_display_sizes_take_largest_use(self) -> None:
+        with zipfile.ZipFile(self.source) as archive:
+            parts = {name: archive.read(name) for name in archive.namelist()}
+
+        sizes = display_sizes(parts)
+
+        # F = ma appears inline (0.25 in high) and in the table (2 in wide)
+        (size,) = sizes.values()
+        self.assertEqual(size[0], Inches(2.0))
+
+    def test_optimized_document_is_smaller_and_intact(self) -> None:
+        target = self.test_dir / "optimized.docx"
+        report = optimize_docx(self.source, target)
+
+        self.assertEqual(report.optimized_bytes, target.stat().st_size)
+        self.assertLess(report.optimized_bytes, report.original_bytes)
+        self.assertEqual(report.images, 1)
+        self.assertLess(report.image_bytes_after, report.image_bytes_before)
+        self.assertGreater(report.styles_removed, 50)
+
+        original, optimized = docx.Document(self.source), docx.Document(target)
+        self.assertEqual(
+            [p.text for p in original.paragraphs], [p.text for p in optimized.paragraphs]
+        )
+        self.assertEqual(len(optimized.inline_shapes), 2)
+        style_ids = {style.style_id for style in optimized.styles}
+        for used in ("Normal", "Heading2", "LessonTitle", "Strong", "ListBullet", "LightGrid-Accent1"):
+            self.assertIn(used, style_ids)
+        with zipfile.ZipFile(target) as archive:
+            self.assertEqual(archive.namelist()[0], "[Content_Types].xml")
+
+    def test_in_place_and_report_only(self) -> None:
+        size = self.source.stat().st_size
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(main([str(self.test_dir)]), 0)
+        self.assertEqual(self.source.stat().st_size, size)
+        self.assertIn("lesson.docx", stdout.getvalue())
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main([str(self.source), "--in-place"]), 0)
+        self.assertLess(self.source.stat().st_size, size)
+
+    def test_output_dir_keeps_folders_apart(self) -> None:
+        for folder in ("GiaoAn", "TaiLieu"):
+            (self.test_dir / folder).mkdir()
+            shutil.copy(self.source, self.test_dir / folder / "bai1.docx")
+        out = self.test_dir / "out"
+        with contextlib.redirect_stdout(io.StringIO()):
+            code = main(
+                [str(self.test_dir / "GiaoAn"), str(self.test_dir / "TaiLieu"), "-o", str(out)]
+            )
+        self.assertEqual(code, 0)
+        self.assertTrue((out / "GiaoAn" / "bai1.docx").is_file())
+        self.assertTrue((out / "TaiLieu" / "bai1.docx").is_file())
+
+        # Same-named files given directly would overwrite each other
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+            code = main(
+                [
+                    str(self.test_dir / "GiaoAn" / "bai1.docx"),
+                    str(self.test_dir / "TaiLieu" / "bai1.docx"),
+                    "-o",
+                    str(self.test_dir / "flat"),
+                ]
+            )
+        self.assertEqual(code, 1)
+        self.assertIn("Bỏ qua", stderr.getvalue())
+        self.assertEqual([p.name for p in (self.test_dir / "flat").iterdir()], ["bai1.docx"])
+
+
+if __name__ == "__main__":
+    unittest.main()
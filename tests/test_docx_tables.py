@@ -0,0 +1,122 @@
+"""Tests for bulk Word table construction."""
+
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import docx
+from docx.shared import Inches
+
+from app.docx_tables import ImageRegistry, add_table
+from app.latex_renderer import LatexRenderer
+
+
+class AddTableTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.renderer = LatexRenderer(output_dir=self.test_dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _reopen(self, doc):
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        buffer.seek(0)
+        return docx.Document(buffer)
+
+    def test_text_cells_round_trip(self) -> None:
+        doc = docx.Document()
+        rows = [("a < b & c", " lề ", None), ("tab\there", "hai\ndòng", "x")]
+
+        table = add_table(doc, rows, header=("A", "B", "C"), style="Light Grid Accent 1",
+                          header_style_id="Strong")
+
+        self.assertEqual(len(table.rows), 3)
+        reopened = self._reopen(doc).tables[0]
+        self.assertEqual(reopened.style.name, "Light Grid Accent 1")
+        self.assertEqual([c.text for c in reopened.rows[0].cells], ["A", "B", "C"])
+        self.assertEqual(reopened.rows[0].cells[0].paragraphs[0].runs[0].style.name, "Strong")
+        self.assertEqual(
+            [c.text for c in reopened.rows[1].cells], ["a < b & c", " lề ", ""]
+        )
+        self.assertEqual([c.text for c in reopened.rows[2].cells], ["tab\there", "hai\ndòng", "x"])
+
+    def test_images_share_parts_and_get_unique_ids(self) -> None:
+        doc = docx.Document()
+        doc.add_picture(io.BytesIO(self.renderer.render_to_bytes("y = x")))
+        registry = ImageRegistry(doc.part)
+        image = registry.image("F", lambda: self.renderer.render("F = ma"), width=Inches(2))
+        # Same bytes under another key share the image part
+        again = registry.image("F2", lambda: self.renderer.render("F = ma"), width=Inches(2))
+        self.assertEqual(image, again)
+        self.assertEqual(image.cx, Inches(2))
+        self.assertTrue(image.rel_id)
+
+        add_table(doc, [("F", image), ("F", image)], images=registry)
+
+        reopened = self._reopen(doc)
+        self.assertEqual(len(reopened.inline_shapes), 3)
+        media = {p.partname for p in reopened.part.package.parts if "media" in p.partname}
+        self.assertEqual(len(media), 2)
+        ids = reopened.element.body.xpath(".//wp:docPr/@id")
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+    def test_registry_matches_python_docx_sizes(self) -> None:
+        doc = docx.Document()
+        registry = ImageRegistry(doc.part)
+        rendered = self.renderer.render("a^2 + b^2 = c^2")
+        loads = []
+
+        def load():
+            loads.append(1)
+            return rendered
+
+        image = registry.image("pythagoras", load, height=Inches(0.25))
+        self.assertIs(registry.image("pythagoras", load, height=Inches(0.25)), image)
+        self.assertEqual(len(loads), 1)
+
+        rel_id, expected = doc.part.get_or_add_image(io.BytesIO(rendered.data))
+        cx, cy = expected.scaled_dimensions(None, Inches(0.25))
+        self.assertEqual((image.rel_id, image.cx, image.cy), (rel_id, cx, cy))
+
+        registry.add_picture(doc.add_paragraph().add_run(), image)
+        doc.add_picture(io.BytesIO(rendered.data))
+        registry.invalidate()
+        add_table(doc, [("c", image)], images=registry)
+
+        reopened = self._reopen(doc)
+        self.assertEqual(len(reopened.inline_shapes), 3)
+        self.assertEqual(len(reopened.part.package.image_parts), 1)
+        ids = reopened.element.body.xpath(".//wp:docPr/@id")
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+    def test_svg_with_png_fallback(self) -> None:
+        doc = docx.Document()
+        registry = ImageRegistry(doc.part)
+        image = registry.image(
+            "E",
+            lambda: self.renderer.render("E = mc^2"),
+            height=Inches(0.25),
+            load_svg=lambda: self.renderer.render("E = mc^2", image_format="svg"),
+        )
+        registry.add_picture(doc.add_paragraph().add_run(), image)
+        add_table(doc, [("E", image)], images=registry)
+
+        reopened = self._reopen(doc)
+        body = reopened.element.body
+        svg_ids = body.xpath(".//a:blip//*[local-name()='svgBlip']/@r:embed")
+        self.assertEqual(svg_ids, [image.svg_rel_id] * 2)
+        self.assertEqual(body.xpath(".//a:blip/@r:embed"), [image.rel_id] * 2)
+        svg_part = reopened.part.related_parts[image.svg_rel_id]
+        self.assertEqual(svg_part.content_type, "image/svg+xml")
+        self.assertEqual(svg_part.partname.ext, "svg")
+        self.assertEqual(len(reopened.inline_shapes), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
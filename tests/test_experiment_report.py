@@ -0,0 +1,121 @@
+"""Tests for experiment report generation."""
+
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+
+from app.experiment_report import (
+    ExperimentReport,
+    compute_statistics,
+    decimate,
+    generate_report,
+    render_chart,
+)
+from app.timeseries_data import create_sample_timeseries
+
+
+class ComputeStatisticsTests(unittest.TestCase):
+    def test_linear_heating(self):
+        """Sample data heats by 2.5 °C per sample at 1 Hz."""
+        data = create_sample_timeseries("Test", "Device", 1.0, 10)
+
+        stats = compute_statistics(data)
+
+        self.assertEqual(stats.count, 10)
+        self.assertEqual(stats.min_C, 25.0)
+        self.assertEqual(stats.max_C, 47.5)
+        self.assertAlmostEqual(stats.slope_C_per_s, 2.5)
+        self.assertAlmostEqual(stats.intercept_C, 25.0)
+        self.assertAlmostEqual(stats.r_squared, 1.0)
+        self.assertIn("2.500", stats.fitted_model_latex())
+
+    def test_noisy_fit(self):
+        data = create_sample_timeseries("Test", "Device", 1.0, 4)
+        for point, temp in zip(data.timeseries, [1.0, 3.0, 2.0, 5.0]):
+            point.temp_C = temp
+        data.invalidate_cache()
+
+        stats = compute_statistics(data)
+
+        self.assertAlmostEqual(stats.slope_C_per_s, 1.1)
+        self.assertAlmostEqual(stats.intercept_C, 1.1)
+        self.assertAlmostEqual(stats.r_squared, 30.25 / 43.75)
+
+    def test_empty_timeseries_raises_error(self):
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        data.timeseries.clear()
+
+        with self.assertRaises(ValueError):
+            compute_statistics(data)
+
+
+class DecimateTests(unittest.TestCase):
+    def test_short_series_unchanged(self):
+        times, values = decimate([0, 1, 2], [5, 6, 7], max_points=10)
+        self.assertEqual(values, [5, 6, 7])
+
+    def test_keeps_spikes(self):
+        times = list(range(1000))
+        values = [20.0] * 1000
+        values[537] = 85.0
+
+        out_t, out_v = decimate(times, values, max_points=100)
+
+        self.assertLessEqual(len(out_v), 100)
+        self.assertIn(85.0, out_v)
+        self.assertEqual(out_t, sorted(out_t))
+
+
+class ExperimentReportTests(unittest.TestCase):
+    def setUp(self):
+        """Create a temporary directory for test outputs."""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        if self.test_dir.exists():
+            shutil.rmtree(self.test_dir)
+
+    def test_chart_cached_by_content(self):
+        """Identical data reuses the chart file instead of drawing it again."""
+        data = create_sample_timeseries("Test", "Device", 1.0, 10)
+        path1 = render_chart(data, self.test_dir)
+        mtime1 = path1.stat().st_mtime_ns
+
+        same = create_sample_timeseries("Test", "Device", 1.0, 10)
+        path2 = render_chart(same, self.test_dir)
+
+        self.assertEqual(path1, path2)
+        self.assertEqual(mtime1, path2.stat().st_mtime_ns)
+
+        other = create_sample_timeseries("Test", "Device", 1.0, 12)
+        self.assertNotEqual(path1, render_chart(other, self.test_dir))
+
+    def test_markdown_report(self):
+        data = create_sample_timeseries("Đun nước", "DS18B20", 1.0, 10)
+        output_path = self.test_dir / "report.md"
+
+        ExperimentReport(output_dir=self.test_dir).export_markdown([data], output_path)
+
+        markdown = output_path.read_text(encoding="utf-8")
+        self.assertIn("## 1. Đun nước", markdown)
+        self.assertIn("Thiết bị | DS18B20", markdown)
+        self.assertIn("$$T(t) =", markdown)
+        self.assertIn("](charts/chart_", markdown)
+
+    def test_docx_report_from_files(self):
+        input_path = self.test_dir / "data.json"
+        create_sample_timeseries("Test", "Device", 1.0, 20).save(input_path)
+        output_path = self.test_dir / "report.docx"
+
+        generate_report([input_path, input_path], output_path, end_s=10.0)
+
+        self.assertTrue(output_path.exists())
+        self.assertGreater(output_path.stat().st_size, 5000)
+        # Both experiments share one window, so only one chart is drawn
+        self.assertEqual(len(list((self.test_dir / "charts").glob("*.png"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Tests for the formula syntax pre-check and the lint command."""
+
+import contextlib
+import io
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from matplotlib import _mathtext
+from matplotlib.mathtext import MathTextParser
+
+from app.latex_lint import _mathtext_tables, check_syntax, collect_formulas, main
+from app.latex_renderer import LatexRenderer
+
+VALID = [
+    r"I = \dfrac{P}{4\pi r^2}",
+    r"C\% = \frac{m_{ct}}{m_{dd}} \times 100\%",
+    r"\sqrt[3]{x^2 + y_1}",
+    r"\left( \frac{a}{b} \right)^2 + \left\{ x \right.",
+    r"\alpha = 1.6 \times 10^{-5}\,\text{K}^{-1}",
+    r"\text{100% {ok}}",
+    r"\mathrm{d}x + \hat x + \^a + \operatorname{sin} x",
+    r"\int_0^1 f(x)\,dx \quad x'' \ne y",
+    "Zn + Fe^{2+} → Zn^{2+} + Fe",
+    # A script followed by whitespace takes the whitespace as its argument
+    "x ^ 2 ^ 3",
+    "x^ 2^3",
+    "x _ 1 _ 2",
+]
+
+INVALID = {
+    r"\frac{a}{b": "Unbalanced '{'",
+    "a}": "Unbalanced '}'",
+    r"a \le b": r"Unknown command \le",
+    r"\ce{Fe + O2}": r"Unknown command \ce",
+    "C% = 5": "Unescaped '%' (write \\%)",
+    r"a \& b": r"Unknown command \&",
+    r"\frac a b": r"\frac needs 2 braced arguments",
+    r"\frac{}{b}": r"Empty argument of \frac",
+    r"\sqrt x": r"\sqrt needs 1 braced argument",
+    r"\mathrm x": r"\mathrm must be followed by a braced group",
+    "x^": "Missing argument after '^'",
+    "{x_}": "Missing argument after '_'",
+    "x^2^3": "Double superscript",
+    "x^2 ^ 3": "Double superscript",
+    "x^ ^2": "Double superscript",
+    r"\left( x": r"\left without \right",
+    r"x \right)": r"\right without \left",
+    r"\left x \right)": r"\left must be followed by a delimiter",
+    r"\hat": r"Missing argument after \hat",
+}
+
+
+class CheckSyntaxTests(unittest.TestCase):
+    def test_valid_expressions_pass(self) -> None:
+        for expr in VALID:
+            with self.subTest(expr=expr):
+                self.assertIsNone(check_syntax(expr))
+
+    def test_errors_are_described(self) -> None:
+        for expr, message in INVALID.items():
+            with self.subTest(expr=expr):
+                self.assertEqual(check_syntax(expr), message)
+
+    def test_spaced_scripts_follow_mathtext_grouping(self) -> None:
+        """A spaced formula mathtext draws must not become a cached failure."""
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir, ignore_errors=True)
+        self.assertIsNone(check_syntax("x ^ 2 ^ 3"))
+        renderer = LatexRenderer(output_dir=test_dir)
+        self.assertTrue(renderer.render_to_bytes("x ^ 2 ^ 3").startswith(b"\x89PNG"))
+        self.assertEqual(renderer.failures.failures, {})
+
+    def test_skipped_without_mathtext_tables(self) -> None:
+        """A Matplotlib without the private tables must not break rendering."""
+        self.addCleanup(_mathtext_tables.cache_clear)
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir, ignore_errors=True)
+
+        _mathtext_tables.cache_clear()
+        with mock.patch.dict(sys.modules, {"matplotlib._mathtext_data": None}):
+            self.assertIsNone(check_syntax(r"a \le b"))
+            renderer = LatexRenderer(output_dir=test_dir)
+            self.assertTrue(renderer.render_to_bytes("F = ma").startswith(b"\x89PNG"))
+            with self.assertRaisesRegex(ValueError, r"Unknown symbol: \\le"):
+                renderer.render_to_bytes(r"a \le b")
+
+        _mathtext_tables.cache_clear()
+        with mock.patch.object(_mathtext, "Parser", type("Parser", (), {})):
+            self.assertIsNone(check_syntax(r"a \le b"))
+
+        _mathtext_tables.cache_clear()
+        self.assertEqual(check_syntax(r"a \le b"), r"Unknown command \le")
+
+    def test_agrees_with_mathtext(self) -> None:
+        """Everything the pre-check rejects, mathtext must reject too."""
+        parser = MathTextParser("path")
+        for expr in VALID:
+            with self.subTest(expr=expr):
+                parser.parse(f"${expr}$")
+        for expr in INVALID:
+            with self.subTest(expr=expr):
+                with self.assertRaises(ValueError):
+                    parser.parse(f"${expr}$")
+
+
+class LintCommandTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        config = {
+            "objectives": ["Vận dụng $F = ma$ và $a \\le b$"],
+            "formulas": [{"symbol": "x", "latex": "x_1^2_3"}, {"symbol": "F", "latex": "F = ma"}],
+        }
+        (self.test_dir / "lesson.json").write_text(json.dumps(config), encoding="utf-8")
+        (self.test_dir / "notes.md").write_text("Dòng 1\nCông thức $\\frac{a}{b$\n", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_formulas_are_located(self) -> None:
+        found = [(f.path.name, f.where, f.latex) for f in collect_formulas([self.test_dir])]
+        self.assertEqual(
+            found,
+            [
+                ("lesson.json", "objectives[0]", "F = ma"),
+                ("lesson.json", "objectives[0]", r"a \le b"),
+                ("lesson.json", "formulas[0].latex", "x_1^2_3"),
+                ("lesson.json", "formulas[1].latex", "F = ma"),
+                ("notes.md", "line 2", r"\frac{a}{b"),
+            ],
+        )
+
+    def test_report_and_exit_status(self) -> None:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(main([str(self.test_dir)]), 1)
+        output = stdout.getvalue()
+        self.assertIn(r"Unknown command \le", output)
+        self.assertIn("notes.md (line 2)", output)
+        self.assertIn("2/5", output)
+
+        # Rendering finds the double subscript the pre-check lets through
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main([str(self.test_dir), "--render", "--output-dir", str(self.test_dir / "out")])
+        self.assertIn("Double subscript", stdout.getvalue())
+        self.assertIn("3/5", stdout.getvalue())
+
+        (self.test_dir / "clean.md").write_text("$F = ma$\n", encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main([str(self.test_dir / "clean.md")]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
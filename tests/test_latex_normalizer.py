@@ -0,0 +1,110 @@
+"""Tests for canonical LaTeX cache keys."""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.latex_normalizer import SYNONYMS, normalize, tokenize
+from app.latex_renderer import LatexRenderer
+
+# Canonical spelling -> other spellings that must share its key (and image)
+EQUIVALENT = {
+    "F=ma": ["F = ma", "  F  =  m a ", "F=m  a"],
+    "x^2+y_i": ["x^2 + y_i", "x ^2+ y _i"],
+    r"x^{2}+y_{i}": ["x^{{2}} + y_{ i }", "x^{2}+y_{{{i}}}"],
+    r"\sum_{i=1}^ni": [r"\sum_{i = 1}^n i", r"\sum _{i=1} ^n i"],
+    r"\alpha x": [r"\alpha   x", r"\alpha x  "],
+    r"\frac{a}{b}": [r"\frac {a} {b}", r"\frac{{a}}{ b }"],
+    "{a}b": ["{{a}}b", "{ {a} } b"],
+    "{{a}}^2": ["{ {a} }^2", "{{a}} ^2"],
+    r"a\to b\ne c": [r"a \rightarrow b \neq c"],
+    r"\left\{x\right\}": [r"\left\lbrace x \right\rbrace"],
+}
+
+
+class NormalizeTests(unittest.TestCase):
+    def test_tokenize_round_trips(self) -> None:
+        expr = r"I = \dfrac{P}{4\pi r^2}\,\text{W} \{ a \}"
+        tokens = tokenize(expr)
+        self.assertEqual("".join(tokens), expr)
+        self.assertIn(r"\dfrac", tokens)
+        self.assertIn(r"\,", tokens)
+        self.assertIn(r"\{", tokens)
+
+    def test_equivalent_spellings(self) -> None:
+        for canonical, spellings in EQUIVALENT.items():
+            for spelling in [canonical] + spellings:
+                with self.subTest(spelling=spelling):
+                    self.assertEqual(normalize(spelling), canonical)
+
+    def test_meaningful_differences_are_kept(self) -> None:
+        distinct = [
+            (r"\frac{a}{b}", r"\dfrac{a}{b}"),
+            (r"\text{a b}", r"\text{ab}"),
+            ("x^ 2", "x^2"),
+            ("a{+}b", "a+b"),
+            ("{a}{b}", "ab"),
+            ("x^2", "x^{2}"),
+            (r"\sum_{i=1}^n i", r"\sum_{i=1}^{n} i"),
+            (r"\prod_k^n", r"\prod_{k}^{n}"),
+            ("{{a}}^2", "{a}^2"),
+            ("{{{a}}}_i", "{{a}}_i"),
+            ("F\t=ma", "F=ma"),
+            ("\\alpha\nx", r"\alpha x"),
+        ]
+        for first, second in distinct:
+            with self.subTest(first=first):
+                self.assertNotEqual(normalize(first), normalize(second))
+
+    def test_unbalanced_braces_are_left_alone(self) -> None:
+        self.assertEqual(normalize(r" \frac{a "), r"\frac{a")
+        self.assertEqual(normalize("a}"), "a}")
+
+
+class RenderingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.renderer = LatexRenderer(output_dir=self.test_dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_canonical_form_renders_identically(self) -> None:
+        """The key is only sound if the canonical spelling draws the same image."""
+        expressions = [
+            r"I = \dfrac{P}{4\pi r^2}",
+            r"C\% = \frac{m_{ct}}{m_{dd}} \times 100\%",
+            r"\text{Năng lượng} \rightarrow \text{Điện năng}",
+            r"\alpha = 1.6 \times 10^{-5}\,\text{K}^{-1}",
+            r"x^ 2 + \left\lbrace a \right\rbrace \neq {{b}} \vert c \vert",
+        ] + [f"a {alias} b" for alias in SYNONYMS]
+        for expr in expressions:
+            with self.subTest(expr=expr):
+                fresh = LatexRenderer(output_dir=self.test_dir)
+                self.assertEqual(
+                    self.renderer.render_to_bytes(expr), fresh.render_to_bytes(normalize(expr))
+                )
+
+    def test_equivalent_spellings_render_identically(self) -> None:
+        """Every spelling that shares a key must draw the canonical image."""
+        for canonical, spellings in EQUIVALENT.items():
+            expected = LatexRenderer(output_dir=self.test_dir).render_to_bytes(canonical)
+            for spelling in spellings:
+                with self.subTest(spelling=spelling):
+                    fresh = LatexRenderer(output_dir=self.test_dir)
+                    self.assertEqual(fresh.render_to_bytes(spelling), expected)
+
+    def test_spellings_share_one_render(self) -> None:
+        first = self.renderer.render("F = ma")
+        self.assertIs(self.renderer.render("F=ma"), first)
+        self.assertEqual(first.latex, "F = ma")
+        self.assertEqual(len(self.renderer._bytes_cache), 1)
+
+        path = self.renderer.render_to_file("F = m a")
+        self.assertEqual(self.renderer.render_to_file("$F=ma$"), path)
+        self.assertEqual(len(list(self.test_dir.glob("*.png"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
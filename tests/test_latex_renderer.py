@@ -1,5 +1,6 @@
 """Tests for LaTeX rendering functionality."""
 
+import json
 import unittest
 from pathlib import Path
 import tempfile
@@ -146,17 +147,132 @@ class LatexRendererTests(unittest.TestCase):
         
         # Formula 2 should have been evicted (it was least recently used)
         # Check it's no longer in cache
-        cache_key_b = "b = 2:300"  # formula:dpi format
+        cache_key_b = "b=2:300"  # canonical formula:dpi format
         self.assertNotIn(cache_key_b, renderer._bytes_cache, "Formula 2 should be evicted")
         
         # Formulas 1, 3, and 4 should still be in cache
-        cache_key_a = "a = 1:300"
-        cache_key_c = "c = 3:300"
-        cache_key_d = "d = 4:300"
+        cache_key_a = "a=1:300"
+        cache_key_c = "c=3:300"
+        cache_key_d = "d=4:300"
         self.assertIn(cache_key_a, renderer._bytes_cache, "Formula 1 should be cached")
         self.assertIn(cache_key_c, renderer._bytes_cache, "Formula 3 should be cached")
         self.assertIn(cache_key_d, renderer._bytes_cache, "Formula 4 should be cached")
 
+    def test_render_describes_png(self):
+        """Test that render() reports what python-docx reads from the PNG."""
+        from docx.image.image import Image
+
+        renderer = LatexRenderer(output_dir=self.test_dir, dpi=200)
+        rendered = renderer.render("E = mc^2")
+        parsed = Image.from_blob(rendered.data)
+
+        self.assertEqual((rendered.width_px, rendered.height_px), (parsed.px_width, parsed.px_height))
+        self.assertEqual(rendered.dpi, parsed.horz_dpi)
+        self.assertEqual(rendered.dpi, 200)
+        self.assertEqual(rendered.sha1, parsed.sha1)
+        self.assertEqual(rendered.filename, renderer._generate_filename("E = mc^2"))
+        self.assertIs(renderer.render("E = mc^2"), rendered)
+        self.assertEqual(renderer.render_to_bytes("E = mc^2"), rendered.data)
+
+    def test_render_for_display_size(self):
+        """Test that sized renders match the requested size and are cached per size."""
+        from app.latex_renderer import FormulaSize
+
+        renderer = LatexRenderer(output_dir=self.test_dir)
+        expr = r"I = \dfrac{P}{4\pi r^2}"
+        full = renderer.render(expr)
+        by_height = renderer.render(expr, FormulaSize(height=0.25, dpi=200))
+        by_width = renderer.render(expr, FormulaSize(width=2.0, dpi=200))
+        by_em = renderer.render(expr, FormulaSize(em=1.0, dpi=200))
+
+        self.assertEqual(by_height.dpi, 200)
+        # Within 1%: glyph hinting does not scale exactly with the font size
+        self.assertLessEqual(abs(by_height.height_px - 50), 1)
+        self.assertLessEqual(abs(by_width.width_px - 400), 4)
+        # 13 pt is 0.65 of the default 20 pt
+        self.assertAlmostEqual(by_em.width_px / (full.width_px * 200 / 300), 0.65, delta=0.02)
+        self.assertLess(len(by_height.data), len(full.data) / 3)
+        self.assertIn(r"I=\dfrac{P}{4\pi r^2}:h0.25in@200", renderer._bytes_cache)
+        self.assertNotEqual(by_height.filename, full.filename)
+
+        path = renderer.render_to_file(expr, size=FormulaSize(height=0.25, dpi=200))
+        self.assertEqual(path.name, by_height.filename)
+
+        for invalid in ({}, {"width": 1.0, "height": 1.0}, {"em": 0}):
+            with self.assertRaises(ValueError):
+                FormulaSize(**invalid)
+
+    def test_vector_formats_have_own_cache_and_files(self):
+        """Test SVG/PDF rendering, their cache keys and deterministic output."""
+        from app.latex_renderer import FormulaSize
+
+        renderer = LatexRenderer(output_dir=self.test_dir)
+        png = renderer.render("F = ma")
+        svg = renderer.render("F = ma", image_format="svg")
+        pdf = renderer.render("F = ma", image_format="pdf")
+        sized = renderer.render("F = ma", FormulaSize(height=0.25), "svg")
+
+        self.assertTrue(svg.data.lstrip().startswith(b"<?xml"))
+        self.assertIn(b"<use", svg.data)  # glyph outlines are defined once and reused
+        self.assertNotIn(b"<dc:date>", svg.data)
+        self.assertTrue(pdf.data.startswith(b"%PDF"))
+        self.assertEqual((svg.image_format, svg.dpi), ("svg", 72))
+        self.assertEqual(sized.height_px, 18)  # 0.25 in in points
+        self.assertEqual(png.filename[:-4], svg.filename[:-4])
+        self.assertTrue(svg.filename.endswith(".svg"))
+        self.assertEqual(
+            set(renderer._bytes_cache),
+            {"F=ma:300", "svg:F=ma:", "pdf:F=ma:", "svg:F=ma:h0.25in@220"},
+        )
+
+        again = LatexRenderer(output_dir=self.test_dir).render("F = ma", image_format="svg")
+        self.assertEqual(again.data, svg.data)
+        path = renderer.render_to_file("F = ma", image_format="pdf")
+        self.assertEqual(path.suffix, ".pdf")
+        with self.assertRaises(ValueError):
+            renderer.render("F = ma", image_format="emf")
+
+    def test_broken_formulas_are_not_drawn_twice(self):
+        """Test the syntax pre-check and the persistent negative cache."""
+        from unittest import mock
+
+        renderer = LatexRenderer(output_dir=self.test_dir)
+        with mock.patch.object(renderer, "_draw", wraps=renderer._draw) as draw:
+            with self.assertRaisesRegex(ValueError, r"Unknown command \\le"):
+                renderer.render(r"a \le b")
+            self.assertEqual(draw.call_count, 0)
+
+            # Passes the pre-check, fails in mathtext
+            for _ in range(2):
+                with self.assertRaisesRegex(ValueError, "Double subscript"):
+                    renderer.render_to_bytes("x_1^2_3")
+            with self.assertRaisesRegex(ValueError, "Double subscript"):
+                renderer.render_to_bytes("x_1 ^2 _3")
+            self.assertEqual(draw.call_count, 1)
+
+        stored = json.loads((self.test_dir / "failures.json").read_text(encoding="utf-8"))
+        self.assertEqual(list(stored["failures"]), ["x_1^2_3:300"])
+
+        later = LatexRenderer(output_dir=self.test_dir)
+        with mock.patch.object(later, "_draw") as draw:
+            with self.assertRaisesRegex(ValueError, "Double subscript"):
+                later.render_to_file("x_1^2_3")
+            draw.assert_not_called()
+
+        later.failures.clear()
+        self.assertFalse((self.test_dir / "failures.json").exists())
+        memory_only = LatexRenderer(output_dir=self.test_dir, persist_failures=False)
+        with self.assertRaises(ValueError):
+            memory_only.render("x_1^2_3")
+        self.assertFalse((self.test_dir / "failures.json").exists())
+
+    def test_rendered_formula_rejects_non_png(self):
+        """Test that from_png() refuses data that is not a PNG."""
+        from app.latex_renderer import RenderedFormula
+
+        with self.assertRaises(ValueError):
+            RenderedFormula.from_png("x", b"GIF89a" + bytes(30), "x.gif")
+
     def test_convenience_functions(self):
         """Test convenience functions."""
         latex_expr = r"\nabla n = \frac{\Delta n}{\Delta x}"
@@ -0,0 +1,129 @@
+import shutil
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from app.latex_renderer import LatexRenderer
+from app.metrics import REGISTRY, MetricsRegistry, start_http_server
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_text_format(self) -> None:
+        renders = self.registry.counter("renders_total", "Renders")
+        renders.inc(cache="hit")
+        renders.inc(2, cache="miss")
+        entries = self.registry.gauge("cache_entries", "Entries")
+        entries.set(5)
+        entries.dec()
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE renders_total counter", text)
+        self.assertIn('renders_total{cache="hit"} 1', text)
+        self.assertIn('renders_total{cache="miss"} 2', text)
+        self.assertIn("cache_entries 4", text)
+        with self.assertRaises(ValueError):
+            renders.inc(-1)
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        latency = self.registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            latency.observe(value)
+
+        text = self.registry.render()
+
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("latency_seconds_count 4", text)
+        self.assertIn("latency_seconds_sum 4.25", text)
+
+    def test_name_reuse_returns_same_metric(self) -> None:
+        first = self.registry.counter("docs_total", "Docs")
+        self.assertIs(first, self.registry.counter("docs_total", "Docs"))
+        with self.assertRaisesRegex(ValueError, "already registered"):
+            self.registry.gauge("docs_total", "Docs")
+
+    def test_changes_merge_into_another_registry(self) -> None:
+        renders = self.registry.counter("renders_total", "Renders")
+        latency = self.registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        entries = self.registry.gauge("cache_entries", "Entries")
+        renders.inc(5, cache="miss")
+        latency.observe(0.05)
+        baseline = self.registry.snapshot()
+
+        renders.inc(2, cache="miss")
+        renders.inc(cache="hit")
+        latency.observe(0.5)
+        entries.set(3)
+        changes = self.registry.changes_since(baseline)
+
+        parent = MetricsRegistry()
+        parent.merge(changes, worker=42)
+        parent.merge(changes, worker=42)
+        text = parent.render()
+        self.assertIn('renders_total{cache="miss"} 4', text)
+        self.assertIn('renders_total{cache="hit"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 0', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn("latency_seconds_count 2", text)
+        self.assertIn('cache_entries{worker="42"} 3', text)
+        # Only gauges are reported when nothing was counted
+        unchanged = self.registry.changes_since(self.registry.snapshot())
+        self.assertEqual(list(unchanged), ["cache_entries"])
+
+    def test_label_values_are_escaped(self) -> None:
+        self.registry.counter("files_total", "Files").inc(path='a"b\\c')
+        self.assertIn('files_total{path="a\\"b\\\\c"} 1', self.registry.render())
+
+    def test_http_endpoint(self) -> None:
+        self.registry.counter("hits_total", "Hits").inc()
+        server = start_http_server(0, registry=self.registry)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                body = response.read().decode("utf-8")
+                self.assertIn("text/plain", response.headers["Content-Type"])
+            self.assertIn("hits_total 1", body)
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/other")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_write_textfile(self) -> None:
+        test_dir = Path(tempfile.mkdtemp())
+        try:
+            self.registry.counter("docs_total", "Docs").inc()
+            path = self.registry.write_textfile(test_dir / "khtn.prom")
+            self.assertIn("docs_total 1", path.read_text(encoding="utf-8"))
+            self.assertEqual([p.name for p in test_dir.iterdir()], ["khtn.prom"])
+        finally:
+            shutil.rmtree(test_dir)
+
+
+class RendererMetricsTests(unittest.TestCase):
+    def test_renderer_counts_hits_and_misses(self) -> None:
+        test_dir = Path(tempfile.mkdtemp())
+        try:
+            renders = REGISTRY.counter("khtn_latex_renders_total", "")
+            hits = renders.value(output="bytes", cache="hit")
+            misses = renders.value(output="bytes", cache="miss")
+
+            renderer = LatexRenderer(output_dir=test_dir)
+            renderer.render_to_bytes("E = mc^2")
+            renderer.render_to_bytes("E = mc^2")
+
+            self.assertEqual(renders.value(output="bytes", cache="miss"), misses + 1)
+            self.assertEqual(renders.value(output="bytes", cache="hit"), hits + 1)
+        finally:
+            shutil.rmtree(test_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
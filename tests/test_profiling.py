@@ -0,0 +1,102 @@
+import argparse
+import contextlib
+import cProfile
+import io
+import pstats
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.profiling import (
+    ProfileOptions,
+    StackSampler,
+    add_profile_arguments,
+    collapsed_from_stats,
+    profile_options,
+    run_profiled,
+)
+
+
+def _leaf(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def _middle(n: int) -> int:
+    return _leaf(n) + _leaf(n)
+
+
+def _busy(n: int = 200_000) -> int:
+    return _middle(n)
+
+
+class ProfileOptionsTests(unittest.TestCase):
+    def _parse(self, argv):
+        parser = argparse.ArgumentParser()
+        add_profile_arguments(parser)
+        return parser.parse_args(argv)
+
+    def test_disabled_by_default(self) -> None:
+        self.assertIsNone(profile_options(self._parse([]), "cmd", environ={}))
+
+    def test_flag_and_environment(self) -> None:
+        options = profile_options(self._parse(["--profile", "out"]), "cmd", environ={})
+        self.assertEqual(options.output_dir, Path("out"))
+
+        options = profile_options(
+            self._parse([]), "cmd", environ={"KHTN_PROFILE": "1", "KHTN_PROFILE_SAMPLE": "2"}
+        )
+        self.assertEqual(options.output_dir, Path("profiles"))
+        self.assertEqual(options.sample_interval_ms, 2.0)
+
+        self.assertIsNone(profile_options(self._parse([]), "cmd", environ={"KHTN_PROFILE": "0"}))
+
+
+class RunProfiledTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _run(self, options: ProfileOptions) -> int:
+        with contextlib.redirect_stderr(io.StringIO()):
+            return run_profiled(_busy, options)
+
+    def test_writes_pstats_and_collapsed_stacks(self) -> None:
+        result = self._run(ProfileOptions(name="busy", output_dir=self.test_dir, top=5))
+
+        self.assertEqual(result, _busy())
+        stats_files = list(self.test_dir.glob("busy-*.pstats"))
+        self.assertEqual(len(stats_files), 1)
+        pstats.Stats(str(stats_files[0]))  # loadable
+        collapsed = next(self.test_dir.glob("busy-*.collapsed")).read_text(encoding="utf-8")
+        self.assertIn("test_profiling.py:_middle;test_profiling.py:_leaf", collapsed)
+
+    @unittest.skipUnless(StackSampler.available(), "timer signals not available")
+    def test_sampled_stacks(self) -> None:
+        self._run(ProfileOptions(name="busy", output_dir=self.test_dir, sample_interval_ms=0.5))
+
+        lines = next(self.test_dir.glob("busy-*.collapsed")).read_text(encoding="utf-8")
+        self.assertTrue(lines.strip())
+        for line in lines.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+
+    def test_disabled_calls_function_directly(self) -> None:
+        self.assertEqual(run_profiled(_middle, None, 10), _middle(10))
+
+
+class CollapsedFromStatsTests(unittest.TestCase):
+    def test_follows_heaviest_caller(self) -> None:
+        profiler = cProfile.Profile()
+        profiler.runcall(_busy, 50_000)
+        stacks = collapsed_from_stats(pstats.Stats(profiler))
+
+        leaf_stacks = [s for s in stacks if s.endswith("test_profiling.py:_leaf")]
+        self.assertEqual(len(leaf_stacks), 1)
+        self.assertIn("test_profiling.py:_busy;test_profiling.py:_middle", leaf_stacks[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
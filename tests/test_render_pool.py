@@ -0,0 +1,95 @@
+"""Tests for rendering formulas in supervised worker processes."""
+
+import io
+import os
+import shutil
+import signal
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.latex_renderer import LatexRenderer, RenderFailure, draw_formula
+from app.render_pool import RenderPool
+
+# Takes about a second to lay out, far longer than the short timeouts below
+SLOW = r"\frac{a}{b}+" * 300 + "x"
+
+
+class RenderPoolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.pool = RenderPool(timeout=30.0, memory_limit=512 * 1024 * 1024, max_renders=3)
+        self.addCleanup(self.pool.close)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _pid(self) -> int:
+        worker = self.pool._idle.get()
+        self.pool._idle.put(worker)
+        return worker.process.pid
+
+    def test_matches_in_process_render(self) -> None:
+        expected = io.BytesIO()
+        draw_formula("F = ma", expected, None, "png", 300)
+        self.assertEqual(self.pool.render("F = ma", None, "png", 300), expected.getvalue())
+
+        renderer = LatexRenderer(output_dir=self.test_dir, pool=self.pool)
+        self.assertEqual(renderer.render_to_bytes("F = ma"), expected.getvalue())
+        self.assertEqual(renderer.render_to_file("F = ma").read_bytes(), expected.getvalue())
+
+    def test_timeout_replaces_worker(self) -> None:
+        self.pool.render("x", None, "png", 100)
+        pid = self._pid()
+        self.pool.timeout = 0.1
+        renderer = LatexRenderer(output_dir=self.test_dir, pool=self.pool)
+        with self.assertRaises(RenderFailure) as caught:
+            renderer.render_to_bytes(SLOW)
+        self.assertEqual(caught.exception.kind, "timeout")
+        self.assertEqual(caught.exception.latex, SLOW)
+        self.assertGreaterEqual(caught.exception.seconds, 0.1)
+
+        # Remembered by this renderer, but not written to failures.json
+        self.assertIn(SLOW, next(iter(renderer.render_failures)))
+        self.assertEqual(renderer.failures.failures, {})
+        with self.assertRaisesRegex(ValueError, "timeout"):
+            renderer.render_to_bytes(SLOW)
+
+        self.pool.timeout = 30.0
+        self.assertTrue(renderer.render_to_bytes("E = mc^2").startswith(b"\x89PNG"))
+        self.assertNotEqual(self._pid(), pid)
+
+    def test_memory_limit(self) -> None:
+        self.pool.memory_limit = 64 * 1024 * 1024
+        with self.assertRaises(RenderFailure) as caught:
+            self.pool.render(r"\sum_{i=1}^{n} x_i", None, "png", 3000)
+        self.assertEqual(caught.exception.kind, "memory")
+        self.assertTrue(self.pool.render("x", None, "png", 100).startswith(b"\x89PNG"))
+
+    def test_mathtext_errors_are_not_failures(self) -> None:
+        renderer = LatexRenderer(output_dir=self.test_dir, pool=self.pool)
+        with self.assertRaises(ValueError) as caught:
+            renderer.render_to_bytes("x_1^2_3")
+        self.assertNotIsInstance(caught.exception, RenderFailure)
+        self.assertIn("x_1^2_3:300", renderer.failures.failures)
+
+    def test_workers_are_recycled_and_restarted(self) -> None:
+        self.pool.render("x", None, "png", 100)
+        pid = self._pid()
+        self.pool.render("x", None, "png", 100)
+        self.assertEqual(self._pid(), pid)
+        self.pool.render("x", None, "png", 100)
+        self.pool.render("x", None, "png", 100)
+        recycled = self._pid()
+        self.assertNotEqual(recycled, pid)
+
+        worker = self.pool._idle.get()
+        os.kill(recycled, signal.SIGKILL)
+        worker.process.join()
+        self.pool._idle.put(worker)
+        self.assertTrue(self.pool.render("x", None, "png", 100).startswith(b"\x89PNG"))
+        self.assertNotEqual(self._pid(), recycled)
+
+
+if __name__ == "__main__":
+    unittest.main()
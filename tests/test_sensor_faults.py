@@ -0,0 +1,167 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.sensor_faults import (
+    DS18B20,
+    StreamingFaultDetector,
+    cleaned_column,
+    detect_faults,
+    hampel_mask,
+    profile_for,
+    range_mask,
+    rate_of_change_mask,
+    sentinel_mask,
+)
+from app.timeseries_data import create_sample_timeseries
+from app.timeseries_tool import main
+
+
+def _flagged(mask):
+    return [i for i, flagged in enumerate(mask) if flagged]
+
+
+class BatchDetectorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        # Slow heating with a power-on reading, a disconnect and a spike
+        self.values = [85.0] + [20.0 + 0.1 * i for i in range(1, 30)]
+        self.values[20] = -127.0
+        self.values[25] = 40.0
+        self.times = [float(i) for i in range(30)]
+
+    def test_sentinel_mask(self) -> None:
+        self.assertEqual(_flagged(sentinel_mask(self.values)), [0, 20])
+
+    def test_real_85_degrees_is_kept(self) -> None:
+        values = [83.0, 84.0, 85.0, 86.0, 87.0]
+        self.assertEqual(_flagged(sentinel_mask(values)), [])
+
+    def test_range_is_not_a_sentinel(self) -> None:
+        values = [120.0, 125.0, 127.5, 130.0, -60.0, -127.0]
+        self.assertEqual(_flagged(sentinel_mask(values)), [5])
+        self.assertEqual(_flagged(range_mask(values)), [2, 3, 4, 5])
+
+    def test_profile_for_device(self) -> None:
+        self.assertIs(profile_for("Nhiệt kế điện tử DS18B20"), DS18B20)
+        self.assertIs(profile_for("ds18b20"), DS18B20)
+        self.assertIsNone(profile_for("Thiết bị đo mẫu"))
+        self.assertIsNone(profile_for(""))
+
+    def test_rate_mask_uses_last_good_reference(self) -> None:
+        mask = rate_of_change_mask(
+            self.times, self.values, max_rate=5.0, skip=sentinel_mask(self.values)
+        )
+        self.assertEqual(_flagged(mask), [25])
+
+    def test_rate_mask_reanchors_after_step(self) -> None:
+        values = [20.0, 20.0, 50.0, 50.0, 50.0, 50.0]
+        mask = rate_of_change_mask(range(6), values, max_rate=1.0, reanchor_after=3)
+        self.assertEqual(_flagged(mask), [2, 3])
+
+    def test_hampel_flags_spikes_not_trend(self) -> None:
+        self.assertEqual(_flagged(hampel_mask(self.values)), [0, 20, 25])
+
+        ramp = create_sample_timeseries("Test", "Device", 1.0, 40).column("temp_C")
+        self.assertEqual(_flagged(hampel_mask(ramp)), [])
+
+    def test_detect_faults_on_data(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 30)
+        data.timeseries[12].temp_C = -127.0
+        data.invalidate_cache()
+
+        report = detect_faults(data, DS18B20)
+
+        self.assertEqual(report.indices, [12])
+        self.assertEqual(report.counts(), {"sentinel": 1, "range": 1, "rate": 0, "hampel": 1})
+        self.assertNotIn("sentinel", detect_faults(data).masks)
+
+    def test_hot_series_without_sensor_profile(self) -> None:
+        """Readings above 125 °C are only faults for a sensor that cannot measure them."""
+        data = create_sample_timeseries("Test", "Device", 1.0, 200)
+
+        self.assertEqual(detect_faults(data).indices, [])
+        counts = detect_faults(data, DS18B20).counts()
+        self.assertEqual(counts["sentinel"], 0)
+        self.assertEqual(counts["range"], 159)
+
+    def test_cleaned_column_interpolates(self) -> None:
+        values = [1.0, 99.0, 3.0, 4.0, 99.0]
+        mask = [False, True, False, False, True]
+
+        self.assertEqual(cleaned_column(values, mask), [1.0, 2.0, 3.0, 4.0, 4.0])
+        self.assertEqual(values[1], 99.0, "input column must not be modified")
+
+
+class StreamingFaultDetectorTests(unittest.TestCase):
+    def test_matches_batch_detection(self) -> None:
+        values = [85.0] + [20.0 + 0.1 * i for i in range(1, 30)]
+        values[20] = -127.0
+        values[25] = 40.0
+        detector = StreamingFaultDetector(DS18B20)
+
+        flagged = [i for i, v in enumerate(values) if detector.push(float(i), v)]
+
+        self.assertEqual(flagged, [0, 20, 25])
+
+    def test_range_reason(self) -> None:
+        detector = StreamingFaultDetector(DS18B20)
+        self.assertEqual(detector.push(0.0, 124.0), [])
+        self.assertEqual(detector.push(1.0, 126.0), ["range"])
+        self.assertEqual(detector.push(2.0, -127.0), ["sentinel", "range"])
+        self.assertEqual(StreamingFaultDetector().push(0.0, -127.0), [])
+
+    def test_accepts_steady_heating(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 30)
+        detector = StreamingFaultDetector()
+
+        reasons = [detector.push(p.time_s, p.temp_C) for p in data.timeseries]
+
+        self.assertTrue(all(not r for r in reasons))
+
+    def test_window_must_be_positive(self) -> None:
+        for window in (0, -1):
+            with self.subTest(window=window):
+                with self.assertRaisesRegex(ValueError, "window must be at least 1"):
+                    StreamingFaultDetector(window=window)
+        self.assertEqual(StreamingFaultDetector(window=1).push(0.0, 20.0), [])
+
+
+class FaultCommandTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+
+    def _run(self, *argv: str) -> tuple:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            code = main(list(argv))
+        return code, stdout.getvalue()
+
+    def test_sensor_checks_follow_device(self) -> None:
+        path = self.test_dir / "hot.json"
+        self._run("create-sample", str(path), "--num-points", "200")
+
+        code, output = self._run("validate", str(path))
+        self.assertEqual(code, 0)
+        self.assertNotIn("⚠️", output)
+        code, output = self._run("faults", str(path))
+        self.assertEqual(code, 0)
+        self.assertIn("Giá trị lỗi cảm biến: 0, ngoài dải đo: 0", output)
+
+        code, output = self._run("faults", str(path), "--sensor", "DS18B20", "--limit", "1")
+        self.assertEqual(code, 1)
+        self.assertIn("Giá trị lỗi cảm biến: 0, ngoài dải đo: 159", output)
+        self.assertIn("(range)", output)
+
+        ds18b20 = self.test_dir / "ds18b20.json"
+        self._run("create-sample", str(ds18b20), "--num-points", "200", "--device", "DS18B20")
+        code, output = self._run("validate", str(ds18b20))
+        self.assertIn("159 giá trị ngoài dải đo của DS18B20", output)
+        self.assertNotIn("lỗi cảm biến", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,246 @@
+import http.client
+import io
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from app.metrics import REGISTRY
+from app.server import GeneratorService, ServiceBusy, create_server
+
+SAMPLE = Path(__file__).parent.parent / "samples" / "grade6_light_and_shadow.json"
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+class GeneratorServerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.test_dir = Path(tempfile.mkdtemp())
+        cls.service = GeneratorService(workers=1, max_pending=2, output_dir=cls.test_dir)
+        cls.service.start()
+        cls.server = create_server(cls.service, port=0)
+        cls.port = cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.lesson = SAMPLE.read_bytes()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+        shutil.rmtree(cls.test_dir, ignore_errors=True)
+
+    def _request(self, method: str, path: str, body: bytes = b"") -> http.client.HTTPResponse:
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        self.addCleanup(connection.close)
+        connection.request(method, path, body=body or None)
+        return connection.getresponse()
+
+    def test_markdown_endpoint(self) -> None:
+        response = self._request("POST", "/markdown", self.lesson)
+        body = response.read().decode("utf-8")
+
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.getheader("Content-Type").startswith("text/markdown"))
+        self.assertIn("# ", body)
+
+    def test_docx_endpoint_returns_document(self) -> None:
+        response = self._request("POST", "/docx", self.lesson)
+        body = response.read()
+
+        self.assertEqual(response.status, 200)
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertIn("word/document.xml", archive.namelist())
+
+    def test_invalid_json_and_unknown_path(self) -> None:
+        response = self._request("POST", "/markdown", b"{not json")
+        response.read()
+        self.assertEqual(response.status, 400)
+
+        response = self._request("GET", "/nope")
+        response.read()
+        self.assertEqual(response.status, 404)
+
+    def test_invalid_content_length(self) -> None:
+        for value in ("abc", "-5"):
+            with self.subTest(value=value):
+                connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+                self.addCleanup(connection.close)
+                connection.putrequest("POST", "/markdown")
+                connection.putheader("Content-Length", value)
+                connection.endheaders()
+                response = connection.getresponse()
+                self.assertEqual(response.status, 400)
+                self.assertIn("Content-Length", json.loads(response.read())["error"])
+
+    def test_metrics_include_worker_renders(self) -> None:
+        documents = REGISTRY.counter("khtn_word_documents_exported_total", "Word documents saved")
+        before = documents.value()
+        response = self._request("POST", "/docx", self.lesson)
+        response.read()
+        self.assertEqual(response.status, 200)
+
+        text = self._request("GET", "/metrics").read().decode("utf-8")
+        self.assertEqual(documents.value(), before + 1)
+        self.assertRegex(text, r"(?m)^khtn_word_documents_exported_total \d+$")
+        self.assertRegex(text, r'(?m)^khtn_latex_renders_total\{cache="miss",output="bytes"\} \d+$')
+        self.assertRegex(text, r'(?m)^khtn_latex_bytes_cache_entries\{worker="\d+"\} [1-9]')
+
+    def test_rejects_when_queue_is_full(self) -> None:
+        held = 0
+        while self.service._slots.acquire(blocking=False):
+            held += 1
+        try:
+            response = self._request("POST", "/markdown", self.lesson)
+            response.read()
+            self.assertEqual(response.status, 503)
+            self.assertEqual(response.getheader("Retry-After"), "1")
+            with self.assertRaises(ServiceBusy):
+                self.service.markdown({})
+        finally:
+            for _ in range(held):
+                self.service._slots.release()
+
+    def test_health_and_metrics(self) -> None:
+        response = self._request("GET", "/health")
+        health = json.loads(response.read())
+        self.assertEqual(health["status"], "ok")
+        self.assertEqual(health["workers"], 1)
+
+        self._request("POST", "/markdown", self.lesson).read()
+        response = self._request("GET", "/metrics")
+        self.assertIn("khtn_server_requests_total", response.read().decode("utf-8"))
+
+    def test_unix_socket(self) -> None:
+        socket_path = self.test_dir / "khtn.sock"
+        server = create_server(self.service, unix_socket=socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            connection = _UnixConnection(str(socket_path))
+            connection.request("POST", "/markdown", body=self.lesson)
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertIn("# ", response.read().decode("utf-8"))
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class GeneratorServiceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+        self.lesson = json.loads(SAMPLE.read_text(encoding="utf-8"))
+
+    def _service(self, **kwargs: object) -> GeneratorService:
+        service = GeneratorService(workers=1, output_dir=self.test_dir, **kwargs)
+        service.start()
+        self.addCleanup(service.close)
+        return service
+
+    def test_timed_out_job_keeps_its_slot(self) -> None:
+        service = self._service(max_pending=1, request_timeout=0.3)
+        # About a hundred distinct formulas keep the worker busy for a second
+        slow = dict(self.lesson)
+        slow["formulas"] = [
+            {"symbol": "x", "description": "", "latex": rf"\frac{{a_{{{i}}}}}{{b}} + \sqrt{{{i}}}"}
+            for i in range(100)
+        ]
+        with self.assertRaises(TimeoutError):
+            service.docx(slow)
+        self.assertEqual(service.pending, 1)
+        with self.assertRaises(ServiceBusy):
+            service.docx(self.lesson)
+
+        deadline = time.monotonic() + 60
+        while service.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(service.pending, 0)
+        service.request_timeout = 60.0
+        self.assertTrue(service.docx(self.lesson).startswith(b"PK"))
+
+    def test_pool_is_replaced_once_after_a_worker_dies(self) -> None:
+        service = self._service(max_pending=8)
+        broken = service._pool
+        for process in list(broken._processes.values()):
+            process.kill()
+
+        errors = []
+
+        def request() -> None:
+            try:
+                service.docx(self.lesson)
+            except BaseException as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Requests may fail with the broken pool, but never find no pool
+        for error in errors:
+            self.assertIsInstance(error, BrokenProcessPool)
+        self.assertIsNotNone(service._pool)
+        self.assertIsNot(service._pool, broken)
+        self.assertEqual(service.pending, 0)
+        self.assertTrue(service.docx(self.lesson).startswith(b"PK"))
+
+    def test_close_cancels_queued_jobs(self) -> None:
+        service = GeneratorService(workers=1, max_pending=8, output_dir=self.test_dir)
+        service.start()
+        self.assertEqual(service._context.get_start_method(), "forkserver")
+        slow = dict(self.lesson)
+        slow["formulas"] = [
+            {"symbol": "x", "description": "", "latex": rf"\frac{{c_{{{i}}}}}{{d}} + \sqrt{{{i}}}"}
+            for i in range(100)
+        ]
+        outcomes = []
+
+        def request(config: dict) -> None:
+            try:
+                outcomes.append(service.docx(config)[:2])
+            except BaseException as error:
+                outcomes.append(type(error))
+
+        threads = [threading.Thread(target=request, args=(slow,))]
+        threads[0].start()
+        while service.pending < 1:
+            time.sleep(0.01)
+        # More than the executor hands to its call queue, so some stay cancellable
+        threads += [threading.Thread(target=request, args=(self.lesson,)) for _ in range(6)]
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.monotonic() + 10
+        while service.pending < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        service.close()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn(CancelledError, outcomes)
+        self.assertEqual(service.pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
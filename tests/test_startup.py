@@ -0,0 +1,58 @@
+"""Startup-time budgets for the command line tools."""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from tools.benchmark_startup import (
+    HEAVY_MODULES,
+    check_budget,
+    measure_startup,
+    parse_importtime,
+    startup_commands,
+)
+
+
+class ParseImporttimeTests(unittest.TestCase):
+    def test_parses_depth_and_times(self) -> None:
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:       300 |        420 | app.metrics\n"
+            "some other output\n"
+        )
+        records = parse_importtime(stderr)
+
+        self.assertEqual([r.module for r in records], ["_io", "app.metrics"])
+        self.assertEqual(records[0].depth, 1)
+        self.assertEqual(records[1].depth, 0)
+        self.assertEqual(records[1].cumulative_us, 420)
+
+
+class StartupBudgetTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.work_dir = Path(tempfile.mkdtemp())
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+
+    def test_heavy_modules_are_not_imported_by_app_modules(self) -> None:
+        for module in ("app.latex_renderer", "app.word_exporter", "app.experiment_report"):
+            with self.subTest(module=module):
+                profile = measure_startup(["-c", f"import {module}"])
+                self.assertEqual(profile.returncode, 0, profile.stderr[-500:])
+                for package in HEAVY_MODULES:
+                    self.assertFalse(profile.loaded(package), f"{module} imports {package}")
+
+    def test_cli_commands_within_budget(self) -> None:
+        for command in startup_commands(self.work_dir):
+            with self.subTest(command=command.name):
+                profile = measure_startup(command.argv)
+                self.assertEqual(check_budget(command, profile), [], profile.stderr[-500:])
+
+
+if __name__ == "__main__":
+    unittest.main()
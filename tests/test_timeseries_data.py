@@ -1,6 +1,10 @@
 import unittest
 
-from app.timeseries_data import create_sample_timeseries, TimeseriesData
+from app.timeseries_data import (
+    create_sample_timeseries,
+    TimeseriesData,
+    TimeseriesDataPoint,
+)
 
 
 class CreateSampleTimeseriesTests(unittest.TestCase):
@@ -48,5 +52,47 @@ class TimeseriesDataCachingTests(unittest.TestCase):
         self.assertIn('"device": "Device"', json_result)
 
 
+class TimeseriesSliceTests(unittest.TestCase):
+    """Test time-window queries on TimeseriesData."""
+
+    def test_slice_is_inclusive(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 10)
+
+        window = data.slice(2.0, 5.0)
+
+        self.assertEqual([p.time_s for p in window.timeseries], [2.0, 3.0, 4.0, 5.0])
+        self.assertIs(window.metadata, data.metadata)
+
+    def test_slice_open_ended(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 10)
+
+        self.assertEqual(len(data.slice(start_s=7.0).timeseries), 3)
+        self.assertEqual(len(data.slice(end_s=0.5).timeseries), 1)
+        self.assertEqual(len(data.slice().timeseries), 10)
+        self.assertEqual(len(data.slice(20.0, 30.0).timeseries), 0)
+
+    def test_slice_handles_unsorted_points(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 6)
+        data.timeseries.reverse()
+        data.invalidate_cache()
+
+        window = data.slice(1.0, 3.0)
+
+        self.assertEqual([p.time_s for p in window.timeseries], [1.0, 2.0, 3.0])
+
+    def test_index_rebuilt_after_append(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        self.assertEqual(data.index_range(0.0, 100.0), (0, 5))
+
+        data.timeseries.append(TimeseriesDataPoint(time_s=5.0, temp_C=40.0))
+
+        self.assertEqual(data.index_range(0.0, 100.0), (0, 6))
+
+    def test_slice_rejects_inverted_window(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        with self.assertRaisesRegex(ValueError, "must not be greater"):
+            data.slice(4.0, 1.0)
+
+
 if __name__ == "__main__":
     unittest.main()
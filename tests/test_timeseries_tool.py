@@ -0,0 +1,99 @@
+"""Tests for the timeseries command-line tool."""
+
+import contextlib
+import csv
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.timeseries_data import create_sample_timeseries
+from app.timeseries_tool import main, parse_args
+
+
+class ValidateAllTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+        # Summaries go outside the scanned directory
+        self.out_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.out_dir, ignore_errors=True)
+        create_sample_timeseries("A", "Device", 1.0, 5).save(self.test_dir / "a.json")
+        (self.test_dir / "sub").mkdir()
+        create_sample_timeseries("B", "Device", 1.0, 8).save(self.test_dir / "sub" / "b.json")
+        invalid = create_sample_timeseries("C", "Device", 1.0, 6)
+        invalid.metadata.sampling_rate_hz = 0
+        invalid.save(self.test_dir / "c.json")
+        (self.test_dir / "broken.json").write_text("{not json", encoding="utf-8")
+        (self.test_dir / "notes.txt").write_text("not data", encoding="utf-8")
+
+    def _run(self, *argv: str) -> tuple:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            code = main(["validate-all", str(self.test_dir), *argv])
+        return code, stdout.getvalue()
+
+    def _summary(self, *argv: str) -> dict:
+        summary = self.out_dir / "summary.json"
+        self._run("--summary", str(summary), *argv)
+        return json.loads(summary.read_text(encoding="utf-8"))
+
+    def test_failing_files_give_nonzero_exit(self) -> None:
+        code, output = self._run("--workers", "1")
+        self.assertEqual(code, 1)
+        self.assertIn("sampling_rate_hz must be positive", output)
+        self.assertIn("broken.json", output)
+        self.assertIn("3 tệp, 1 hợp lệ, 2 không hợp lệ", output)
+
+    def test_pattern_and_recursion(self) -> None:
+        code, output = self._run("--pattern", "a*.json", "--workers", "1")
+        self.assertEqual(code, 0)
+        self.assertIn("a.json (5 điểm)", output)
+
+        code, output = self._run("--pattern", "b.json", "--workers", "1")
+        self.assertEqual(code, 1)
+        self.assertIn("Không có tệp nào khớp", output)
+
+        code, output = self._run("--pattern", "b.json", "-r", "--workers", "1")
+        self.assertEqual(code, 0)
+        self.assertIn(str(Path("sub") / "b.json"), output)
+
+        files = [Path(f["path"]).name for f in self._summary("-r", "--workers", "1")["files"]]
+        self.assertEqual(files, ["a.json", "broken.json", "c.json", "b.json"])
+
+    def test_json_and_csv_summaries(self) -> None:
+        summary = self._summary("--workers", "1")
+        self.assertEqual(summary["totals"], {"files": 3, "valid": 1, "invalid": 2})
+        first = summary["files"][0]
+        self.assertEqual(Path(first["path"]).name, "a.json")
+        self.assertEqual((first["valid"], first["points"], first["error"]), (True, 5, ""))
+
+        path = self.out_dir / "summary.csv"
+        self._run("--summary", str(path), "--workers", "1", "-q")
+        with path.open(encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        names = [Path(row["path"]).name for row in rows]
+        self.assertEqual(names, ["a.json", "broken.json", "c.json"])
+        self.assertEqual([row["valid"] for row in rows], ["True", "False", "False"])
+
+    def test_process_pool_matches_serial(self) -> None:
+        code, output = self._run("--workers", "2", "-r", "-q")
+        self.assertEqual(code, 1)
+        self.assertNotIn("a.json", output)
+        parallel = self._summary("-r", "--workers", "2")
+        self.assertEqual(parallel, self._summary("-r", "--workers", "1"))
+
+    def test_workers_must_be_positive(self) -> None:
+        for value in ("0", "-3", "two"):
+            with self.subTest(value=value):
+                with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                    with self.assertRaises(SystemExit) as caught:
+                        parse_args(["validate-all", str(self.test_dir), "--workers", value])
+                self.assertEqual(caught.exception.code, 2)
+                self.assertIn("--workers", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app import tracing
+from app.latex_renderer import LatexRenderer
+from app.tracing import span
+
+
+class TracingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self) -> None:
+        tracing.disable_tracing()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_disabled_span_is_shared_noop(self) -> None:
+        self.assertIsNone(tracing.get_tracer())
+        with span("a") as first, span("b") as second:
+            first.set(cache="hit")
+        self.assertIs(first, second)
+
+    def test_tree_merges_siblings_and_counts_attrs(self) -> None:
+        with tracing.tracing() as tracer:
+            with span("export"):
+                for hit in (True, False, True):
+                    with span("render") as s:
+                        s.set(cache="hit" if hit else "miss")
+                with span("save"):
+                    pass
+
+        tree = tracer.to_tree()
+
+        self.assertEqual([node["name"] for node in tree], ["export"])
+        render, save = tree[0]["children"]
+        self.assertEqual(render["count"], 3)
+        self.assertEqual(render["attrs"], {"cache": {"hit": 2, "miss": 1}})
+        self.assertEqual(save["name"], "save")
+        self.assertIsNone(tracing.get_tracer(), "tracing() must restore the previous state")
+
+    def test_chrome_trace_events_nest_in_time(self) -> None:
+        with tracing.tracing() as tracer:
+            with span("outer"):
+                with span("inner", rows=3):
+                    pass
+
+        path = tracer.write(self.test_dir / "trace.json", fmt="chrome")
+        events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+
+        outer, inner = events
+        self.assertEqual(outer["ph"], "X")
+        self.assertEqual(inner["args"], {"rows": 3})
+        self.assertGreaterEqual(inner["ts"], outer["ts"])
+        self.assertLessEqual(inner["ts"] + inner["dur"], outer["ts"] + outer["dur"])
+
+    def test_renderer_reports_cache_hits(self) -> None:
+        renderer = LatexRenderer(output_dir=self.test_dir)
+        with tracing.tracing() as tracer:
+            renderer.render_to_bytes("F = ma")
+            renderer.render_to_bytes("F = ma")
+
+        (node,) = tracer.to_tree()
+        self.assertEqual(node["name"], "latex.render_to_bytes")
+        self.assertEqual(node["attrs"]["cache"], {"miss": 1, "hit": 1})
+
+    def test_run_traced_writes_on_error(self) -> None:
+        def fail() -> None:
+            with span("step"):
+                raise RuntimeError("boom")
+
+        path = self.test_dir / "tree.json"
+        with self.assertRaises(RuntimeError):
+            tracing.run_traced("cmd", fail, path, "tree")
+
+        tree = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual(tree[0]["children"][0]["name"], "step")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from app.timeseries_data import TimeseriesDataPoint, Variable, create_sample_timeseries
+from app.units import DEFAULT_REGISTRY, DerivedColumns
+
+
+class UnitRegistryTests(unittest.TestCase):
+    def test_temperature_conversions(self) -> None:
+        values = DEFAULT_REGISTRY.convert([0.0, 100.0], "Celsius", "Fahrenheit")
+        self.assertAlmostEqual(values[0], 32.0)
+        self.assertAlmostEqual(values[1], 212.0)
+
+        kelvin = DEFAULT_REGISTRY.convert([25.0], "°C", "K")
+        self.assertAlmostEqual(kelvin[0], 298.15)
+
+    def test_delta_conversion_ignores_offset(self) -> None:
+        values = DEFAULT_REGISTRY.convert([10.0], "Celsius", "Fahrenheit", delta=True)
+        self.assertAlmostEqual(values[0], 18.0)
+
+    def test_aliases_are_case_insensitive(self) -> None:
+        self.assertEqual(DEFAULT_REGISTRY.get("MIN").name, "minutes")
+        self.assertEqual(DEFAULT_REGISTRY.get("seconds").dimension, "time")
+
+    def test_rejects_incompatible_units(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Cannot convert"):
+            DEFAULT_REGISTRY.convert([1.0], "seconds", "Kelvin")
+        with self.assertRaisesRegex(ValueError, "Unknown unit"):
+            DEFAULT_REGISTRY.get("parsec")
+
+
+class DerivedColumnsTests(unittest.TestCase):
+    def test_convert_time_to_minutes(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 121)
+        minutes = DerivedColumns(data).convert("time_s", "minutes")
+        self.assertAlmostEqual(minutes[-1], 2.0)
+
+    def test_heat_absorbed(self) -> None:
+        # Sample data heats by 2.5 °C per point
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        heat = DerivedColumns(data).heat(mass=200, mass_unit="g", specific_heat=4200)
+        self.assertAlmostEqual(heat[0], 0.0)
+        self.assertAlmostEqual(heat[4], 0.2 * 4200 * 10.0)
+
+    def test_uses_declared_variable_unit(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        data.variables[1] = Variable(name="temperature", unit="Fahrenheit", type="continuous")
+        engine = DerivedColumns(data)
+
+        self.assertEqual(engine.source_unit("temp_C"), "Fahrenheit")
+        label, values = engine.evaluate("temp_C:Celsius")
+        self.assertEqual(label, "temp_C [Celsius]")
+        self.assertAlmostEqual(values[0], (25.0 - 32.0) * 5.0 / 9.0)
+
+    def test_derived_columns_cached_until_data_changes(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        engine = DerivedColumns(data)
+
+        first = engine.convert("temp_C", "Kelvin")
+        self.assertIs(first, engine.convert("temp_C", "K"))
+
+        data.timeseries.append(TimeseriesDataPoint(time_s=5.0, temp_C=40.0))
+        updated = engine.convert("temp_C", "Kelvin")
+        self.assertIsNot(first, updated)
+        self.assertEqual(len(updated), 6)
+
+    def test_cache_follows_declared_unit(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        engine = DerivedColumns(data)
+        self.assertAlmostEqual(engine.convert("temp_C", "Kelvin")[0], 298.15)
+        celsius_heat = engine.heat(mass=1.0)[4]
+
+        data.variables[1] = Variable(name="temperature", unit="Fahrenheit", type="continuous")
+        self.assertAlmostEqual(engine.convert("temp_C", "Kelvin")[0], (25.0 - 32.0) * 5.0 / 9.0 + 273.15)
+        self.assertAlmostEqual(engine.heat(mass=1.0)[4], celsius_heat * 5.0 / 9.0)
+
+    def test_heat_requires_mass(self) -> None:
+        data = create_sample_timeseries("Test", "Device", 1.0, 5)
+        with self.assertRaisesRegex(ValueError, "requires a mass"):
+            DerivedColumns(data).evaluate("heat")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,25 @@
 """Tests for Word export functionality."""
 
+import io
+import re
 import unittest
+import zipfile
 from pathlib import Path
 import tempfile
 import shutil
 
-from app.word_exporter import WordExporter, export_to_word
+from app.latex_renderer import FormulaSize
+from app.word_exporter import COMPRESSION_LEVELS, WordExporter, export_to_word, write_document
+
+
+class _WriteOnlyStream:
+    """Non-seekable sink, like a socket or HTTP response body."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
 
 
 class WordExporterTests(unittest.TestCase):
@@ -169,6 +183,205 @@ class WordExporterTests(unittest.TestCase):
         self.assertTrue(output_path.exists())
         self.assertGreater(output_path.stat().st_size, 5000)  # Should be a reasonable size
 
+    def test_export_to_non_seekable_stream_uses_memory_images(self):
+        """Test streaming a document with formulas without touching the disk."""
+        config = {
+            "metadata": {"title": "Xuất ra luồng"},
+            "objectives": ["Vận dụng công thức $F = ma$"],
+            "formulas": [{"symbol": "v", "description": "Vận tốc", "latex": "v = s/t"}],
+        }
+        stream = _WriteOnlyStream()
+
+        exporter = WordExporter(output_dir=self.test_dir, in_memory_images=True)
+        written = exporter.export_to_stream(config, stream)
+
+        data = stream.buffer.getvalue()
+        self.assertEqual(written, len(data))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            media = [name for name in archive.namelist() if name.startswith("word/media/")]
+            self.assertEqual(len(media), 2)
+        self.assertEqual(list((self.test_dir / "formulas").iterdir()), [])
+
+    def test_compression_levels(self):
+        """Test that stored parts are larger than the smallest compression."""
+        config = {"metadata": {"title": "Nén"}, "objectives": ["Mục tiêu"] * 50}
+        exporter = WordExporter(output_dir=self.test_dir)
+        sizes = {}
+        for name in ("none", "small"):
+            output_path = self.test_dir / f"{name}.docx"
+            exporter.export_lesson_plan(config, output_path, COMPRESSION_LEVELS[name])
+            sizes[name] = output_path.stat().st_size
+            with zipfile.ZipFile(output_path) as archive:
+                self.assertIn("word/document.xml", archive.namelist())
+
+        self.assertGreater(sizes["none"], sizes["small"])
+
+    def test_write_document_matches_python_docx_save(self):
+        """Test that parts and their content types match Document.save."""
+        config = {
+            "metadata": {"title": "Gói"},
+            "formulas": [{"symbol": "F", "description": "Lực", "latex": "F = ma"}],
+            "objectives": ["Tính $v = s/t$"],
+        }
+        doc = WordExporter(output_dir=self.test_dir).build_document(config)
+        saved, written = io.BytesIO(), io.BytesIO()
+        doc.save(saved)
+        write_document(doc, written, COMPRESSION_LEVELS["fast"])
+
+        def content_types(archive):
+            xml = archive.read("[Content_Types].xml").decode("utf-8")
+            defaults = dict(re.findall(r'Default Extension="([^"]+)" ContentType="([^"]+)"', xml))
+            overrides = dict(re.findall(r'Override PartName="([^"]+)" ContentType="([^"]+)"', xml))
+            return {
+                name: overrides.get("/" + name, defaults.get(name.rsplit(".", 1)[-1].lower()))
+                for name in archive.namelist()
+            }
+
+        with zipfile.ZipFile(saved) as expected, zipfile.ZipFile(written) as actual:
+            self.assertEqual(actual.namelist(), expected.namelist())
+            self.assertEqual(actual.namelist()[0], "[Content_Types].xml")
+            for name in expected.namelist()[1:]:
+                self.assertEqual(actual.read(name), expected.read(name), name)
+            self.assertEqual(content_types(actual), content_types(expected))
+
+    def test_base_template_styles_and_copies(self):
+        """Test that formatting lives in styles and exports do not share content."""
+        import docx
+
+        config = {
+            "metadata": {"title": "Kiểu chữ", "grade": "Lớp 6"},
+            "objectives": ["Mục tiêu"],
+            "activities": [{"title": "Hoạt động 1", "steps": [{"actor": "GV", "content": "Hỏi"}]}],
+        }
+        output_path = self.test_dir / "styles.docx"
+        exporter = WordExporter(output_dir=self.test_dir)
+        exporter.export_lesson_plan(config, self.test_dir / "first.docx")
+        exporter.export_lesson_plan(config, output_path)
+
+        doc = docx.Document(str(output_path))
+        first = docx.Document(str(self.test_dir / "first.docx"))
+        self.assertEqual(len(doc.paragraphs), len(first.paragraphs))
+        heading = doc.styles["Heading 2"]
+        self.assertEqual(heading.font.name, "Times New Roman")
+        self.assertEqual(str(heading.font.color.rgb), "000000")
+        self.assertEqual(doc.paragraphs[0].style.name, "Lesson Title")
+        self.assertEqual(doc.paragraphs[0].text, "Kiểu chữ")
+        self.assertEqual(
+            [p.text for p in doc.paragraphs if p.style.name == "Heading 2"],
+            ["Mục tiêu bài học", "Tiến trình dạy học"],
+        )
+        for paragraph in doc.paragraphs:
+            for run in paragraph.runs:
+                self.assertIsNone(run.font.bold)
+                self.assertIsNone(run.font.name)
+
+    def test_uncached_template_matches_cached(self):
+        """Test that both template modes produce the same document body."""
+        config = {"metadata": {"title": "So sánh"}, "objectives": ["Mục tiêu"]}
+        bodies = []
+        for cache_template in (True, False):
+            exporter = WordExporter(output_dir=self.test_dir, cache_template=cache_template)
+            output_path = self.test_dir / f"template_{cache_template}.docx"
+            exporter.export_lesson_plan(config, output_path)
+            with zipfile.ZipFile(output_path) as archive:
+                bodies.append(archive.read("word/document.xml"))
+
+        self.assertEqual(bodies[0], bodies[1])
+
+
+    def test_repeated_formulas_share_one_image_part(self):
+        """Test that each distinct formula is embedded once with unique shape ids."""
+        import docx
+        from docx.shared import Inches
+
+        config = {
+            "objectives": ["Dùng $F = ma$", "Lại $F = ma$ và $v = s/t$"],
+            "formulas": [
+                {"symbol": "F", "description": "Lực", "latex": "F = ma"},
+                {"symbol": "F", "description": "Lực", "latex": "F = ma"},
+            ],
+        }
+        chart = self.test_dir / "chart.png"
+        chart.write_bytes(WordExporter(output_dir=self.test_dir).latex_renderer.render_to_bytes("y"))
+        for in_memory_images in (False, True):
+            with self.subTest(in_memory_images=in_memory_images):
+                exporter = WordExporter(output_dir=self.test_dir, in_memory_images=in_memory_images)
+                doc = exporter.build_document(config)
+                exporter.add_picture(doc, chart, width=Inches(1.0))
+                exporter.add_text_with_latex(doc.add_paragraph(), "$v = s/t$")
+
+                buffer = io.BytesIO()
+                doc.save(buffer)
+                buffer.seek(0)
+                reopened = docx.Document(buffer)
+                media = {p.partname for p in reopened.part.package.parts if "media" in p.partname}
+                # One image per formula and display size: F = ma in the table and
+                # in bullets, v = s/t in bullets and in the paragraph; the chart
+                self.assertEqual(len(media), 5)
+                self.assertEqual(len(reopened.inline_shapes), 7)
+                ids = reopened.element.body.xpath(".//wp:docPr/@id")
+                self.assertEqual(len(ids), len(set(ids)))
+
+
+    def test_formulas_rendered_at_display_size(self):
+        """Test that formula images have the pixels their display size needs."""
+        import docx
+        from docx.shared import Inches
+
+        config = {
+            "objectives": ["Dùng $F = ma$"],
+            "formulas": [{"symbol": "F", "description": "Lực", "latex": "F = ma"}],
+        }
+        sizes = {}
+        for formula_dpi in (150, None):
+            exporter = WordExporter(output_dir=self.test_dir, formula_dpi=formula_dpi)
+            output_path = self.test_dir / f"sized_{formula_dpi}.docx"
+            exporter.export_lesson_plan(config, output_path)
+            shapes = docx.Document(output_path).inline_shapes
+            sizes[formula_dpi] = [(s.width, s.height) for s in shapes]
+            if formula_dpi:
+                with zipfile.ZipFile(output_path) as archive:
+                    media = sorted(n for n in archive.namelist() if "media" in n)
+                    self.assertEqual(len(media), 2)
+
+        # Same layout: bullet images 0.3 in high, table images 2 in wide; the
+        # other side differs from the 300 dpi render only by pixel rounding
+        (inline, table), (old_inline, old_table) = sizes[150], sizes[None]
+        self.assertEqual(inline[1], Inches(0.3))
+        self.assertEqual(old_inline[1], Inches(0.3))
+        self.assertEqual(table[0], Inches(2.0))
+        self.assertEqual(old_table[0], Inches(2.0))
+        self.assertAlmostEqual(inline[0] / old_inline[0], 1, delta=0.02)
+        self.assertAlmostEqual(table[1] / old_table[1], 1, delta=0.02)
+        rendered = exporter.latex_renderer.render("F = ma", FormulaSize(height=0.25, dpi=150))
+        self.assertLessEqual(abs(rendered.height_px - 0.25 * 150), 1)
+
+
+    def test_svg_formulas_shared_across_sizes(self):
+        """Test that each formula is embedded as one SVG next to sized PNG fallbacks."""
+        config = {
+            "objectives": ["Dùng $F = ma$"],
+            "formulas": [{"symbol": "F", "description": "Lực", "latex": "F = ma"}],
+        }
+        for in_memory_images in (False, True):
+            with self.subTest(in_memory_images=in_memory_images):
+                exporter = WordExporter(
+                    output_dir=self.test_dir,
+                    in_memory_images=in_memory_images,
+                    formula_format="svg",
+                )
+                output_path = self.test_dir / f"svg_{in_memory_images}.docx"
+                exporter.export_lesson_plan(config, output_path)
+                with zipfile.ZipFile(output_path) as archive:
+                    media = [n for n in archive.namelist() if "media" in n]
+                    document = archive.read("word/document.xml").decode("utf-8")
+                self.assertEqual(sorted(n.rsplit(".", 1)[1] for n in media), ["png", "png", "svg"])
+                self.assertEqual(document.count("svgBlip"), 2)
+
+        with self.assertRaises(ValueError):
+            WordExporter(output_dir=self.test_dir, formula_format="emf")
+
 
 if __name__ == "__main__":
     unittest.main()
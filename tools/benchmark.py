@@ -1,14 +1,37 @@
 #!/usr/bin/env python3
 """Benchmark script for KHTN-THCS performance testing.
 
-This script provides simple benchmarks for key operations to help
-identify performance regressions and measure optimization improvements.
+This script provides benchmarks for key operations to help identify
+performance regressions and measure optimization improvements.
+
+Each benchmark is timed with ``time.perf_counter_ns``: a few warmup calls
+are discarded, the number of iterations per repeat is calibrated so that a
+repeat lasts at least ``--min-time`` seconds, and several repeats are
+summarized as median/p95/stddev per call. Results can be written as JSON
+and compared against a stored baseline; benchmarks whose median got slower
+than the threshold are reported as regressions and make the script exit
+with status 1.
+
+With ``--memory`` the script also measures memory: tracemalloc peak and
+retained bytes, the change in allocated blocks and the RSS delta of each
+memory case. These are stored under "memory" in the same JSON report and
+compared against the baseline with the same threshold.
 """
 
-import time
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
 import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Callable, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -17,37 +40,341 @@ from app.lesson_plan_generator import build_markdown
 from app.timeseries_data import create_sample_timeseries, TimeseriesData
 
 
-def benchmark(name: str, func: Callable[[], Any], iterations: int = 100, setup: Callable[[], Any] = None) -> None:
+@dataclass
+class BenchmarkResult:
+    """Timing statistics of one benchmark, in nanoseconds per call."""
+
+    name: str
+    iterations: int
+    repeats: int
+    median_ns: float
+    p95_ns: float
+    stdev_ns: float
+    min_ns: float
+    mean_ns: float
+    samples_ns: List[float] = field(default_factory=list)
+    # Work items (formulas, rows, ...) processed by one call
+    items: int = 1
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1e9 / self.median_ns if self.median_ns else float("inf")
+
+    @property
+    def per_item_ns(self) -> float:
+        return self.median_ns / self.items if self.items else self.median_ns
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary representation."""
+        result = asdict(self)
+        result["ops_per_sec"] = self.ops_per_sec
+        result["per_item_ns"] = self.per_item_ns
+        return result
+
+
+@dataclass
+class BenchmarkCase:
+    """A named benchmark with optional setup and per-case overrides."""
+
+    name: str
+    func: Callable[..., Any]
+    setup: Optional[Callable[[], Any]] = None
+    # Work items per call, used to report per-item latency
+    items: int = 1
+    # Fixed iterations/repeats for expensive cases (None: use calibration/CLI)
+    iterations: Optional[int] = None
+    repeats: Optional[int] = None
+
+
+@dataclass
+class MemoryResult:
+    """Memory usage of one call of a memory benchmark case."""
+
+    name: str
+    # Highest traced Python heap usage during the call
+    peak_bytes: int
+    # Traced heap still in use after the call (including its return value)
+    retained_bytes: int
+    # Change in live allocated blocks (sys.getallocatedblocks)
+    blocks_delta: int
+    # Change in resident set size; includes allocations outside Python
+    rss_delta_bytes: int
+    elapsed_ns: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary representation."""
+        return asdict(self)
+
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of this process in bytes.
+
+    Reads /proc/self/statm on Linux; elsewhere falls back to the peak RSS
+    from ``resource`` (0 if unavailable).
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on other platforms
+        return usage if sys.platform == "darwin" else usage * 1024
+    except ImportError:
+        return 0
+
+
+def measure_memory(
+    name: str,
+    func: Callable[..., Any],
+    setup: Optional[Callable[[], Any]] = None,
+    verbose: bool = True,
+) -> MemoryResult:
+    """Run ``func`` once under tracemalloc and record its memory usage.
+
+    The setup result and ``func``'s return value are kept alive until the
+    measurement ends, so memory held by loaded data counts as retained.
+
+    Args:
+        name: Name of the memory case
+        func: Function to measure
+        setup: Optional setup function run before tracing; its result is passed to ``func``
+        verbose: Print a result block
+
+    Returns:
+        MemoryResult for the call
+    """
+    setup_data = setup() if setup is not None else None
+    gc.collect()
+    rss_before = current_rss_bytes()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    start = time.perf_counter_ns()
+    try:
+        value = func(setup_data) if setup is not None else func()
+        elapsed = time.perf_counter_ns() - start
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks_after = sys.getallocatedblocks()
+    rss_after = current_rss_bytes()
+
+    result = MemoryResult(
+        name=name,
+        peak_bytes=peak,
+        retained_bytes=retained,
+        blocks_delta=blocks_after - blocks_before,
+        rss_delta_bytes=rss_after - rss_before,
+        elapsed_ns=elapsed,
+    )
+    del value, setup_data
+    gc.collect()
+
+    if verbose:
+        print(f"\n{'=' * 60}")
+        print(f"Memory: {name}")
+        print(f"{'=' * 60}")
+        print(f"Peak (tracemalloc): {format_bytes(result.peak_bytes)}")
+        print(f"Retained:           {format_bytes(result.retained_bytes)}")
+        print(f"Blocks delta:       {result.blocks_delta:,}")
+        print(f"RSS delta:          {format_bytes(result.rss_delta_bytes)}")
+    return result
+
+
+def format_bytes(value: float) -> str:
+    """Format a byte count with a binary unit."""
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    for unit in ("B", "KiB", "MiB"):
+        if value < 1024:
+            return f"{sign}{value:.0f} {unit}" if unit == "B" else f"{sign}{value:.1f} {unit}"
+        value /= 1024
+    return f"{sign}{value:.2f} GiB"
+
+
+def _percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    rank = max(1, math.ceil(fraction * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def _time_calls(call: Callable[[], Any], iterations: int) -> int:
+    """Return the elapsed nanoseconds for ``iterations`` calls."""
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        call()
+    return time.perf_counter_ns() - start
+
+
+def calibrate(call: Callable[[], Any], min_time: float, max_iterations: int = 1_000_000) -> int:
+    """Find an iteration count whose total run time is at least ``min_time`` seconds.
+
+    Args:
+        call: Zero-argument callable to time
+        min_time: Target duration of one repeat in seconds
+        max_iterations: Upper bound on the returned count
+
+    Returns:
+        Number of iterations per repeat
+    """
+    target_ns = min_time * 1e9
+    iterations = 1
+    while iterations < max_iterations:
+        elapsed = _time_calls(call, iterations)
+        if elapsed >= target_ns:
+            break
+        # Jump close to the target, growing at most 10x per step
+        scale = target_ns / elapsed if elapsed > 0 else 10.0
+        iterations = min(max_iterations, max(iterations * 2, int(iterations * min(scale * 1.2, 10.0))))
+    return iterations
+
+
+def benchmark(
+    name: str,
+    func: Callable[..., Any],
+    iterations: Optional[int] = None,
+    setup: Optional[Callable[[], Any]] = None,
+    warmup: int = 3,
+    repeats: int = 7,
+    min_time: float = 0.05,
+    verbose: bool = True,
+    items: int = 1,
+) -> BenchmarkResult:
     """Run a benchmark and print results.
-    
+
     Args:
         name: Name of the benchmark
         func: Function to benchmark
-        iterations: Number of iterations to run
-        setup: Optional setup function to run once before benchmarking
+        iterations: Calls per repeat; calibrated from ``min_time`` if None
+        setup: Optional setup function run once; its result is passed to ``func``
+        warmup: Number of untimed calls before measuring
+        repeats: Number of timed repeats
+        min_time: Minimum duration of one repeat in seconds (for calibration)
+        verbose: Print a result block
+        items: Work items processed per call, for per-item latency
+
+    Returns:
+        BenchmarkResult with per-call statistics
     """
-    print(f"\n{'=' * 60}")
-    print(f"Benchmark: {name}")
-    print(f"Iterations: {iterations}")
-    print(f"{'=' * 60}")
-    
     # Run setup if provided
-    setup_data = setup() if setup else None
-    
-    start = time.time()
-    for _ in range(iterations):
-        if setup_data is not None:
-            func(setup_data)
-        else:
-            func()
-    end = time.time()
-    
-    total_time = end - start
-    avg_time = total_time / iterations
-    
-    print(f"Total time: {total_time:.4f} seconds")
-    print(f"Average time: {avg_time * 1000:.2f} ms")
-    print(f"Operations/sec: {iterations / total_time:.0f}")
+    if setup is not None:
+        setup_data = setup()
+
+        def call() -> Any:
+            return func(setup_data)
+
+    else:
+        call = func
+
+    for _ in range(warmup):
+        call()
+
+    if iterations is None:
+        iterations = calibrate(call, min_time)
+
+    samples = [_time_calls(call, iterations) / iterations for _ in range(repeats)]
+    ordered = sorted(samples)
+    result = BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        repeats=repeats,
+        median_ns=statistics.median(ordered),
+        p95_ns=_percentile(ordered, 0.95),
+        stdev_ns=statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        min_ns=ordered[0],
+        mean_ns=statistics.fmean(ordered),
+        samples_ns=samples,
+        items=items,
+    )
+
+    if verbose:
+        print(f"\n{'=' * 60}")
+        print(f"Benchmark: {name}")
+        print(f"Iterations: {iterations} x {repeats} repeats (warmup {warmup})")
+        print(f"{'=' * 60}")
+        print(f"Median: {format_ns(result.median_ns)}")
+        print(f"p95:    {format_ns(result.p95_ns)}")
+        print(f"Stddev: {format_ns(result.stdev_ns)}")
+        print(f"Operations/sec: {result.ops_per_sec:,.0f}")
+        if items > 1:
+            print(f"Per item ({items} items): {format_ns(result.per_item_ns)}")
+    return result
+
+
+def format_ns(value: float) -> str:
+    """Format a duration in nanoseconds with a readable unit."""
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("µs", 1e3)):
+        if value >= scale:
+            return f"{value / scale:.3f} {unit}"
+    return f"{value:.0f} ns"
+
+
+def compare_to_baseline(
+    results: List[BenchmarkResult], baseline: Dict[str, Any], threshold: float
+) -> List[Tuple[str, float, float, float]]:
+    """Find benchmarks whose median is slower than the baseline by more than ``threshold``.
+
+    Args:
+        results: Current results
+        baseline: Parsed baseline JSON (same format as ``results_to_json``)
+        threshold: Allowed relative slowdown (0.10 means 10%)
+
+    Returns:
+        List of (name, baseline median ns, current median ns, ratio) for regressions
+    """
+    base_medians = {
+        entry["name"]: entry["median_ns"] for entry in baseline.get("results", [])
+    }
+    regressions = []
+    for result in results:
+        base = base_medians.get(result.name)
+        if not base:
+            continue
+        ratio = result.median_ns / base
+        if ratio > 1.0 + threshold:
+            regressions.append((result.name, base, result.median_ns, ratio))
+    return regressions
+
+
+def compare_memory_to_baseline(
+    results: List[MemoryResult], baseline: Dict[str, Any], threshold: float
+) -> List[Tuple[str, float, float, float]]:
+    """Find memory cases whose tracemalloc peak grew by more than ``threshold``.
+
+    Returns:
+        List of (name, baseline peak bytes, current peak bytes, ratio) for regressions
+    """
+    base_peaks = {entry["name"]: entry["peak_bytes"] for entry in baseline.get("memory", [])}
+    regressions = []
+    for result in results:
+        base = base_peaks.get(result.name)
+        if not base:
+            continue
+        ratio = result.peak_bytes / base
+        if ratio > 1.0 + threshold:
+            regressions.append((result.name, base, result.peak_bytes, ratio))
+    return regressions
+
+
+def results_to_json(
+    results: List[BenchmarkResult], memory: Optional[List[MemoryResult]] = None
+) -> Dict[str, Any]:
+    """Build the machine-readable report for a benchmark run."""
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": [result.to_dict() for result in results],
+        "memory": [result.to_dict() for result in memory or []],
+    }
 
 
 def benchmark_timeseries_generation() -> None:
@@ -113,33 +440,201 @@ def benchmark_lesson_plan_complex() -> None:
     _ = build_markdown(config)
 
 
-def main() -> int:
-    """Run all benchmarks."""
-    print("KHTN-THCS Performance Benchmarks")
-    print("=" * 60)
-    
-    # Timeseries benchmarks
-    benchmark("Timeseries: Generation (100 points)", benchmark_timeseries_generation)
-    benchmark(
-        "Timeseries: Serialization (100 points)", 
+# Default benchmark suite
+BENCHMARKS: List[BenchmarkCase] = [
+    BenchmarkCase("Timeseries: Generation (100 points)", benchmark_timeseries_generation),
+    BenchmarkCase(
+        "Timeseries: Serialization (100 points)",
         benchmark_timeseries_serialization,
-        setup=setup_timeseries_data
-    )
-    benchmark(
-        "Timeseries: Validation (100 points)", 
+        setup_timeseries_data,
+    ),
+    BenchmarkCase(
+        "Timeseries: Validation (100 points)",
         benchmark_timeseries_validation,
-        setup=setup_timeseries_data
+        setup_timeseries_data,
+    ),
+    BenchmarkCase("Lesson Plan: Simple", benchmark_lesson_plan_simple),
+    BenchmarkCase("Lesson Plan: Complex (5 activities)", benchmark_lesson_plan_complex),
+]
+
+
+def load_suite(name: str) -> List[BenchmarkCase]:
+    """Return the benchmark cases of a suite, importing its module on demand.
+
+    Suites other than "core" need matplotlib/python-docx, so they are only
+    imported when requested.
+    """
+    if name == "core":
+        return BENCHMARKS
+    if name == "export":
+        from tools.benchmark_export import EXPORT_BENCHMARKS
+
+        return EXPORT_BENCHMARKS
+    if name == "corpus":
+        from tools.benchmark_corpus import CORPUS_BENCHMARKS
+
+        return CORPUS_BENCHMARKS
+    if name == "startup":
+        from tools.benchmark_startup import startup_benchmarks
+
+        return startup_benchmarks()
+    if name == "memory":
+        from tools.benchmark_memory import MEMORY_BENCHMARKS
+
+        return MEMORY_BENCHMARKS
+    raise ValueError(f"Unknown benchmark suite: {name}")
+
+
+SUITE_NAMES = ["core", "export", "corpus", "startup"]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="KHTN-THCS performance benchmarks.")
+    parser.add_argument(
+        "--suite",
+        action="append",
+        choices=SUITE_NAMES + ["all"],
+        default=None,
+        help="Benchmark suite to run; may be repeated (default: core)",
+    )
+    parser.add_argument(
+        "-k", "--filter", default=None, help="Only run benchmarks whose name contains this text"
     )
-    
-    # Lesson plan benchmarks
-    benchmark("Lesson Plan: Simple", benchmark_lesson_plan_simple)
-    benchmark("Lesson Plan: Complex (5 activities)", benchmark_lesson_plan_complex)
-    
+    parser.add_argument("--repeats", type=int, default=7, help="Timed repeats per benchmark")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed warmup calls")
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.05,
+        help="Minimum duration of one repeat in seconds, used to calibrate iterations",
+    )
+    parser.add_argument("--json", type=Path, default=None, help="Write results as JSON")
+    parser.add_argument(
+        "--baseline", type=Path, default=None, help="Baseline JSON to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed relative slowdown of the median before failing (default: 0.10)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the current results to --baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Also run the memory cases (tracemalloc peak, blocks, RSS delta)",
+    )
+    parser.add_argument(
+        "--no-timing",
+        action="store_true",
+        help="Skip the timing suites (useful together with --memory)",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args(argv)
+    if args.update_baseline and args.baseline is None:
+        parser.error("--update-baseline requires --baseline")
+    return args
+
+
+def run_suite(suite: List[BenchmarkCase], args: argparse.Namespace) -> List[BenchmarkResult]:
+    """Run the benchmarks of a suite that match ``args.filter``."""
+    results = []
+    for case in suite:
+        if args.filter and args.filter.lower() not in case.name.lower():
+            continue
+        results.append(
+            benchmark(
+                case.name,
+                case.func,
+                iterations=case.iterations,
+                setup=case.setup,
+                warmup=args.warmup if case.iterations is None else min(args.warmup, 1),
+                repeats=case.repeats or args.repeats,
+                min_time=args.min_time,
+                verbose=not args.quiet,
+                items=case.items,
+            )
+        )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run all benchmarks."""
+    args = parse_args(argv)
+    print("KHTN-THCS Performance Benchmarks")
+    print("=" * 60)
+
+    suites = args.suite or ["core"]
+    if "all" in suites:
+        suites = SUITE_NAMES
+    results: List[BenchmarkResult] = []
+    if not args.no_timing:
+        for suite in suites:
+            results.extend(run_suite(load_suite(suite), args))
+
+    memory: List[MemoryResult] = []
+    if args.memory:
+        for case in load_suite("memory"):
+            if args.filter and args.filter.lower() not in case.name.lower():
+                continue
+            memory.append(measure_memory(case.name, case.func, case.setup, verbose=not args.quiet))
+
     print("\n" + "=" * 60)
-    print("Benchmarks completed successfully!")
+    if results:
+        print(f"{'Benchmark':<48} {'median':>12} {'p95':>12} {'per item':>12}")
+    for result in results:
+        per_item = format_ns(result.per_item_ns) if result.items > 1 else "-"
+        print(
+            f"{result.name:<48} {format_ns(result.median_ns):>12} "
+            f"{format_ns(result.p95_ns):>12} {per_item:>12}"
+        )
+    if memory:
+        print(f"\n{'Memory case':<48} {'peak':>12} {'retained':>12} {'RSS delta':>12}")
+        for entry in memory:
+            print(
+                f"{entry.name:<48} {format_bytes(entry.peak_bytes):>12} "
+                f"{format_bytes(entry.retained_bytes):>12} "
+                f"{format_bytes(entry.rss_delta_bytes):>12}"
+            )
+
+    report = results_to_json(results, memory)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+
+    exit_code = 0
+    if args.baseline:
+        if args.update_baseline or not args.baseline.exists():
+            args.baseline.parent.mkdir(parents=True, exist_ok=True)
+            args.baseline.write_text(
+                json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8"
+            )
+            print(f"Baseline written to {args.baseline}")
+        else:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+            regressions = compare_to_baseline(results, baseline, args.threshold)
+            memory_regressions = compare_memory_to_baseline(memory, baseline, args.threshold)
+            if regressions:
+                print(f"\nRegressions (> {args.threshold:.0%} slower than baseline):")
+                for name, base, current, ratio in regressions:
+                    print(f"  {name}: {format_ns(base)} -> {format_ns(current)} ({ratio:.2f}x)")
+                exit_code = 1
+            if memory_regressions:
+                print(f"\nMemory regressions (peak > {args.threshold:.0%} above baseline):")
+                for name, base, current, ratio in memory_regressions:
+                    print(f"  {name}: {format_bytes(base)} -> {format_bytes(current)} ({ratio:.2f}x)")
+                exit_code = 1
+            if not regressions and not memory_regressions:
+                print(f"\nNo regressions against {args.baseline}")
+
     print("=" * 60)
-    
-    return 0
+    return exit_code
 
 
 if __name__ == "__main__":
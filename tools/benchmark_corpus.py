@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""Synthetic lesson-plan corpus and scaling benchmarks.
+
+The configs in the core suite are small, fixed dictionaries, so they say
+little about how the generators behave on long lesson plans. This module
+generates seeded lesson plans in the ``samples/``/``GiaoAn`` schema at a
+configurable scale (activities, steps, bullet items, inline ``$...$``
+formulas, share of repeated formulas, words per sentence) and benchmarks
+three pipelines across a range of sizes:
+
+- ``build_markdown`` (app/lesson_plan_generator.py)
+- ``WordExporter.build_document`` + save to memory, on a warm formula cache
+- the tools/lesson_planner generator, fed the same plan converted to its
+  schema
+
+Each case processes one document; its ``items`` is the document size in
+characters of text, so "per item" in the report is time per character and
+throughput can be compared across sizes. Run with
+``python tools/benchmark.py --suite corpus``, or run this file directly to
+write the corpus to disk and plot throughput against document size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import io
+import json
+import random
+import shutil
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.lesson_plan_generator import build_markdown
+from tools.benchmark import BenchmarkCase, BenchmarkResult, benchmark, format_ns
+from tools.lesson_planner.lesson_plan_generator import lesson_plan_from_dict
+
+_WORK_DIR = Path(tempfile.mkdtemp(prefix="khtn-bench-corpus-"))
+atexit.register(shutil.rmtree, _WORK_DIR, ignore_errors=True)
+
+_WORDS = (
+    "học sinh giáo viên quan sát thí nghiệm nhiệt độ ánh sáng năng lượng "
+    "khối lượng vận tốc lực đo đạc ghi chép thảo luận nhóm phiếu học tập "
+    "kết quả giải thích hiện tượng so sánh dự đoán kiểm chứng báo cáo "
+    "đun nóng nước cốc dụng cụ an toàn số liệu biểu đồ tính toán nhận xét "
+    "vận dụng thực tiễn đời sống môi trường tự nhiên khoa học"
+).split()
+
+_FORMULA_TEMPLATES = (
+    r"F_{{{i}}} = m a",
+    r"I_{{{i}}} = \dfrac{{P}}{{4\pi r^2}}",
+    r"v_{{{i}}} = v_0 + a t",
+    r"Q_{{{i}}} = m c \Delta t",
+    r"p_{{{i}}} = \frac{{F}}{{S}}",
+    r"E_{{{i}}} = \sqrt{{a^2 + b^2}}",
+    r"W_{{{i}}} = \frac{{1}}{{2}} m v^2",
+    r"n_{{{i}}} = \frac{{m}}{{M}}",
+)
+
+_ACTIVITY_TITLES = ("Khởi động", "Hình thành kiến thức", "Luyện tập", "Vận dụng")
+_ACTORS = ("Giáo viên", "Học sinh", "Nhóm học sinh")
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of one generated lesson plan."""
+
+    activities: int = 4
+    steps: int = 3
+    # Items in each bullet list (objectives, goals, materials, ...)
+    bullets: int = 3
+    # Formula occurrences: half in the formulas table, half inline in steps
+    formulas: int = 4
+    # Share of formula occurrences that repeat an earlier formula (0..1)
+    duplicate_ratio: float = 0.0
+    # Words per generated sentence
+    words: int = 12
+    seed: int = 0
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[:1].upper() + text[1:] + "."
+
+
+def _formula_stream(rng: random.Random, spec: CorpusSpec) -> Iterator[str]:
+    """Yield formulas, repeating earlier ones with ``duplicate_ratio``."""
+    seen: List[str] = []
+    while True:
+        if seen and rng.random() < spec.duplicate_ratio:
+            yield rng.choice(seen)
+            continue
+        index = len(seen)
+        formula = _FORMULA_TEMPLATES[index % len(_FORMULA_TEMPLATES)].format(i=index)
+        seen.append(formula)
+        yield formula
+
+
+def generate_lesson_plan(spec: CorpusSpec) -> Dict[str, Any]:
+    """Generate one lesson plan in the ``samples/`` schema.
+
+    The same spec (including the seed) always produces the same plan.
+
+    Args:
+        spec: Size and content parameters
+
+    Returns:
+        Lesson plan configuration dictionary
+    """
+    rng = random.Random(spec.seed)
+    formulas = _formula_stream(rng, spec)
+
+    def bullets(count: int = spec.bullets) -> List[str]:
+        return [_sentence(rng, spec.words) for _ in range(count)]
+
+    table_count = spec.formulas // 2
+    inline = [next(formulas) for _ in range(spec.formulas - table_count)]
+    table = [next(formulas) for _ in range(table_count)]
+
+    total_steps = max(spec.activities * spec.steps, 1)
+    activities = []
+    for a in range(spec.activities):
+        steps = []
+        for s in range(spec.steps):
+            content = _sentence(rng, spec.words)
+            # Spread the inline formulas evenly over all steps
+            position = a * spec.steps + s
+            for k in range(
+                position * len(inline) // total_steps,
+                (position + 1) * len(inline) // total_steps,
+            ):
+                content += f" Áp dụng ${inline[k]}$."
+            steps.append({"actor": _ACTORS[s % len(_ACTORS)], "content": content})
+        activities.append(
+            {
+                "title": f"{_ACTIVITY_TITLES[a % len(_ACTIVITY_TITLES)]} {a + 1}",
+                "duration": f"{rng.randint(5, 25)} phút",
+                "goals": bullets(),
+                "steps": steps,
+                "digital_assets": bullets(max(spec.bullets // 2, 1)),
+            }
+        )
+
+    return {
+        "metadata": {
+            "title": f"Giáo án tổng hợp ({spec.activities} hoạt động)",
+            "date": "2024-09-05",
+            "grade": "Lớp 8",
+            "unit": "Chủ đề tổng hợp",
+            "topic": _sentence(rng, 6),
+            "teacher": "Tổ KHTN",
+            "school": "THCS Thử nghiệm",
+        },
+        "objectives": bullets(),
+        "competencies": bullets(),
+        "materials": bullets(),
+        "digital_resources": bullets(),
+        "formulas": [
+            {"symbol": f"K_{{{i}}}", "description": _sentence(rng, 5), "latex": latex}
+            for i, latex in enumerate(table)
+        ],
+        "activities": activities,
+        "assessment": bullets(),
+        "homework": bullets(),
+        "reflection": bullets(),
+    }
+
+
+def to_lesson_planner_dict(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a ``samples/`` lesson plan to the tools/lesson_planner schema.
+
+    Each activity becomes one phase whose description joins its steps, so
+    both generators process the same text.
+
+    Args:
+        config: Lesson plan in the ``samples/`` schema
+
+    Returns:
+        Dictionary accepted by ``lesson_plan_from_dict``
+    """
+    metadata = config.get("metadata", {})
+    return {
+        "title": metadata.get("title", ""),
+        "grade_level": metadata.get("grade", ""),
+        "topic": metadata.get("topic", ""),
+        "duration": "2 tiết (90 phút)",
+        "author": metadata.get("teacher"),
+        "objectives": config.get("objectives", []),
+        "materials": config.get("materials", []),
+        "activities": [
+            {
+                "phase": activity["title"],
+                "description": " ".join(step["content"] for step in activity["steps"]),
+                "time_allocation": activity.get("duration"),
+                "notes": "; ".join(activity.get("goals", [])) or None,
+            }
+            for activity in config.get("activities", [])
+        ],
+        "assessments": config.get("assessment", []),
+        "homework": " ".join(config.get("homework", [])) or None,
+        "notes": " ".join(config.get("reflection", [])) or None,
+    }
+
+
+def document_size(config: Dict[str, Any]) -> int:
+    """Number of characters of text in a lesson plan configuration."""
+    return len(json.dumps(config, ensure_ascii=False))
+
+
+# (label, spec, include in the Word pipeline)
+SCALES = [
+    ("S", CorpusSpec(activities=2, steps=2, bullets=2, formulas=2), True),
+    ("M", CorpusSpec(activities=6, steps=4, bullets=4, formulas=10, duplicate_ratio=0.2), True),
+    (
+        "L",
+        CorpusSpec(activities=20, steps=6, bullets=6, formulas=40, duplicate_ratio=0.3, words=18),
+        True,
+    ),
+    (
+        "XL",
+        CorpusSpec(activities=80, steps=8, bullets=8, formulas=160, duplicate_ratio=0.5, words=24),
+        False,
+    ),
+]
+
+
+def _markdown_case(label: str, config: Dict[str, Any]) -> BenchmarkCase:
+    return BenchmarkCase(
+        f"Corpus {label}: build_markdown",
+        lambda: build_markdown(config),
+        items=document_size(config),
+    )
+
+
+def _planner_case(label: str, config: Dict[str, Any]) -> BenchmarkCase:
+    data = to_lesson_planner_dict(config)
+    return BenchmarkCase(
+        f"Corpus {label}: lesson_planner to_markdown",
+        lambda: lesson_plan_from_dict(data).to_markdown(),
+        items=document_size(config),
+    )
+
+
+def _word_case(label: str, config: Dict[str, Any]) -> BenchmarkCase:
+    def setup() -> Any:
+        # Imported here so the text-only cases do not need python-docx
+        from app.word_exporter import WordExporter
+
+        exporter = WordExporter(output_dir=_WORK_DIR / f"word-{label}")
+        exporter.build_document(config)  # warm the formula cache
+        return exporter
+
+    def run(exporter: Any) -> None:
+        exporter.build_document(config).save(io.BytesIO())
+
+    return BenchmarkCase(
+        f"Corpus {label}: WordExporter",
+        run,
+        setup=setup,
+        items=document_size(config),
+        repeats=3 if label == "L" else None,
+    )
+
+
+def build_cases(scales: Sequence = SCALES) -> List[BenchmarkCase]:
+    """Return the scaling benchmarks for the given corpus scales."""
+    cases: List[BenchmarkCase] = []
+    for label, spec, with_word in scales:
+        config = generate_lesson_plan(spec)
+        cases.append(_markdown_case(label, config))
+        cases.append(_planner_case(label, config))
+        if with_word:
+            cases.append(_word_case(label, config))
+    return cases
+
+
+CORPUS_BENCHMARKS: List[BenchmarkCase] = build_cases()
+
+
+def write_corpus(output_dir: Path, scales: Sequence = SCALES) -> List[Path]:
+    """Write the generated lesson plans (both schemas) as JSON files.
+
+    Args:
+        output_dir: Target directory, created if missing
+        scales: Corpus scales to write
+
+    Returns:
+        Paths of the written files
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for label, spec, _ in scales:
+        config = generate_lesson_plan(spec)
+        for suffix, data in (
+            ("", config),
+            ("_lesson_planner", to_lesson_planner_dict(config)),
+        ):
+            path = output_dir / f"corpus_{label}{suffix}.json"
+            path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+            written.append(path)
+        (output_dir / f"corpus_{label}.spec.json").write_text(
+            json.dumps(asdict(spec), indent=2), encoding="utf-8"
+        )
+    return written
+
+
+def plot_throughput(results: List[BenchmarkResult], output_path: Path) -> Path:
+    """Plot throughput (characters per second) against document size.
+
+    Results are grouped by pipeline, i.e. the part of the name after the
+    scale label ("Corpus L: build_markdown" -> "build_markdown").
+
+    Args:
+        results: Results of the corpus benchmarks
+        output_path: Image file to write
+
+    Returns:
+        The output path
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    series: Dict[str, List[BenchmarkResult]] = {}
+    for result in results:
+        pipeline = result.name.split(": ", 1)[-1]
+        series.setdefault(pipeline, []).append(result)
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for pipeline, entries in series.items():
+        entries.sort(key=lambda r: r.items)
+        ax.plot(
+            [r.items for r in entries],
+            [1e9 / r.per_item_ns for r in entries],
+            marker="o",
+            label=pipeline,
+        )
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("Kích thước giáo án (ký tự)")
+    ax.set_ylabel("Thông lượng (ký tự/giây)")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output_path, dpi=120)
+    plt.close(fig)
+    return output_path
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Generate the synthetic lesson-plan corpus and run the scaling benchmarks."
+    )
+    parser.add_argument(
+        "--write-corpus", type=Path, default=None, help="Write the corpus JSON files to DIR"
+    )
+    parser.add_argument(
+        "--plot", type=Path, default=None, help="Plot throughput against document size (PNG)"
+    )
+    parser.add_argument(
+        "--no-word", action="store_true", help="Skip the WordExporter pipeline"
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats per benchmark")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Write the corpus and/or run the scaling benchmarks."""
+    args = parse_args(argv)
+    if args.write_corpus:
+        for path in write_corpus(args.write_corpus):
+            print(f"Wrote {path}")
+        if not args.plot:
+            return 0
+
+    results = []
+    for case in CORPUS_BENCHMARKS:
+        if args.no_word and "WordExporter" in case.name:
+            continue
+        results.append(
+            benchmark(
+                case.name,
+                case.func,
+                iterations=case.iterations,
+                setup=case.setup,
+                repeats=case.repeats or args.repeats,
+                verbose=not args.quiet,
+                items=case.items,
+            )
+        )
+
+    print(f"\n{'Benchmark':<44} {'chars':>9} {'median':>12} {'per char':>12}")
+    for result in results:
+        print(
+            f"{result.name:<44} {result.items:>9,} {format_ns(result.median_ns):>12} "
+            f"{format_ns(result.per_item_ns):>12}"
+        )
+
+    if args.plot:
+        print(f"\nPlot written to {plot_throughput(results, args.plot)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Benchmarks for formula rendering and Word export.
+
+Covers the expensive paths of the export pipeline that the core suite does
+not measure:
+
+- ``LatexRenderer`` cold (formula never seen before) vs warm (file on disk
+  or bytes in the memory cache), to file and to bytes, and cold at an
+  inline display size instead of 20 pt / 300 dpi
+- cold start of rendering in a fresh interpreter (imports + first figure)
+- ``WordExporter`` building documents with 0/10/100 formulas, with a warm
+  renderer (steady state) and with an empty cache (cold)
+- ``doc.save`` of an already built document
+- formula tables of 100 to 5000 rows built in bulk, against the row-by-row
+  python-docx construction they replaced
+
+Run with ``python tools/benchmark.py --suite export``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import io
+import itertools
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.latex_renderer import FormulaSize, LatexRenderer
+from app.word_exporter import WordExporter
+from tools.benchmark import BenchmarkCase
+
+_REPO_ROOT = Path(__file__).parent.parent
+_WORK_DIR = Path(tempfile.mkdtemp(prefix="khtn-bench-"))
+atexit.register(shutil.rmtree, _WORK_DIR, ignore_errors=True)
+
+# Unique suffixes so "cold" benchmarks never hit a cache
+_counter = itertools.count()
+
+# How WordExporter renders formulas in bullet points
+INLINE_SIZE = FormulaSize(height=0.3)
+
+FORMULA_TEMPLATES = [
+    r"F_{{{i}}} = m a",
+    r"I_{{{i}}} = \dfrac{{P}}{{4\pi r^2}}",
+    r"v_{{{i}}} = v_0 + a t",
+    r"Q_{{{i}}} = m c \Delta t",
+    r"\nabla n_{{{i}}} = \frac{{\Delta n}}{{\Delta x}}",
+    r"E_{{{i}}} = \sqrt{{a^2 + b^2}}",
+]
+
+
+def make_formula(index: int) -> str:
+    """Return a realistic formula that is unique for ``index``."""
+    return FORMULA_TEMPLATES[index % len(FORMULA_TEMPLATES)].format(i=index)
+
+
+def make_formula_config(num_formulas: int, offset: int = 0) -> Dict[str, Any]:
+    """Build a lesson config whose formulas appear in a table and inline text.
+
+    Half of the formulas go into the formulas table, the other half into
+    objectives and activity steps as inline ``$...$`` expressions.
+
+    Args:
+        num_formulas: Number of distinct formulas in the document
+        offset: Start index, so different configs use different formulas
+
+    Returns:
+        Lesson plan configuration dictionary
+    """
+    formulas = [make_formula(offset + i) for i in range(num_formulas)]
+    table = formulas[: num_formulas // 2]
+    inline = formulas[num_formulas // 2 :]
+    return {
+        "metadata": {"title": f"Bài kiểm tra hiệu năng ({num_formulas} công thức)"},
+        "objectives": [f"Vận dụng công thức ${f}$ vào bài tập" for f in inline[::2]],
+        "formulas": [
+            {"symbol": f"K{i}", "description": f"Đại lượng {i}", "latex": f}
+            for i, f in enumerate(table)
+        ],
+        "activities": [
+            {
+                "title": "Luyện tập",
+                "duration": "15 phút",
+                "steps": [
+                    {"actor": "Học sinh", "content": f"Tính theo ${f}$ và so sánh"}
+                    for f in inline[1::2]
+                ],
+            }
+        ],
+    }
+
+
+def _fresh_renderer() -> LatexRenderer:
+    return LatexRenderer(output_dir=_WORK_DIR / f"cold-{next(_counter)}")
+
+
+def bench_render_file_cold(renderer: LatexRenderer) -> None:
+    renderer.render_to_file(make_formula(next(_counter)))
+
+
+def bench_render_file_warm(renderer: LatexRenderer) -> None:
+    renderer.render_to_file(make_formula(0))
+
+
+def bench_render_bytes_cold(renderer: LatexRenderer) -> None:
+    renderer.render_to_bytes(make_formula(next(_counter)))
+
+
+def bench_render_bytes_cold_inline(renderer: LatexRenderer) -> None:
+    renderer.render_to_bytes(make_formula(next(_counter)), INLINE_SIZE)
+
+
+def bench_render_bytes_warm(renderer: LatexRenderer) -> None:
+    renderer.render_to_bytes(make_formula(0))
+
+
+def setup_warm_renderer() -> LatexRenderer:
+    renderer = LatexRenderer(output_dir=_WORK_DIR / "warm")
+    renderer.render_to_file(make_formula(0))
+    renderer.render_to_bytes(make_formula(0))
+    return renderer
+
+
+def bench_render_process_cold_start() -> None:
+    """Import the renderer and draw one formula in a new interpreter."""
+    code = (
+        "import sys, tempfile; from pathlib import Path; "
+        "from app.latex_renderer import LatexRenderer; "
+        "LatexRenderer(output_dir=Path(tempfile.mkdtemp())).render_to_bytes('F = ma')"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=_REPO_ROOT, check=True)
+
+
+def _export_case(num_formulas: int, cold: bool) -> BenchmarkCase:
+    label = "cold cache" if cold else "warm cache"
+    config = make_formula_config(num_formulas)
+
+    def setup() -> WordExporter:
+        exporter = WordExporter(output_dir=_WORK_DIR / f"export-{num_formulas}")
+        exporter.build_document(config)
+        return exporter
+
+    def run(exporter: WordExporter) -> None:
+        if cold:
+            exporter = WordExporter(output_dir=_WORK_DIR / f"cold-{next(_counter)}")
+        exporter.export_lesson_plan(config, _WORK_DIR / f"lesson-{num_formulas}.docx")
+
+    expensive = cold and num_formulas > 0
+    return BenchmarkCase(
+        name=f"Word: export {num_formulas} formulas ({label})",
+        func=run,
+        setup=setup,
+        items=max(num_formulas, 1),
+        iterations=1 if expensive else None,
+        repeats=3 if num_formulas >= 100 and cold else None,
+    )
+
+
+def setup_built_document() -> Any:
+    exporter = WordExporter(output_dir=_WORK_DIR / "export-100")
+    return exporter.build_document(make_formula_config(100))
+
+
+def bench_docx_save(doc: Any) -> None:
+    doc.save(io.BytesIO())
+
+
+TABLE_ROWS = (100, 1000, 5000)
+# Row-by-row construction is quadratic; larger sizes take minutes
+PROXY_TABLE_ROWS = (100, 1000)
+
+
+def make_table_formulas(rows: int, distinct: int = 20) -> List[Dict[str, Any]]:
+    """Formula table rows cycling through ``distinct`` formulas (an appendix)."""
+    return [
+        {"symbol": f"K{i}", "description": f"Đại lượng {i}", "latex": make_formula(i % distinct)}
+        for i in range(rows)
+    ]
+
+
+def proxy_formulas_table(exporter: WordExporter, doc: Any, formulas: List[Dict[str, Any]]) -> None:
+    """Build the formulas table row by row through python-docx proxies.
+
+    Reference for the bulk builder: this is how ``_add_formulas_table``
+    worked before.
+    """
+    from docx.shared import Inches
+
+    table = doc.add_table(rows=1, cols=3)
+    table.style = "Light Grid Accent 1"
+    for cell, text in zip(table.rows[0].cells, ("Ký hiệu", "Diễn giải", "Biểu thức")):
+        cell.paragraphs[0].add_run(text).bold = True
+    for formula in formulas:
+        row_cells = table.add_row().cells
+        row_cells[0].text = formula["symbol"]
+        row_cells[1].text = formula["description"]
+        run = row_cells[2].paragraphs[0].add_run()
+        image = io.BytesIO(exporter.latex_renderer.render_to_bytes(formula["latex"]))
+        run.add_picture(image, width=Inches(2.0))
+
+
+def _table_case(rows: int, bulk: bool) -> BenchmarkCase:
+    formulas = make_table_formulas(rows)
+
+    def setup() -> WordExporter:
+        exporter = WordExporter(output_dir=_WORK_DIR / "tables", in_memory_images=True)
+        exporter.build_document({"formulas": formulas[:20]})
+        return exporter
+
+    def run(exporter: WordExporter) -> None:
+        doc = exporter.new_document()
+        if bulk:
+            exporter._add_formulas_table(doc, formulas)
+        else:
+            proxy_formulas_table(exporter, doc, formulas)
+
+    return BenchmarkCase(
+        name=f"Word: formulas table {rows} rows ({'bulk' if bulk else 'python-docx rows'})",
+        func=run,
+        setup=setup,
+        items=rows,
+        iterations=1 if rows >= 1000 else None,
+        repeats=3 if rows >= 1000 else None,
+    )
+
+
+EXPORT_BENCHMARKS: List[BenchmarkCase] = [
+    BenchmarkCase(
+        "Render: cold start (new interpreter)",
+        bench_render_process_cold_start,
+        iterations=1,
+        repeats=3,
+    ),
+    BenchmarkCase("Render: file, cold", bench_render_file_cold, _fresh_renderer),
+    BenchmarkCase("Render: file, warm (on disk)", bench_render_file_warm, setup_warm_renderer),
+    BenchmarkCase("Render: bytes, cold", bench_render_bytes_cold, _fresh_renderer),
+    BenchmarkCase(
+        "Render: bytes, cold, inline size (0.3 in @ 220 dpi)",
+        bench_render_bytes_cold_inline,
+        _fresh_renderer,
+    ),
+    BenchmarkCase(
+        "Render: bytes, warm (memory cache)", bench_render_bytes_warm, setup_warm_renderer
+    ),
+    *(_export_case(n, cold=False) for n in (0, 10, 100)),
+    *(_export_case(n, cold=True) for n in (10, 100)),
+    BenchmarkCase("Word: doc.save (100 formulas)", bench_docx_save, setup_built_document),
+    *(_table_case(n, bulk=True) for n in TABLE_ROWS),
+    *(_table_case(n, bulk=False) for n in PROXY_TABLE_ROWS),
+]
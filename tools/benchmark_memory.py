@@ -0,0 +1,103 @@
+"""Memory benchmark cases for ``tools/benchmark.py --memory``.
+
+Each case runs once under tracemalloc (see ``measure_memory``):
+
+- ``TimeseriesData.from_json_file`` for 10k/100k/1M points
+- ``LatexRenderer`` bytes-cache growth for 50 and 200 distinct formulas
+  (the cache is bounded at 128 entries)
+- Word export of a large formula-heavy document, built and saved in memory
+
+Imports and caches that would only be paid once per process are warmed in
+each case's setup, outside the traced region.
+"""
+
+from __future__ import annotations
+
+import atexit
+import io
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, List
+
+from app.timeseries_data import TimeseriesData, create_sample_timeseries
+from tools.benchmark import BenchmarkCase
+from tools.benchmark_export import make_formula, make_formula_config
+
+_WORK_DIR = Path(tempfile.mkdtemp(prefix="khtn-bench-mem-"))
+atexit.register(shutil.rmtree, _WORK_DIR, ignore_errors=True)
+
+
+def _timeseries_file_setup(num_points: int) -> Callable[[], Path]:
+    def setup() -> Path:
+        path = _WORK_DIR / f"timeseries_{num_points}.json"
+        if not path.exists():
+            create_sample_timeseries("Thí nghiệm", "Thiết bị", 1.0, num_points).save(path)
+        return path
+
+    return setup
+
+
+def load_timeseries(path: Path) -> TimeseriesData:
+    return TimeseriesData.from_json_file(path)
+
+
+def _warm_renderer_setup() -> Any:
+    """Import matplotlib and draw one formula before tracing starts.
+
+    This keeps one-off import and font-cache costs out of the cache-growth
+    numbers; a fresh renderer (empty cache) is returned.
+    """
+    from app.latex_renderer import LatexRenderer
+
+    LatexRenderer(output_dir=_WORK_DIR / "warmup").render_to_bytes("x")
+    return LatexRenderer(output_dir=_WORK_DIR / "formulas")
+
+
+def _renderer_growth(num_formulas: int) -> Callable[[Any], Any]:
+    def run(renderer: Any) -> Any:
+        for i in range(num_formulas):
+            renderer.render_to_bytes(make_formula(i))
+        return renderer
+
+    return run
+
+
+def _warm_exporter_setup() -> Any:
+    from app.word_exporter import WordExporter
+
+    exporter = WordExporter(output_dir=_WORK_DIR / "export")
+    # Warm imports, the default template and the formula cache
+    exporter.build_document(make_formula_config(200))
+    return exporter
+
+
+def export_large_document(exporter: Any) -> bytes:
+    config = make_formula_config(200)
+    config["objectives"] += [f"Mục tiêu chi tiết số {i} " * 5 for i in range(500)]
+    buffer = io.BytesIO()
+    exporter.build_document(config).save(buffer)
+    return buffer.getvalue()
+
+
+MEMORY_BENCHMARKS: List[BenchmarkCase] = [
+    *(
+        BenchmarkCase(
+            f"Timeseries: from_json_file ({n:,} points)",
+            load_timeseries,
+            _timeseries_file_setup(n),
+        )
+        for n in (10_000, 100_000, 1_000_000)
+    ),
+    BenchmarkCase(
+        "Render: bytes cache growth (50 formulas)", _renderer_growth(50), _warm_renderer_setup
+    ),
+    BenchmarkCase(
+        "Render: bytes cache growth (200 formulas)", _renderer_growth(200), _warm_renderer_setup
+    ),
+    BenchmarkCase(
+        "Word: export large document (200 formulas)",
+        export_large_document,
+        _warm_exporter_setup,
+    ),
+]
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Startup-time budgets for the command line tools.
+
+Each CLI command is run in a fresh interpreter with ``python -X importtime``
+and the per-module import times written to stderr are parsed. A command is
+over budget when its top-level imports take longer than its budget, or when
+it loads a heavy library (matplotlib, python-docx, PIL) that the command
+does not need; Markdown generation and timeseries ``info`` must never pay
+for formula rendering or Word support.
+
+Run directly for a report (exit status 1 if a budget is exceeded), or with
+``python tools/benchmark.py --suite startup`` to time the commands.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Set, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+REPO_ROOT = Path(__file__).parent.parent
+HEAVY_MODULES = ("matplotlib", "docx", "PIL", "numpy")
+_IMPORTTIME_PREFIX = "import time:"
+
+
+@dataclass
+class ImportRecord:
+    """One line of ``-X importtime`` output."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    # Nesting level; 0 for imports made directly by the program
+    depth: int
+
+
+@dataclass
+class StartupProfile:
+    """Imports and wall time of one command run."""
+
+    argv: List[str]
+    imports: List[ImportRecord]
+    wall_ms: float
+    returncode: int
+    stderr: str = ""
+
+    @property
+    def import_ms(self) -> float:
+        """Total import time: sum of the top-level cumulative times."""
+        return sum(r.cumulative_us for r in self.imports if r.depth == 0) / 1000.0
+
+    @property
+    def modules(self) -> Set[str]:
+        return {record.module for record in self.imports}
+
+    def loaded(self, package: str) -> bool:
+        """Whether ``package`` or any of its submodules was imported."""
+        prefix = package + "."
+        return any(m == package or m.startswith(prefix) for m in self.modules)
+
+    def slowest(self, count: int = 5) -> List[ImportRecord]:
+        """Imports with the largest self time."""
+        return sorted(self.imports, key=lambda r: -r.self_us)[:count]
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Parse the ``-X importtime`` lines from a process's stderr.
+
+    Args:
+        stderr: Captured standard error; other lines are ignored
+
+    Returns:
+        Import records in the order Python reported them
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith(_IMPORTTIME_PREFIX):
+            continue
+        parts = line[len(_IMPORTTIME_PREFIX):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip(" ")
+        records.append(
+            ImportRecord(
+                module=stripped,
+                self_us=int(parts[0]),
+                cumulative_us=int(parts[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records
+
+
+def measure_startup(argv: Sequence[str], cwd: Path = REPO_ROOT) -> StartupProfile:
+    """Run ``python -X importtime <argv>`` and parse its imports.
+
+    Args:
+        argv: Script and arguments, relative to ``cwd``
+        cwd: Working directory
+
+    Returns:
+        StartupProfile of the run
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000.0
+    return StartupProfile(
+        argv=list(argv),
+        imports=parse_importtime(process.stderr),
+        wall_ms=wall_ms,
+        returncode=process.returncode,
+        stderr=process.stderr,
+    )
+
+
+@dataclass
+class StartupCommand:
+    """A CLI invocation with its import-time budget."""
+
+    name: str
+    argv: List[str]
+    budget_ms: float
+    # Packages the command must not import
+    forbidden: Tuple[str, ...] = HEAVY_MODULES
+
+
+def startup_commands(work_dir: Path) -> List[StartupCommand]:
+    """Return the budgeted commands, writing their input files to ``work_dir``.
+
+    Budgets leave headroom over a typical laptop (about 30 ms of imports for
+    the light commands) so the check is stable on slower CI machines; the
+    forbidden-module check is the strict part.
+    """
+    from app.timeseries_data import create_sample_timeseries
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    data_path = work_dir / "data.json"
+    if not data_path.exists():
+        create_sample_timeseries("Thí nghiệm", "Thiết bị", 1.0, 30).save(data_path)
+    plain_config = work_dir / "plain.json"
+    plain_config.write_text(
+        json.dumps({"metadata": {"title": "Không có công thức"}, "objectives": ["Mục tiêu"]}),
+        encoding="utf-8",
+    )
+
+    lesson = "app/lesson_plan_generator.py"
+    series = "app/timeseries_tool.py"
+    planner = "tools/lesson_planner/lesson_plan_generator.py"
+    sample = "samples/grade6_light_and_shadow.json"
+    return [
+        StartupCommand(
+            "khtn --help",
+            ["-m", "app.cli", "--help"],
+            50,
+            forbidden=HEAVY_MODULES + ("argparse", "app.lesson_plan_generator", "app.timeseries_tool"),
+        ),
+        StartupCommand(
+            "khtn timeseries info", ["-m", "app.cli", "timeseries", "info", str(data_path)], 100
+        ),
+        StartupCommand("lesson-plan --help", [lesson, "--help"], 100),
+        StartupCommand(
+            "lesson-plan markdown", [lesson, sample, "-o", str(work_dir / "plan.md")], 100
+        ),
+        StartupCommand(
+            "lesson-plan word (no formulas)",
+            [lesson, str(plain_config), "--format", "word", "-o", str(work_dir / "plain.docx")],
+            500,
+            forbidden=("matplotlib", "PIL", "numpy"),
+        ),
+        StartupCommand("timeseries --help", [series, "--help"], 100),
+        StartupCommand("timeseries info", [series, "info", str(data_path)], 100),
+        StartupCommand("timeseries validate", [series, "validate", str(data_path)], 100),
+        StartupCommand("timeseries derive", [series, "derive", str(data_path), "delta_T"], 100),
+        StartupCommand("timeseries faults", [series, "faults", str(data_path)], 100),
+        StartupCommand(
+            "lesson_planner markdown",
+            [planner, "--from-json", "tools/lesson_planner/sample_lesson_plan.json",
+             str(work_dir / "planner.md")],
+            100,
+        ),
+    ]
+
+
+def check_budget(command: StartupCommand, profile: StartupProfile) -> List[str]:
+    """Return the budget violations of one run (empty if within budget)."""
+    problems = []
+    if profile.returncode != 0:
+        problems.append(f"exit status {profile.returncode}")
+    if profile.import_ms > command.budget_ms:
+        problems.append(f"imports took {profile.import_ms:.1f} ms > {command.budget_ms:.0f} ms")
+    for package in command.forbidden:
+        if profile.loaded(package):
+            problems.append(f"imports {package}")
+    return problems
+
+
+_WORK_DIR: Optional[Path] = None
+
+
+def _work_dir() -> Path:
+    global _WORK_DIR
+    if _WORK_DIR is None:
+        _WORK_DIR = Path(tempfile.mkdtemp(prefix="khtn-bench-startup-"))
+        atexit.register(shutil.rmtree, _WORK_DIR, ignore_errors=True)
+    return _WORK_DIR
+
+
+def startup_benchmarks() -> list:
+    """Benchmark cases timing each command end to end (without importtime).
+
+    Built on demand because the commands' input files are written first.
+    """
+    from tools.benchmark import BenchmarkCase
+
+    def case(command: StartupCommand) -> BenchmarkCase:
+        def run() -> None:
+            subprocess.run(
+                [sys.executable, *command.argv], cwd=REPO_ROOT, check=True, capture_output=True
+            )
+
+        return BenchmarkCase(f"Startup: {command.name}", run, iterations=1, repeats=5)
+
+    return [case(command) for command in startup_commands(_work_dir())]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Measure every command and report budget violations."""
+    parser = argparse.ArgumentParser(description="Check the CLI startup-time budgets.")
+    parser.add_argument("-k", "--filter", default=None, help="Only check matching commands")
+    parser.add_argument("--top", type=int, default=3, help="Slowest imports to show per command")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    print(f"{'Command':<34} {'imports':>10} {'budget':>8} {'wall':>10}")
+    for command in startup_commands(_work_dir()):
+        if args.filter and args.filter.lower() not in command.name.lower():
+            continue
+        profile = measure_startup(command.argv)
+        problems = check_budget(command, profile)
+        status = "❌ " + "; ".join(problems) if problems else "✅"
+        print(
+            f"{command.name:<34} {profile.import_ms:>8.1f}ms {command.budget_ms:>6.0f}ms "
+            f"{profile.wall_ms:>8.1f}ms  {status}"
+        )
+        for record in profile.slowest(args.top):
+            print(f"    {record.module:<40} {record.self_us / 1000:>7.1f} ms self")
+        failed += bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
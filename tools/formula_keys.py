@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Count how many formula renders canonical cache keys save on a corpus.
+
+Collects the formulas that the exporters would render from Markdown and
+JSON lesson files (inline ``$...$`` expressions and ``"latex"`` fields),
+then compares the number of distinct raw expressions, which is what the
+renderer drew when it keyed on the raw string, with the number of distinct
+canonical spellings (``app.latex_normalizer.normalize``).
+
+Usage::
+
+    python tools/formula_keys.py                      # the repository's lessons
+    python tools/formula_keys.py GiaoAn samples -v    # list merged spellings
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.latex_lint import collect_formulas
+from app.latex_normalizer import normalize
+
+_REPO_ROOT = Path(__file__).parent.parent
+DEFAULT_PATHS = ("GiaoAn", "TaiLieu", "samples", "resources", "docs", "examples", "tools/lesson_planner")
+
+
+def key_report(formulas: List[str]) -> Dict[str, Any]:
+    """Compare raw and canonical keys of a list of formula occurrences.
+
+    Returns:
+        Dictionary with the occurrence count, distinct raw and canonical
+        expressions, and the raw spellings of each canonical key that has
+        more than one
+    """
+    spellings: Dict[str, Counter] = defaultdict(Counter)
+    for formula in formulas:
+        spellings[normalize(formula)][formula] += 1
+    return {
+        "occurrences": len(formulas),
+        "raw_keys": len(set(formulas)),
+        "canonical_keys": len(spellings),
+        "merged": {key: dict(raw) for key, raw in spellings.items() if len(raw) > 1},
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Count duplicate formula renders removed by canonical cache keys."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help=f"Files or directories to scan (default: {', '.join(DEFAULT_PATHS)})",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="List merged spellings")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the key report for the given paths."""
+    args = parse_args(argv)
+    paths = args.paths or [_REPO_ROOT / name for name in DEFAULT_PATHS]
+    report = key_report([formula.latex for formula in collect_formulas(paths)])
+    saved = report["raw_keys"] - report["canonical_keys"]
+    print(f"Formula occurrences:     {report['occurrences']}")
+    print(f"Distinct raw strings:    {report['raw_keys']}")
+    print(f"Distinct canonical keys: {report['canonical_keys']}")
+    share = saved / report["raw_keys"] if report["raw_keys"] else 0.0
+    print(f"Renders saved:           {saved} ({share:.0%})")
+    if args.verbose:
+        for key, raw in sorted(report["merged"].items()):
+            print(f"\n{key}")
+            for spelling, count in sorted(raw.items()):
+                print(f"  {count:>3} x {spelling}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
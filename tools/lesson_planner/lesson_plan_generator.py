@@ -10,11 +10,19 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
 from textwrap import dedent
 from typing import Any, Dict, List, Optional
 
+# Ensure the repository root is in the path for imports
+_repo_root = Path(__file__).resolve().parents[2]
+if str(_repo_root) not in sys.path:
+    sys.path.insert(0, str(_repo_root))
+
+from app.profiling import add_profile_arguments, profile_options, run_profiled
+
 
 @dataclass
 class Activity:
@@ -247,13 +255,17 @@ def build_argument_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Kích hoạt chế độ nhập liệu từng bước trong terminal.",
     )
+    add_profile_arguments(parser)
     return parser
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     parser = build_argument_parser()
     args = parser.parse_args(argv)
+    return run_profiled(_run, profile_options(args, "lesson_planner"), args)
+
 
+def _run(args: argparse.Namespace) -> int:
     if args.from_json:
         plan = load_plan_from_json(args.from_json)
     else: